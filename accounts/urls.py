@@ -2,6 +2,8 @@
 from django.urls import path
 from .views import (
     AccountListView,
+    AccountApiView,
+    AccountBalancesApiView,
     AccountCreateView,
     AccountUpdateView,
     AccountDeleteView
@@ -11,6 +13,8 @@ app_name = 'accounts'
 
 urlpatterns = [
     path('', AccountListView.as_view(), name='account_list'),
+    path('api/', AccountApiView.as_view(), name='account_api'),
+    path('api/balances/', AccountBalancesApiView.as_view(), name='account_balances_api'),
     path('new/', AccountCreateView.as_view(), name='account_create'),
     path('<uuid:pk>/edit/', AccountUpdateView.as_view(), name='account_update'),
     path('<uuid:pk>/delete/', AccountDeleteView.as_view(), name='account_delete'),
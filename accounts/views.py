@@ -2,6 +2,16 @@
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
+import asyncio
+from decimal import Decimal
+
+from django.db.models import Sum
+from django.http import JsonResponse
+from django.shortcuts import redirect
+
+from config.api import ReadOnlyApiView
+from config.cache import user_accounts
+from config.views import AsyncJsonView, alist
 from .models import Account
 
 class AccountListView(LoginRequiredMixin, ListView):
@@ -9,10 +19,41 @@ class AccountListView(LoginRequiredMixin, ListView):
     model = Account
     template_name = 'accounts/account_list.html'
     context_object_name = 'accounts'
+    query_budget = 3
 
     def get_queryset(self):
-        # Ensure users can only see their own accounts
-        return Account.objects.filter(user=self.request.user)
+        # Ensure users can only see their own accounts (cached per user)
+        return user_accounts(self.request.user.pk)
+
+class AccountBalancesApiView(AsyncJsonView):
+    """Async JSON: the user's accounts with their balances, and the total (two queries, run in turn)."""
+    query_budget = 4
+
+    async def get(self, request):
+        accounts = Account.objects.filter(user=request.user)
+        rows, totals = await asyncio.gather(
+            alist(accounts.order_by('name').values('id', 'name', 'account_type', 'balance')),
+            accounts.aaggregate(total=Sum('balance')),
+        )
+        return JsonResponse({
+            'accounts': rows,
+            'total': Decimal(totals['total'] or 0).quantize(Decimal('0.01')),
+        })
+
+class AccountApiView(ReadOnlyApiView):
+    """Read-only JSON list of the user's accounts, by name (keyset-paginated)."""
+    model = Account
+    fields = {
+        'id': 'pk',
+        'name': 'name',
+        'account_type': 'account_type',
+        'initial_balance': 'initial_balance',
+        'balance': 'balance',
+        'created_at': 'created_at',
+    }
+    default_fields = ('id', 'name', 'account_type', 'balance')
+    ordering = ('name', 'pk')
+    query_budget = 3
 
 class AccountCreateView(LoginRequiredMixin, CreateView):
     """View to create a new account."""
@@ -38,6 +79,13 @@ class AccountUpdateView(LoginRequiredMixin, UpdateView):
         # Ensure users can only edit their own accounts
         return Account.objects.filter(user=self.request.user)
 
+    def form_valid(self, form):
+        # Só os campos do formulário: o saldo lido ao abrir a página pode já ter mudado
+        # (gravações de transações o movem com UPDATE ... balance + delta).
+        self.object = form.save(commit=False)
+        self.object.save(update_fields=self.fields)
+        return redirect(self.get_success_url())
+
 class AccountDeleteView(LoginRequiredMixin, DeleteView):
     """View to delete an existing account."""
     model = Account
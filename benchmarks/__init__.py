@@ -0,0 +1,50 @@
+# benchmarks/__init__.py
+"""
+Stand-alone performance benchmarks. Run each module from the project root,
+e.g. `python -m benchmarks.bench_projections`.
+"""
+import os
+
+
+def setup_django():
+    """Configures Django for a benchmark script run outside manage.py."""
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    django.setup()
+
+
+class scratch_database:
+    """
+    Context manager that creates Django's test database for the default
+    connection and destroys it on exit, so benchmarks never touch real data.
+    """
+
+    def __enter__(self):
+        from django.db import connection
+        from django.test.utils import setup_test_environment
+
+        setup_test_environment()
+        self.connection = connection
+        self.old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        return connection
+
+    def __exit__(self, *exc_info):
+        from django.test.utils import teardown_test_environment
+
+        self.connection.creation.destroy_test_db(self.old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def timed(function, repeat=5):
+    """Runs `function` `repeat` times; returns (best seconds, median seconds, last result)."""
+    import statistics
+    import time
+
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - started)
+    return min(timings), statistics.median(timings), result
@@ -0,0 +1,106 @@
+# benchmarks/bench_analytics.py
+"""
+Times the category spending analytics for a heavy user with five years of
+expenses, against the 50 ms target of the analytics endpoint.
+
+    python -m benchmarks.bench_analytics --rows 200000 --categories 30
+
+Timed: category_spend over the whole five years (with partial first and last
+months, so the edge days hit the transactions), category_trends for every
+category and month, category_report with the default top 5, and the
+endpoint itself. For comparison, the same per-category totals aggregated
+straight from the transactions, which is what the monthly summaries avoid.
+
+Runs in a scratch test database created from the configured DATABASES.
+"""
+import argparse
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from benchmarks import scratch_database, setup_django, timed
+
+TARGET_MS = 50
+YEARS = 5
+
+
+def seed(user, accounts, categories, rows, first_day, batch_size=20000):
+    from transactions.models import Transaction
+    from transactions.services import create_transactions
+
+    rng = random.Random(0)
+    days = (YEARS * 365) - 1
+    for start in range(0, rows, batch_size):
+        create_transactions([
+            Transaction(
+                user=user,
+                account=rng.choice(accounts),
+                category=rng.choice(categories),
+                transaction_type='EXPENSE',
+                amount=Decimal(rng.randint(100, 50000)) / 100,
+                date=first_day + timedelta(days=rng.randint(0, days)),
+                description=f"Expense {i}",
+                status='COMPLETED',
+                completion_date=first_day + timedelta(days=days),
+            )
+            for i in range(start, min(start + batch_size, rows))
+        ])
+        print(f"  seeded {min(start + batch_size, rows)} rows", end='\r', flush=True)
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--accounts', type=int, default=4)
+    parser.add_argument('--categories', type=int, default=30)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    setup_django()
+    with scratch_database():
+        from django.contrib.auth import get_user_model
+        from django.db.models import Sum
+        from django.test import Client
+        from accounts.models import Account
+        from transactions.analytics import category_report, category_spend, category_trends
+        from transactions.models import Category, Transaction
+        from transactions.projections import month_index
+
+        user = get_user_model().objects.create_user(username='bench', email='bench@example.com')
+        accounts = [Account.objects.create(user=user, name=f'Account {i}') for i in range(args.accounts)]
+        categories = [Category.objects.create(user=user, name=f'Category {i}') for i in range(args.categories)]
+        first_day = date(2020, 1, 1)
+        seed(user, accounts, categories, args.rows, first_day)
+
+        start, end = date(2020, 1, 10), date(2024, 12, 20)
+        client = Client()
+        client.force_login(user)
+        params = {'start': start.isoformat(), 'end': end.isoformat()}
+        first, last = month_index(start), month_index(end)
+        trends_query = lambda: category_trends(user.pk, first, last)  # noqa: E731
+
+        cases = [
+            ('category_spend', lambda: category_spend(user.pk, start, end)),
+            ('category_trends', trends_query),
+            ('category_report', lambda: category_report(user.pk, start, end)),
+            ('endpoint', lambda: client.get('/transactions/api/analytics/', params)),
+            ('transactions scan', lambda: list(
+                Transaction.objects.filter(user=user, transaction_type='EXPENSE', date__gte=start, date__lte=end)
+                .order_by().values('category_id').annotate(total=Sum('amount'))
+            )),
+        ]
+        print(f"{args.rows} expenses over {YEARS} years, {args.categories} categories, {args.accounts} accounts:")
+        for name, function in cases:
+            best, median, _ = timed(function, repeat=args.repeat)
+            verdict = '' if name == 'transactions scan' else ('ok' if median * 1000 <= TARGET_MS else 'over target')
+            print(f"  {name:18} best {best * 1000:8.2f} ms, median {median * 1000:8.2f} ms  {verdict}")
+
+        # As tendências somam, mês a mês, o mesmo que o total do período.
+        spend = {row['category_id']: row['spend'] for row in category_spend(user.pk, date(2020, 1, 1), date(2024, 12, 31))}
+        trends = category_trends(user.pk, month_index(date(2020, 1, 1)), month_index(date(2024, 12, 1)))
+        assert all(sum(row['spend'] for row in trends[pk]) == total for pk, total in spend.items())
+
+
+if __name__ == '__main__':
+    main()
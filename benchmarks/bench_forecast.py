@@ -0,0 +1,87 @@
+# benchmarks/bench_forecast.py
+"""
+Times transactions.forecast.forecast_balances for a heavy user against the
+100 ms budget for a 24-month daily forecast.
+
+    python -m benchmarks.bench_forecast --transactions 50000 --months 24
+
+Runs in a scratch test database created from the configured DATABASES.
+"""
+import argparse
+import random
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+
+from benchmarks import scratch_database, setup_django, timed
+
+BUDGET_SECONDS = 0.100
+
+
+def seed(user, accounts, count, fixed_parents, today):
+    """Mostly completed history, a tail of pending future rows and some FIXED parents."""
+    from transactions.models import Transaction
+
+    rng = random.Random(0)
+    rows = []
+    for i in range(count):
+        future = rng.random() < 0.1
+        day = today + timedelta(days=rng.randint(-5, 730)) if future else today - timedelta(days=rng.randint(1, 3650))
+        rows.append(Transaction(
+            user=user,
+            account=rng.choice(accounts),
+            transaction_type=rng.choice(['INCOME', 'EXPENSE', 'EXPENSE']),
+            amount=Decimal(rng.randint(100, 50000)) / 100,
+            date=day,
+            completion_date=None if future else day,
+            status='PENDING' if future else 'COMPLETED',
+            recurrence_id=uuid.uuid4() if future else None,
+        ))
+    for i in range(fixed_parents):
+        rows.append(Transaction(
+            user=user,
+            account=rng.choice(accounts),
+            transaction_type='EXPENSE',
+            amount=Decimal('99.90'),
+            date=today - timedelta(days=rng.randint(0, 900)),
+            frequency=Transaction.Frequency.FIXED,
+            installments=0,
+        ))
+    Transaction.objects.bulk_create(rows, batch_size=2000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--transactions', type=int, default=50000)
+    parser.add_argument('--fixed', type=int, default=40)
+    parser.add_argument('--accounts', type=int, default=5)
+    parser.add_argument('--months', type=int, default=24)
+    parser.add_argument('--repeat', type=int, default=7)
+    args = parser.parse_args()
+
+    setup_django()
+    with scratch_database():
+        from django.contrib.auth import get_user_model
+        from accounts.models import Account
+        from transactions.forecast import forecast_balances
+
+        user = get_user_model().objects.create_user(username='bench', email='bench@example.com')
+        accounts = [Account.objects.create(user=user, name=f'Account {i}') for i in range(args.accounts)]
+        today = date.today()
+        seed(user, accounts, args.transactions, args.fixed, today)
+
+        for granularity in ('daily', 'monthly'):
+            best, median, forecast = timed(
+                lambda: forecast_balances(user, months=args.months, granularity=granularity, today=today),
+                repeat=args.repeat,
+            )
+            verdict = 'OK' if median <= BUDGET_SECONDS else 'OVER BUDGET'
+            print(
+                f"{granularity:>7}: {args.transactions} rows, {args.months} months, "
+                f"{len(forecast['dates'])} points x {len(forecast['accounts'])} accounts -> "
+                f"best {best * 1000:.1f} ms, median {median * 1000:.1f} ms [{verdict}]"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# benchmarks/bench_import.py
+"""
+Times transactions.importers.import_statement on a generated CSV statement
+(throughput and peak Python memory), then re-imports it to time the
+all-duplicates path.
+
+    python -m benchmarks.bench_import --lines 1000000 --batch-size 5000
+
+Runs in a scratch test database created from the configured DATABASES.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from benchmarks import scratch_database, setup_django
+
+
+def write_statement(path, lines):
+    rng = random.Random(0)
+    start = date(2015, 1, 1)
+    with open(path, 'w') as handle:
+        handle.write('date,amount,description\n')
+        for i in range(lines):
+            day = start + timedelta(days=i * 3650 // lines)
+            amount = rng.randint(-50000, 20000) / 100
+            handle.write(f"{day.isoformat()},{amount:.2f},Statement line {i}\n")
+
+
+def run(path, account, batch_size):
+    from transactions.importers import import_statement
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    with open(path) as lines:
+        result = import_statement(lines, account, batch_size=batch_size)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--lines', type=int, default=100000)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    setup_django()
+    handle, path = tempfile.mkstemp(suffix='.csv')
+    os.close(handle)
+    try:
+        write_statement(path, args.lines)
+        with scratch_database():
+            from django.contrib.auth import get_user_model
+            from accounts.models import Account
+
+            user = get_user_model().objects.create_user(username='bench', email='bench@example.com')
+            account = Account.objects.create(user=user, name='Checking')
+            for label in ('first import', 're-import'):
+                result, elapsed, peak = run(path, account, args.batch_size)
+                print(
+                    f"{label:>12}: {result.read} lines, {result.inserted} inserted, "
+                    f"{result.duplicates} duplicates in {elapsed:.2f}s "
+                    f"({result.read / elapsed:.0f} rows/s), peak memory {peak / 1024 / 1024:.1f} MiB"
+                )
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
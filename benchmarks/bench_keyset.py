@@ -0,0 +1,108 @@
+# benchmarks/bench_keyset.py
+"""
+Times one page of the transactions JSON API at increasing depth, keyset
+pagination (what the API does) against LIMIT/OFFSET, for a single user with
+many rows.
+
+    python -m benchmarks.bench_keyset --rows 1000000 --limit 100
+
+Pages are read at 0%, 50% and 99% of the user's rows. Both strategies run the
+same values_list() query in the API order (date, created_at, id descending);
+the endpoint itself is timed too, with the cursor of the row before each page
+(looked up untimed). A keyset page should cost the same at any depth, an OFFSET
+page grows with the rows skipped. --explain prints the database plan of the
+deepest keyset page.
+
+Runs in a scratch test database created from the configured DATABASES.
+"""
+import argparse
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from benchmarks import scratch_database, setup_django, timed
+
+COLUMNS = ('pk', 'date', 'status', 'transaction_type', 'amount', 'account_id', 'category_id', 'description')
+ORDERING = ('-date', '-created_at', '-pk')
+
+
+def seed(user, accounts, categories, rows, batch_size=20000):
+    from transactions.models import Transaction
+    from transactions.services import create_transactions
+
+    rng = random.Random(0)
+    first_day = date(2015, 1, 1)
+    # Cerca de 10 anos de datas: muitas linhas por dia, como num usuário importado em massa.
+    for start in range(0, rows, batch_size):
+        create_transactions([
+            Transaction(
+                user=user,
+                account=rng.choice(accounts),
+                category=rng.choice(categories),
+                transaction_type=rng.choice(['INCOME', 'EXPENSE']),
+                amount=Decimal(rng.randint(100, 50000)) / 100,
+                date=first_day + timedelta(days=rng.randint(0, 3650)),
+                description=f"Transaction {i}",
+                status='COMPLETED',
+                completion_date=date(2025, 1, 1),
+            )
+            for i in range(start, min(start + batch_size, rows))
+        ])
+        print(f"  seeded {min(start + batch_size, rows)} rows", end='\r', flush=True)
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--limit', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--explain', action='store_true')
+    args = parser.parse_args()
+
+    setup_django()
+    with scratch_database():
+        from django.contrib.auth import get_user_model
+        from django.test import Client
+        from accounts.models import Account
+        from config.api import encode_cursor, keyset_filter
+        from transactions.models import Category, Transaction
+
+        user = get_user_model().objects.create_user(username='bench', email='bench@example.com')
+        accounts = [Account.objects.create(user=user, name=f'Account {i}') for i in range(3)]
+        categories = [Category.objects.create(user=user, name=f'Category {i}') for i in range(8)]
+        seed(user, accounts, categories, args.rows)
+
+        client = Client()
+        client.force_login(user)
+        rows = Transaction.objects.filter(user=user).order_by(*ORDERING)
+        print(f"one page of {args.limit} rows out of {args.rows}:")
+
+        for depth in (0, 0.5, 0.99):
+            offset = int((args.rows - args.limit) * depth)
+            params = {'limit': args.limit}
+            keyset = rows
+            if offset:
+                after = rows.values_list('date', 'created_at', 'pk')[offset - 1]
+                params['cursor'] = encode_cursor(after)
+                keyset = rows.filter(keyset_filter(ORDERING, after))
+
+            keyset_best, keyset_median, keyset_page = timed(
+                lambda: list(keyset.values_list(*COLUMNS)[:args.limit]), repeat=args.repeat)
+            offset_best, offset_median, offset_page = timed(
+                lambda: list(rows.values_list(*COLUMNS)[offset:offset + args.limit]), repeat=args.repeat)
+            api_best, api_median, response = timed(
+                lambda: client.get('/transactions/api/transactions/', params), repeat=args.repeat)
+            assert keyset_page == offset_page
+            assert [row['id'] for row in response.json()['results']] == [str(row[0]) for row in keyset_page]
+
+            print(f"  depth {depth:>4.0%} (offset {offset}):")
+            print(f"    keyset: best {keyset_best * 1000:8.2f} ms, median {keyset_median * 1000:8.2f} ms")
+            print(f"    offset: best {offset_best * 1000:8.2f} ms, median {offset_median * 1000:8.2f} ms")
+            print(f"    api:    best {api_best * 1000:8.2f} ms, median {api_median * 1000:8.2f} ms")
+            if args.explain and depth == 0.99:
+                print(keyset.values_list(*COLUMNS)[:args.limit].explain())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+# benchmarks/bench_month_render.py
+"""
+Times the transaction dashboard for a full month page, cold (cache empty:
+queries, projections and template rendering) against warm (rendered month
+fragment served from the cache).
+
+    python -m benchmarks.bench_month_render --rows 100 --fixed 20
+
+Runs in a scratch test database created from the configured DATABASES.
+"""
+import argparse
+import random
+from datetime import date
+from decimal import Decimal
+
+from benchmarks import scratch_database, setup_django, timed
+
+
+def seed(user, accounts, categories, rows, fixed):
+    from transactions.models import Transaction
+    from transactions.services import create_transactions
+
+    rng = random.Random(0)
+    transactions = [
+        Transaction(
+            user=user,
+            account=rng.choice(accounts),
+            category=rng.choice(categories),
+            transaction_type=rng.choice(['INCOME', 'EXPENSE']),
+            amount=Decimal(rng.randint(100, 50000)) / 100,
+            date=date(2024, 3, rng.randint(1, 31)),
+            description=f"Compra número {i} com uma descrição comprida o bastante para ser truncada",
+            completion_date=date(2024, 3, 31) if rng.random() < 0.7 else None,
+        )
+        for i in range(rows)
+    ]
+    transactions += [
+        Transaction(
+            user=user,
+            account=rng.choice(accounts),
+            category=rng.choice(categories),
+            transaction_type='EXPENSE',
+            amount=Decimal('99.90'),
+            date=date(2023, rng.randint(1, 12), rng.randint(1, 28)),
+            frequency=Transaction.Frequency.FIXED,
+            installments=0,
+        )
+        for _ in range(fixed)
+    ]
+    create_transactions(transactions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=100)
+    parser.add_argument('--fixed', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    with scratch_database():
+        from django.contrib.auth import get_user_model
+        from django.core.cache import cache
+        from django.test import Client
+        from accounts.models import Account
+        from transactions.models import Category
+
+        user = get_user_model().objects.create_user(username='bench', email='bench@example.com')
+        accounts = [Account.objects.create(user=user, name=f'Account {i}') for i in range(3)]
+        categories = [Category.objects.create(user=user, name=f'Category {i}') for i in range(8)]
+        seed(user, accounts, categories, args.rows, args.fixed)
+
+        client = Client()
+        client.force_login(user)
+        params = {'year': 2024, 'month': 3}
+
+        def cold():
+            cache.clear()
+            return client.get('/transactions/', params)
+
+        def warm():
+            return client.get('/transactions/', params)
+
+        cold_best, cold_median, cold_response = timed(cold, repeat=args.repeat)
+        warm()
+        warm_best, warm_median, warm_response = timed(warm, repeat=args.repeat)
+        assert cold_response.content == warm_response.content
+        print(f"month page, {args.rows} rows + {args.fixed} fixed projections:")
+        print(f"  cold: best {cold_best * 1000:.1f} ms, median {cold_median * 1000:.1f} ms")
+        print(f"  warm: best {warm_best * 1000:.1f} ms, median {warm_median * 1000:.1f} ms "
+              f"({cold_median / warm_median:.1f}x faster)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+# benchmarks/bench_projections.py
+"""
+Compares the FIXED projection engine (transactions.projections) with the
+previous dashboard loop, which called parent.date.replace() and built an
+unsaved Transaction for every parent in every month.
+
+    python -m benchmarks.bench_projections --parents 1000 --months 120
+
+No database is needed: the parents are unsaved model instances.
+"""
+import argparse
+import random
+import time
+import uuid
+from datetime import date
+from decimal import Decimal
+
+from benchmarks import setup_django
+
+
+def legacy_projection(parents, months, Transaction):
+    """The pre-existing per-month loop; days 29-31 are dropped in short months."""
+    projected = []
+    for index in range(months):
+        year, month = 2025 + index // 12, index % 12 + 1
+        for parent in parents:
+            try:
+                projected_date = parent.date.replace(year=year, month=month)
+                if projected_date < parent.date:
+                    continue
+                projected.append(Transaction(
+                    id=parent.id,
+                    date=projected_date,
+                    account=parent.account,
+                    to_account=parent.to_account,
+                    category=parent.category,
+                    description=parent.description,
+                    amount=parent.amount,
+                    transaction_type=parent.transaction_type,
+                    status=Transaction.Status.PENDING,
+                    frequency=parent.frequency,
+                    completion_date=None
+                ))
+            except ValueError:
+                continue
+    return projected
+
+
+def best_of(repeat, function):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--parents', type=int, default=1000)
+    parser.add_argument('--months', type=int, default=120)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    setup_django()
+    from accounts.models import Account
+    from transactions.models import Category, Transaction
+    from transactions.projections import project_fixed
+
+    rng = random.Random(0)
+    accounts = [Account(name=f'Account {i}') for i in range(5)]
+    categories = [Category(name=f'Category {i}') for i in range(20)]
+    parents = [
+        Transaction(
+            id=uuid.uuid4(),
+            date=date(2024, rng.choice([1, 3, 5, 7, 8, 10, 12]), rng.randint(1, 31 if rng.random() < 0.2 else 28)),
+            account=rng.choice(accounts),
+            category=rng.choice(categories),
+            amount=Decimal('10.00'),
+            transaction_type=Transaction.TransactionType.EXPENSE,
+            frequency=Transaction.Frequency.FIXED,
+        )
+        for _ in range(args.parents)
+    ]
+    start = date(2025, 1, 1)
+    end_year, end_month = divmod(args.months, 12)
+    end = date(2025 + end_year, end_month + 1, 1)
+
+    legacy_seconds, legacy = best_of(args.repeat, lambda: legacy_projection(parents, args.months, Transaction))
+    engine_seconds, engine = best_of(args.repeat, lambda: project_fixed(parents, start, end))
+
+    print(f"{args.parents} parents x {args.months} months")
+    print(f"  legacy loop : {legacy_seconds * 1000:9.1f} ms  {len(legacy):>9} rows (days 29-31 dropped)")
+    print(f"  projections : {engine_seconds * 1000:9.1f} ms  {len(engine):>9} rows")
+    print(f"  speed-up    : {legacy_seconds / engine_seconds:9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+# benchmarks/bench_serving.py
+"""
+Requests per second and p99 latency of the serving profiles, before (runserver,
+a new database connection per request) and after (gunicorn with persistent or
+pooled connections), against the local Postgres from .env.
+
+    python -m benchmarks.bench_serving --username alice --concurrency 1,16,64
+    python -m benchmarks.bench_serving --username alice --profiles runserver,gunicorn_pool \\
+        --pgbouncer-host localhost --pgbouncer-port 6432 --output serving.json
+
+Each profile starts its own server process on --port with the profile's
+environment (WEB_SERVER, DB_CONNECTION_MODE, ...), waits until it answers,
+runs benchmarks/load_test against the dashboard and the transactions API and
+stops it. The gunicorn_pgbouncer profile runs only with --pgbouncer-host.
+The user (e.g. from `manage.py seed_synthetic`) must exist in that database.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from benchmarks.load_test import fetch, run, session_for
+
+# (nome, comando, ambiente)
+PROFILES = (
+    ('runserver', ['{python}', 'manage.py', 'runserver', '--noreload', '127.0.0.1:{port}'],
+     {'DB_CONN_MAX_AGE': '0'}),
+    ('gunicorn_no_reuse', ['gunicorn', '-c', 'config/gunicorn.py'],
+     {'DB_CONN_MAX_AGE': '0'}),
+    ('gunicorn_persistent', ['gunicorn', '-c', 'config/gunicorn.py'],
+     {'DB_CONNECTION_MODE': 'persistent'}),
+    ('gunicorn_pool', ['gunicorn', '-c', 'config/gunicorn.py'],
+     {'DB_CONNECTION_MODE': 'pool'}),
+    ('gunicorn_pgbouncer', ['gunicorn', '-c', 'config/gunicorn.py'],
+     {'DB_CONNECTION_MODE': 'pgbouncer'}),
+    ('uvicorn_pool', ['gunicorn', '-c', 'config/gunicorn.py'],
+     {'WEB_SERVER': 'asgi', 'DB_CONNECTION_MODE': 'pool'}),
+)
+
+ENDPOINTS = (
+    ('dashboard', '/transactions/'),
+    ('transactions_api', '/transactions/api/transactions/?limit=100'),
+)
+
+
+def wait_until_up(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=1).close()
+            return
+        except urllib.error.HTTPError:
+            return  # respondeu, mesmo que com 4xx
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.2)
+    raise RuntimeError(f"server did not answer at {url} within {timeout}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--username', required=True)
+    parser.add_argument('--profiles', help="Comma-separated subset of: " + ', '.join(p[0] for p in PROFILES))
+    parser.add_argument('--concurrency', default='1,16,64')
+    parser.add_argument('--requests', type=int, default=1000, help="Requests per endpoint and level.")
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--workers', default='4', help="WEB_WORKERS for the gunicorn profiles.")
+    parser.add_argument('--threads', default='8', help="WEB_THREADS (and default pool size) for gunicorn.")
+    parser.add_argument('--pgbouncer-host')
+    parser.add_argument('--pgbouncer-port', default='6432')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--output', help="Write the results as JSON to this file.")
+    args = parser.parse_args()
+
+    selected = set(args.profiles.split(',')) if args.profiles else None
+    cookie = f'sessionid={session_for(args.username)}'
+    base_url = f'http://127.0.0.1:{args.port}'
+    results = []
+
+    for name, command, profile_env in PROFILES:
+        if selected and name not in selected:
+            continue
+        if name == 'gunicorn_pgbouncer':
+            if not args.pgbouncer_host:
+                continue
+            profile_env = {**profile_env, 'POSTGRES_HOST': args.pgbouncer_host, 'POSTGRES_PORT': args.pgbouncer_port}
+        env = {
+            **os.environ, 'DEBUG': '0', 'ALLOWED_HOSTS': '127.0.0.1', 'WEB_BIND': f'127.0.0.1:{args.port}',
+            'WEB_WORKERS': args.workers, 'WEB_THREADS': args.threads, **profile_env,
+        }
+        argv = [part.format(python=sys.executable, port=args.port) for part in command]
+        server = subprocess.Popen(argv, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_until_up(base_url + '/auth/login/')
+            print(f"{name}:")
+            for concurrency in (int(level) for level in args.concurrency.split(',')):
+                for endpoint, path in ENDPOINTS:
+                    url = base_url + path
+                    fetch(url, cookie, args.timeout)  # aquece caches e conexões
+                    result = {'profile': name, 'endpoint': endpoint, 'concurrency': concurrency,
+                              **run(url, cookie, concurrency, args.requests, args.timeout)}
+                    results.append(result)
+                    print(f"  {endpoint:<17} x{concurrency:<4} {result['rps']:>8.1f} req/s  "
+                          f"p50 {result['p50_ms']:>8.1f} ms  p99 {result['p99_ms']:>8.1f} ms  "
+                          f"errors {result['errors']}")
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump({'args': vars(args), 'results': results}, handle, indent=2)
+        print(f"\nWrote {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
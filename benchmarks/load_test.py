@@ -0,0 +1,143 @@
+# benchmarks/load_test.py
+"""
+Load test of the hot read endpoints: sync views against their async (ASGI) JSON
+counterparts, with many concurrent clients.
+
+    docker compose up web web_asgi
+    docker compose exec web python -m benchmarks.load_test --username alice \\
+        --base-url http://web_asgi:8001 --concurrency 1,10,50 --requests 500
+
+Both kinds of view are requested from the same server, so run it against the
+ASGI service (uvicorn) to compare like with like; against runserver (WSGI) the
+async views are run through async_to_sync and gain nothing. The session cookie
+is minted directly in the database for --username, so the script must run with
+the same settings (database, SECRET_KEY) as the server; --sessionid skips that.
+
+For each endpoint and concurrency level it prints requests per second and the
+p50/p95/p99 latency; --output writes the results as JSON.
+"""
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import setup_django
+
+# (nome, caminho, assíncrono?) - pares sync/async lado a lado.
+ENDPOINTS = (
+    ('dashboard_sync', '/transactions/?year={year}&month={month}', False),
+    ('month_api_async', '/transactions/api/month/?year={year}&month={month}', True),
+    ('accounts_sync', '/accounts/', False),
+    ('balances_api_async', '/accounts/api/balances/', True),
+    ('summary_api_async', '/transactions/api/summary/?year={year}&month={month}', True),
+)
+
+
+def session_for(username):
+    """A session id for `username`, created in the configured session store."""
+    setup_django()
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+
+    client = Client()
+    client.force_login(get_user_model().objects.get(username=username))
+    return client.cookies[settings.SESSION_COOKIE_NAME].value
+
+
+def fetch(url, cookie, timeout):
+    """Returns (seconds, ok) for one GET."""
+    request = urllib.request.Request(url, headers={'Cookie': cookie})
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            ok = response.status == 200
+    except (urllib.error.URLError, OSError):
+        ok = False
+    return time.perf_counter() - started, ok
+
+
+def percentile_ms(latencies, fraction):
+    """The `fraction` percentile of sorted `latencies` (seconds), in milliseconds."""
+    return round(latencies[min(int(len(latencies) * fraction), len(latencies) - 1)] * 1000, 1)
+
+
+def run(url, cookie, concurrency, requests, timeout):
+    """`requests` GETs of `url` spread over `concurrency` client threads."""
+    remaining = iter(range(requests))
+    lock = threading.Lock()
+    samples = []
+
+    def client():
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+            samples.append(fetch(url, cookie, timeout))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(client)
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(seconds for seconds, _ in samples)
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for _, ok in samples if not ok),
+        'seconds': round(elapsed, 3),
+        'rps': round(len(samples) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 1),
+        'p95_ms': percentile_ms(latencies, 0.95),
+        'p99_ms': percentile_ms(latencies, 0.99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--base-url', default='http://localhost:8001')
+    parser.add_argument('--username', help="User whose session is used (needs database access).")
+    parser.add_argument('--sessionid', help="An existing session id, instead of --username.")
+    parser.add_argument('--concurrency', default='1,10,50', help="Comma-separated client counts.")
+    parser.add_argument('--requests', type=int, default=500, help="Requests per endpoint and level.")
+    parser.add_argument('--year', type=int, default=time.localtime().tm_year)
+    parser.add_argument('--month', type=int, default=time.localtime().tm_mon)
+    parser.add_argument('--endpoints', help="Comma-separated subset of: " + ', '.join(e[0] for e in ENDPOINTS))
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--output', help="Write the results as JSON to this file.")
+    args = parser.parse_args()
+    if not args.username and not args.sessionid:
+        parser.error("pass --username or --sessionid")
+
+    sessionid = args.sessionid or session_for(args.username)
+    cookie = f'sessionid={sessionid}'
+    selected = set(args.endpoints.split(',')) if args.endpoints else None
+    results = []
+
+    for concurrency in (int(level) for level in args.concurrency.split(',')):
+        print(f"{concurrency} concurrent clients, {args.requests} requests per endpoint:")
+        for name, path, is_async in ENDPOINTS:
+            if selected and name not in selected:
+                continue
+            url = args.base_url.rstrip('/') + path.format(year=args.year, month=args.month)
+            fetch(url, cookie, args.timeout)  # aquece caches e conexões
+            result = {'name': name, 'async': is_async, 'concurrency': concurrency,
+                      **run(url, cookie, concurrency, args.requests, args.timeout)}
+            results.append(result)
+            print(f"  {name:<20} {result['rps']:>8.1f} req/s  p50 {result['p50_ms']:>8.1f} ms  "
+                  f"p95 {result['p95_ms']:>8.1f} ms  p99 {result['p99_ms']:>8.1f} ms  errors {result['errors']}")
+
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump({'args': vars(args), 'results': results}, handle, indent=2)
+        print(f"\nWrote {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+# benchmarks/run_benchmarks.py
+"""
+Reproducible benchmark suite over synthetic households at several data sizes.
+
+    python -m benchmarks.run_benchmarks --sizes 5,50 --output results.json
+    python -m benchmarks.run_benchmarks --sizes 5,50 --compare results.json
+
+Each size is a number of households (about 1k transactions each with the
+defaults), seeded with transactions.synthetic in a scratch test database.
+Every write benchmark runs inside a transaction that is rolled back, so runs
+do not change the data the next one sees. Results are printed and, with
+--output, written as JSON; --compare prints the change against an earlier
+JSON file (e.g. from the previous commit).
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+from datetime import date
+from decimal import Decimal
+
+from benchmarks import scratch_database, setup_django, timed
+
+
+class Rollback(Exception):
+    pass
+
+
+def rolled_back(function):
+    """Wraps `function` so each call runs in a transaction that is then rolled back."""
+    from django.db import transaction as db_transaction
+
+    def run():
+        try:
+            with db_transaction.atomic():
+                result = function()
+                raise Rollback(result)
+        except Rollback as rollback:
+            return rollback.args[0]
+    return run
+
+
+def suite(user, today):
+    """(name, function) pairs timed at every size, all for the first household."""
+    from django.core.cache import cache
+    from django.test import Client
+    from accounts.models import Account
+    from transactions.forms import TransactionForm
+    from transactions.forecast import forecast_balances
+    from transactions.models import Category, Transaction
+    from transactions.services import build_installments, create_transactions
+    from transactions.tasks import efetivar_transacoes_pendentes
+
+    client = Client()
+    client.force_login(user)
+    month = {'year': today.year, 'month': today.month}
+    checking = Account.objects.filter(user=user, name='Checking').get()
+    groceries = Category.objects.filter(user=user, name='Groceries').get()
+
+    def dashboard_cold():
+        cache.clear()
+        return client.get('/transactions/', month)
+
+    def dashboard_warm():
+        return client.get('/transactions/', month)
+
+    def signals_create_update_delete():
+        transaction = Transaction.objects.create(
+            user=user, account=checking, category=groceries, transaction_type='EXPENSE',
+            amount=Decimal('12.34'), date=today, completion_date=today, status='COMPLETED',
+        )
+        transaction.amount = Decimal('43.21')
+        transaction.save()
+        transaction.delete()
+
+    def installments_12():
+        return create_transactions(build_installments(
+            user=user, account=checking, transaction_type='EXPENSE', amount=Decimal('99.90'),
+            start_date=today, description='Benchmark', installments=12, category=groceries,
+        ))
+
+    form_data = {
+        'transaction_type': 'EXPENSE', 'account': checking.pk, 'amount': '12.34', 'date': today.isoformat(),
+        'category': groceries.pk, 'description': 'Benchmark', 'status': 'PENDING', 'frequency': 'NONE',
+        'installments': 1,
+    }
+
+    def transaction_form():
+        rendered = str(TransactionForm(user=user))
+        bound = TransactionForm(form_data, user=user)
+        assert bound.is_valid(), bound.errors
+        return rendered
+
+    return [
+        ('dashboard_cold', dashboard_cold),
+        ('dashboard_warm', dashboard_warm),
+        ('forecast_24_months', lambda: forecast_balances(user, months=24, today=today)),
+        ('signals_create_update_delete', rolled_back(signals_create_update_delete)),
+        ('installments_12', rolled_back(installments_12)),
+        ('transaction_form', transaction_form),
+        ('nightly_task', rolled_back(efetivar_transacoes_pendentes)),
+    ]
+
+
+def metadata():
+    import django
+    from django.db import connection
+
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+    }
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as handle:
+        baseline = {(r['size'], r['name']): r for r in json.load(handle)['results']}
+    print(f"\nChange against {baseline_path} (median):")
+    for result in results:
+        before = baseline.get((result['size'], result['name']))
+        if before:
+            change = (result['median_ms'] - before['median_ms']) / before['median_ms'] * 100
+            print(f"  {result['size']:>5} {result['name']:<30} {before['median_ms']:>9.2f} -> "
+                  f"{result['median_ms']:>9.2f} ms ({change:+.0f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', default='5,25', help="Comma-separated household counts, ascending.")
+    parser.add_argument('--months', type=int, default=24)
+    parser.add_argument('--per-month', type=int, default=40)
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--output', help="Write the results as JSON to this file.")
+    parser.add_argument('--compare', help="Earlier JSON results to compare against.")
+    args = parser.parse_args()
+    sizes = sorted(int(size) for size in args.sizes.split(','))
+
+    setup_django()
+    results = []
+    with scratch_database():
+        from django.contrib.auth import get_user_model
+        from transactions.models import Transaction
+        from transactions.synthetic import seed_households
+
+        today = date.today()
+        seeded = 0
+        for size in sizes:
+            # Os tamanhos são cumulativos: só semeia as famílias que faltam.
+            seed_households(size - seeded, months=args.months, per_month=args.per_month,
+                            seed=size, prefix='bench', today=today)
+            seeded = size
+            rows = Transaction.objects.count()
+            user = get_user_model().objects.filter(username__startswith='bench').order_by('pk').first()
+            print(f"{size} households, {rows} transactions:")
+            for name, function in suite(user, today):
+                best, median, _ = timed(function, repeat=args.repeat)
+                results.append({
+                    'size': size, 'rows': rows, 'name': name, 'repeat': args.repeat,
+                    'best_ms': round(best * 1000, 3), 'median_ms': round(median * 1000, 3),
+                })
+                print(f"  {name:<30} best {best * 1000:>9.2f} ms  median {median * 1000:>9.2f} ms")
+        meta = metadata()
+
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump({'meta': {**meta, 'args': vars(args)}, 'results': results}, handle, indent=2)
+        print(f"\nWrote {args.output}", file=sys.stderr)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
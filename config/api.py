@@ -0,0 +1,173 @@
+# config/api.py
+"""
+Read-only JSON list endpoints over the user's own rows.
+
+Rows are read with values_list() (no model instances), the client picks the
+columns with `?fields=a,b,c`, and pages are chained by keyset: the response
+carries an opaque `next` cursor holding the ordering values of its last row,
+and the next page starts strictly after them. A page therefore costs one
+index range scan of `limit` rows however deep it is, unlike LIMIT/OFFSET.
+
+Responses carry an ETag and Last-Modified derived from the user's data version
+(config/cache.py), so a client revalidating an unchanged list gets a 304
+without any query on the rows.
+"""
+import base64
+import json
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from django.db.models import Q
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from django.views.generic import View
+
+from config.cache import user_data_version
+
+
+class ApiError(Exception):
+    """A bad request parameter; reported to the client as a 400."""
+
+
+def cleaned_data(form):
+    """The cleaned data of a bound filter form, or an ApiError listing its errors."""
+    if not form.is_valid():
+        raise ApiError('; '.join(f"{name}: {' '.join(errors)}" for name, errors in form.errors.items()))
+    return form.cleaned_data
+
+
+def data_etag(request, *args, **kwargs):
+    return f'"{request.user.pk}-{user_data_version(request.user.pk)}"'
+
+
+def data_last_modified(request, *args, **kwargs):
+    # A versão é um timestamp em nanossegundos.
+    return datetime.fromtimestamp(user_data_version(request.user.pk) / 1e9, tz=timezone.utc)
+
+
+def _cursor_value(value):
+    # isoformat() completo: o DjangoJSONEncoder cortaria os microssegundos de created_at.
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, (uuid.UUID, Decimal)):
+        return str(value)
+    return value
+
+
+def encode_cursor(values):
+    payload = json.dumps([_cursor_value(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, fields):
+    """The ordering values stored in `token`, converted back with each model field's to_python()."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        if not isinstance(values, list) or len(values) != len(fields):
+            raise ValueError
+        return [field.to_python(value) for field, value in zip(fields, values)]
+    except Exception as error:
+        raise ApiError("Invalid cursor.") from error
+
+
+def keyset_filter(ordering, values):
+    """
+    Rows strictly after `values` in `ordering` (e.g. ['-date', '-created_at', '-pk']):
+    (a < x) OR (a = x AND b < y) OR (a = x AND b = y AND c < z), plus a plain
+    bound on the first column so the database can start the index scan there.
+    """
+    condition = Q()
+    equal = {}
+    for entry, value in zip(ordering, values):
+        name = entry.lstrip('-')
+        operator = 'lt' if entry.startswith('-') else 'gt'
+        condition |= Q(**equal, **{f'{name}__{operator}': value})
+        equal[name] = value
+    first = ordering[0]
+    bound = {f"{first.lstrip('-')}__{'lte' if first.startswith('-') else 'gte'}": values[0]}
+    return Q(**bound) & condition
+
+
+# GET de dados que só mudam com a versão do usuário: revalidado a cada uso (304 se nada mudou).
+revalidated = [
+    cache_control(private=True, no_cache=True),
+    condition(etag_func=data_etag, last_modified_func=data_last_modified),
+]
+
+
+class JsonApiView(View):
+    """Base of the read-only JSON endpoints: 401 for anonymous users, 400 for an ApiError."""
+
+    def dispatch(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Authentication required.'}, status=401)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except ApiError as error:
+            return JsonResponse({'error': str(error)}, status=400)
+
+
+@method_decorator(revalidated, name='get')
+class ReadOnlyApiView(JsonApiView):
+    """
+    Base list endpoint. Subclasses set `model`, `fields` (public name ->
+    queryset lookup, in output order), `default_fields` and `ordering` (a
+    unique ordering, ending with the primary key), and filter the rows in
+    get_queryset().
+
+    Query parameters: `fields`, `limit` (1 to max_limit) and `cursor` (the
+    `next` value of the previous page).
+    """
+    model = None
+    fields = {}
+    default_fields = ()
+    ordering = ()
+    default_limit = 100
+    max_limit = 1000
+
+    def get_queryset(self):
+        return self.model.objects.filter(user=self.request.user)
+
+    def selected_fields(self):
+        requested = self.request.GET.get('fields')
+        if not requested:
+            return list(self.default_fields)
+        names = [name.strip() for name in requested.split(',') if name.strip()]
+        unknown = [name for name in names if name not in self.fields]
+        if unknown or not names:
+            raise ApiError(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(self.fields)}.")
+        return list(dict.fromkeys(names))
+
+    def page_size(self):
+        try:
+            limit = int(self.request.GET.get('limit', self.default_limit))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= self.max_limit:
+            raise ApiError(f"'limit' must be an integer from 1 to {self.max_limit}.")
+        return limit
+
+    def get(self, request, *args, **kwargs):
+        names = self.selected_fields()
+        limit = self.page_size()
+        order_lookups = [entry.lstrip('-') for entry in self.ordering]
+
+        queryset = self.get_queryset().order_by(*self.ordering)
+        cursor = request.GET.get('cursor')
+        if cursor:
+            model_fields = [
+                self.model._meta.pk if lookup == 'pk' else self.model._meta.get_field(lookup)
+                for lookup in order_lookups
+            ]
+            queryset = queryset.filter(keyset_filter(self.ordering, decode_cursor(cursor, model_fields)))
+
+        # As colunas de ordenação vêm junto (no fim) para montar o cursor da próxima página.
+        rows = list(queryset.values_list(*(self.fields[name] for name in names), *order_lookups)[:limit + 1])
+        next_cursor = encode_cursor(list(rows[limit - 1][len(names):])) if len(rows) > limit else None
+        return JsonResponse({
+            'results': [dict(zip(names, row)) for row in rows[:limit]],
+            'next': next_cursor,
+        })
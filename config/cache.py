@@ -0,0 +1,135 @@
+# config/cache.py
+"""
+Versioned per-user read-through cache for reference data (accounts,
+categories, FIXED parents) that is read on every request but rarely written.
+
+The DATA namespace holds no value of its own: its version is the user's "data
+version", moved by every account, category and transaction write, and keys
+caches of anything derived from the user's data (e.g. rendered pages).
+
+Each (user, namespace) pair has a version number stored in the cache; values
+are stored under a key that includes it. Invalidation just moves the version
+forward, so stale entries are never read again and simply expire. Versions are
+nanosecond timestamps, so they keep increasing even if the version key itself
+is evicted, and double as a "last modified" marker.
+"""
+import time
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import transaction as db_transaction
+
+ACCOUNTS = 'accounts'
+CATEGORIES = 'categories'
+FIXED_PARENTS = 'fixed'
+DATA = 'data'
+NAMESPACES = (ACCOUNTS, CATEGORIES, FIXED_PARENTS, DATA)
+
+TIMEOUT = 60 * 60 * 24
+
+# Contadores deste processo; veja cache_stats().
+stats = Counter()
+
+
+def _version_key(user_id, namespace):
+    return f'ucache:v:{user_id}:{namespace}'
+
+
+def user_cache_version(user_id, namespace):
+    """Current version of a user's namespace, creating it on first use."""
+    key = _version_key(user_id, namespace)
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        # add() não sobrescreve uma versão gravada por outro processo nesse meio-tempo.
+        if not cache.add(key, version, TIMEOUT):
+            version = cache.get(key, version)
+    return version
+
+
+def user_data_version(user_id):
+    """Monotonic version of everything the user owns; changes on every write."""
+    return user_cache_version(user_id, DATA)
+
+
+def user_cached(user_id, namespace, loader):
+    """
+    Returns the cached value of a user's namespace, calling `loader()` and
+    caching its result on a miss. The loader must return something picklable,
+    e.g. a list of model instances, never a lazy queryset.
+    """
+    key = f'ucache:d:{user_id}:{namespace}:{user_cache_version(user_id, namespace)}'
+    value = cache.get(key)
+    if value is None:
+        stats[f'{namespace}.miss'] += 1
+        value = loader()
+        cache.set(key, value, TIMEOUT)
+    else:
+        stats[f'{namespace}.hit'] += 1
+    return value
+
+
+def group_cached(name, user_ids, loader):
+    """
+    Like user_cached() for a value derived from the data of several users
+    (e.g. a household rollup). It is keyed by the members and by their latest
+    data version, so a write by any of them makes the next call reload it.
+    """
+    user_ids = sorted(user_ids)
+    version = max((user_data_version(user_id) for user_id in user_ids), default=0)
+    key = f"gcache:{name}:{'-'.join(map(str, user_ids))}:{version}"
+    value = cache.get(key)
+    if value is None:
+        value = loader()
+        cache.set(key, value, TIMEOUT)
+    return value
+
+
+def user_accounts(user_id):
+    """The user's Account instances, cached."""
+    from accounts.models import Account
+
+    return user_cached(user_id, ACCOUNTS, lambda: list(Account.objects.filter(user_id=user_id)))
+
+
+def user_categories(user_id):
+    """The user's Category instances, cached."""
+    from transactions.models import Category
+
+    return user_cached(user_id, CATEGORIES, lambda: list(Category.objects.filter(user_id=user_id)))
+
+
+def _bump(user_ids, namespaces):
+    version = time.time_ns()
+    cache.set_many(
+        {_version_key(user_id, namespace): version for user_id in user_ids for namespace in namespaces},
+        TIMEOUT
+    )
+
+
+def invalidate_user_cache(user_ids, *namespaces):
+    """
+    Moves the given namespaces (all of them by default) of each user to a new
+    version. It runs now and again after the surrounding transaction commits, so
+    a reader that reloads between the write and the commit cannot keep the old
+    data cached under the new version.
+    """
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return
+    namespaces = namespaces or NAMESPACES
+    _bump(user_ids, namespaces)
+    db_transaction.on_commit(lambda: _bump(user_ids, namespaces))
+
+
+def cache_stats():
+    """Hit/miss counts and hit ratio per namespace since this process started."""
+    result = {}
+    for namespace in NAMESPACES:
+        hits, misses = stats[f'{namespace}.hit'], stats[f'{namespace}.miss']
+        result[namespace] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / (hits + misses), 3) if hits + misses else None,
+        }
+    return result
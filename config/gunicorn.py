@@ -0,0 +1,37 @@
+# config/gunicorn.py
+"""
+gunicorn settings for production serving, sized from config/settings.py
+(WEB_SERVER, WEB_WORKERS, WEB_THREADS):
+
+    gunicorn -c config/gunicorn.py                   # WSGI, gthread workers
+    WEB_SERVER=asgi gunicorn -c config/gunicorn.py   # ASGI, uvicorn workers
+
+Each worker holds its own database connections: WEB_THREADS with persistent
+connections, up to DB_POOL_MAX_SIZE with the pool. Keep WEB_WORKERS times that
+below Postgres' max_connections, or put pgbouncer in between.
+"""
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import settings  # noqa: E402
+
+bind = os.environ.get('WEB_BIND', '0.0.0.0:8000')
+workers = settings.WEB_WORKERS
+if settings.WEB_SERVER == 'asgi':
+    wsgi_app = 'config.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'config.wsgi:application'
+    worker_class = 'gthread'
+    threads = settings.WEB_THREADS
+
+timeout = int(os.environ.get('WEB_TIMEOUT', 30))
+graceful_timeout = timeout
+keepalive = 5
+# Recicla cada worker depois de um tanto de requests (vazamentos), sem reiniciar todos juntos.
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 5000))
+max_requests_jitter = max_requests // 10
+accesslog = '-'
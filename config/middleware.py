@@ -0,0 +1,259 @@
+# config/middleware.py
+"""
+Per-request instrumentation: SQL query count and time, duplicated queries (the
+N+1 signature), template render time and, optionally, peak Python memory.
+
+Every response gets a Server-Timing header, so the numbers show up in the
+browser's network panel, and each sample is added to a rolling in-process
+window per view, readable by staff at admin/metrics/.
+"""
+import logging
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Limites (ms) dos baldes do histograma de latência; o último é "acima de 1000".
+LATENCY_BUCKETS = (10, 25, 50, 100, 250, 500, 1000)
+WINDOW = 500
+
+
+class RequestMetrics:
+    """What one request cost; filled in by the middleware."""
+
+    def __init__(self):
+        self.queries = Counter()
+        self.sql_seconds = 0.0
+        self.template_seconds = 0.0
+        self.peak_memory = None
+        self.started = None
+        self.seconds = 0.0
+
+    @property
+    def query_count(self):
+        return sum(self.queries.values())
+
+    @property
+    def duplicate_queries(self):
+        """Executions of an SQL statement beyond its first (same SQL, any parameters)."""
+        return sum(count - 1 for count in self.queries.values() if count > 1)
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper: mede cada query executada no request.
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_seconds += time.perf_counter() - started
+            self.queries[sql] += 1
+
+    def server_timing(self):
+        entries = [
+            f'db;dur={self.sql_seconds * 1000:.1f};desc="{self.query_count} queries, '
+            f'{self.duplicate_queries} duplicates"',
+            f'tpl;dur={self.template_seconds * 1000:.1f};desc="template render"',
+            f'total;dur={self.seconds * 1000:.1f}',
+        ]
+        if self.peak_memory is not None:
+            entries.append(f'mem;desc="peak {self.peak_memory / 1024:.0f} KiB"')
+        return ', '.join(entries)
+
+
+class MetricsRegistry:
+    """Rolling window of the last WINDOW samples of each view, shared by the process's threads."""
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self.lock = threading.Lock()
+        self.samples = defaultdict(lambda: deque(maxlen=self.window))
+        self.over_budget = Counter()
+
+    def record(self, view, metrics, budget=None):
+        sample = (
+            metrics.seconds * 1000, metrics.query_count, metrics.duplicate_queries,
+            metrics.sql_seconds * 1000, metrics.template_seconds * 1000, metrics.peak_memory,
+        )
+        with self.lock:
+            self.samples[view].append(sample)
+            if budget is not None and metrics.query_count > budget:
+                self.over_budget[view] += 1
+
+    def clear(self):
+        with self.lock:
+            self.samples.clear()
+            self.over_budget.clear()
+
+    def snapshot(self):
+        with self.lock:
+            samples = {view: list(window) for view, window in self.samples.items()}
+            over_budget = dict(self.over_budget)
+        return {view: summarize(rows, over_budget.get(view, 0)) for view, rows in sorted(samples.items())}
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+def summarize(rows, over_budget=0):
+    durations = sorted(row[0] for row in rows)
+    queries = sorted(row[1] for row in rows)
+    histogram = Counter()
+    for duration in durations:
+        bucket = next((f'<={limit}ms' for limit in LATENCY_BUCKETS if duration <= limit), f'>{LATENCY_BUCKETS[-1]}ms')
+        histogram[bucket] += 1
+    memory = [row[5] for row in rows if row[5] is not None]
+    return {
+        'requests': len(rows),
+        'ms': {
+            'p50': round(percentile(durations, 0.5), 1),
+            'p95': round(percentile(durations, 0.95), 1),
+            'max': round(durations[-1], 1),
+        },
+        'queries': {'p50': percentile(queries, 0.5), 'max': queries[-1]},
+        'duplicate_queries_max': max(row[2] for row in rows),
+        'sql_ms_p50': round(percentile(sorted(row[3] for row in rows), 0.5), 1),
+        'template_ms_p50': round(percentile(sorted(row[4] for row in rows), 0.5), 1),
+        'peak_memory_kib_max': round(max(memory) / 1024) if memory else None,
+        'over_query_budget': over_budget,
+        'histogram': {bucket: histogram[bucket] for bucket in
+                      [f'<={limit}ms' for limit in LATENCY_BUCKETS] + [f'>{LATENCY_BUCKETS[-1]}ms']},
+    }
+
+
+registry = MetricsRegistry()
+
+
+def view_budget(request):
+    """The `query_budget` declared on the class-based view that served the request, if any."""
+    match = getattr(request, 'resolver_match', None)
+    view_class = getattr(getattr(match, 'func', None), 'view_class', None)
+    return getattr(view_class, 'query_budget', None)
+
+
+class RequestMetricsMiddleware:
+    """
+    Records what each request costs. Place it first in MIDDLEWARE so queries
+    made by the other middleware (session, user) are counted too.
+
+    Peak memory comes from tracemalloc, which slows every allocation down; it is
+    only measured with REQUEST_METRICS_TRACEMALLOC = True, and with threaded
+    servers the peak covers whatever else ran at the same time.
+
+    Works in both sync (WSGI) and async (ASGI) stacks, so async views are not
+    pushed back onto a thread by a sync-only middleware.
+
+    A streaming response (e.g. the transaction export) is measured until its
+    body has been fully sent. Its Server-Timing header goes out before the
+    body and only covers the time until then.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.trace_memory = getattr(settings, 'REQUEST_METRICS_TRACEMALLOC', False)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = self.start(request)
+        with self.wrap_connections(metrics):
+            response = self.get_response(request)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = self.start(request)
+        # As conexões são por thread, e o ORM assíncrono roda as queries na thread do
+        # sync_to_async do request: é lá que os wrappers precisam ser instalados.
+        wrappers = await sync_to_async(self.wrap_connections)(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(wrappers.close)()
+        return self.finish(request, response, metrics)
+
+    def start(self, request):
+        metrics = request.metrics = RequestMetrics()
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        metrics.started = time.perf_counter()
+        return metrics
+
+    def wrap_connections(self, metrics):
+        stack = ExitStack()
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(metrics))
+        return stack
+
+    def finish(self, request, response, metrics):
+        if response.streaming:
+            # O corpo ainda não foi gerado: o header só cobre até aqui, e a amostra
+            # é registrada quando o streaming termina (ou o cliente desiste).
+            self.measure(metrics)
+            response['Server-Timing'] = metrics.server_timing()
+            response.streaming_content = self.measured_stream(request, response, metrics)
+            return response
+        self.record(request, metrics)
+        response['Server-Timing'] = metrics.server_timing()
+        return response
+
+    def measured_stream(self, request, response, metrics):
+        """The response body, with its queries and time added to the request's sample."""
+        content = response.streaming_content
+        if response.is_async:
+            return self.ameasured_stream(request, content, metrics)
+        return self.sync_measured_stream(request, content, metrics)
+
+    def sync_measured_stream(self, request, content, metrics):
+        try:
+            with self.wrap_connections(metrics):
+                yield from content
+        finally:
+            self.record(request, metrics)
+
+    async def ameasured_stream(self, request, content, metrics):
+        wrappers = await sync_to_async(self.wrap_connections)(metrics)
+        try:
+            async for chunk in content:
+                yield chunk
+        finally:
+            await sync_to_async(wrappers.close)()
+            self.record(request, metrics)
+
+    def measure(self, metrics):
+        metrics.seconds = time.perf_counter() - metrics.started
+        if self.trace_memory:
+            metrics.peak_memory = tracemalloc.get_traced_memory()[1]
+
+    def record(self, request, metrics):
+        self.measure(metrics)
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        budget = view_budget(request)
+        if budget is not None and metrics.query_count > budget:
+            logger.warning(
+                "%s ran %d queries (budget %d, %d duplicates).",
+                view, metrics.query_count, budget, metrics.duplicate_queries
+            )
+        registry.record(view, metrics, budget)
+
+    def process_template_response(self, request, response):
+        # Chamado logo antes de o TemplateResponse ser renderizado.
+        started = time.perf_counter()
+
+        def rendered(response):
+            request.metrics.template_seconds += time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
@@ -14,6 +14,7 @@ from pathlib import Path
 import os
 from dotenv import load_dotenv
 from celery.schedules import crontab
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -30,7 +31,8 @@ SECRET_KEY = os.environ.get('SECRET_KEY')
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = os.environ.get('DEBUG', '0') == '1'
 
-ALLOWED_HOSTS = []
+# Hosts servidos com DEBUG desligado, separados por vírgula (ex.: o perfil prod do docker-compose).
+ALLOWED_HOSTS = [host for host in os.environ.get('ALLOWED_HOSTS', '').split(',') if host]
 
 
 # Application definition
@@ -55,10 +57,12 @@ INSTALLED_APPS = [
     'accounts', # Accounts app to manage user accounts
     'transactions', # Transactions app to manage user transactions
     # 'transfers', # Transfers app to manage user transfers
-    # 'recurring', # Recurring transactions app
+    'recurring', # Recurring transactions app
 ]
 
 MIDDLEWARE = [
+    # Primeiro, para medir também as queries dos outros middlewares (sessão, usuário).
+    'config.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -73,6 +77,12 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'config.urls'
 
+# Pico de memória por request no Server-Timing (tracemalloc deixa tudo mais lento).
+REQUEST_METRICS_TRACEMALLOC = os.environ.get('REQUEST_METRICS_TRACEMALLOC') == '1'
+
+# Quantos meses à frente as recorrências FIXED têm linhas reais (transactions/materializer.py).
+FIXED_HORIZON_MONTHS = int(os.environ.get('FIXED_HORIZON_MONTHS', 18))
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -91,9 +101,31 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'config.wsgi.application'
 
+# Servidor de produção: gunicorn com config/gunicorn.py (docker compose --profile prod).
+# wsgi roda workers gthread com WEB_THREADS threads cada; asgi roda workers uvicorn.
+WEB_SERVER = os.environ.get('WEB_SERVER', 'wsgi')
+if WEB_SERVER not in ('wsgi', 'asgi'):
+    raise ImproperlyConfigured("WEB_SERVER must be 'wsgi' or 'asgi'.")
+WEB_WORKERS = int(os.environ.get('WEB_WORKERS', (os.cpu_count() or 1) * 2 + 1))
+WEB_THREADS = int(os.environ.get('WEB_THREADS', 4))
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+#
+# DB_CONNECTION_MODE:
+# - persistent (padrão): cada thread reusa a sua conexão por DB_CONN_MAX_AGE
+#   segundos, testada antes do reuso. Sob ASGI cada request roda numa thread
+#   nova e nada é reusado: as conexões fecham ao fim do request
+#   (CONN_MAX_AGE=0) em vez de se acumularem abertas; use pool.
+# - pool: pool do psycopg 3 por processo, de DB_POOL_MIN_SIZE a DB_POOL_MAX_SIZE
+#   conexões (padrão: uma por thread do worker), testadas ao sair do pool.
+# - pgbouncer: POSTGRES_HOST/PORT apontam para um pgbouncer com
+#   pool_mode=transaction. Um cursor no servidor não sobrevive à troca de
+#   conexão entre transações, então .iterator() busca tudo de uma vez.
+DB_CONNECTION_MODE = os.environ.get('DB_CONNECTION_MODE', 'persistent')
+if DB_CONNECTION_MODE not in ('persistent', 'pool', 'pgbouncer'):
+    raise ImproperlyConfigured("DB_CONNECTION_MODE must be 'persistent', 'pool' or 'pgbouncer'.")
 
 DATABASES = {
     'default': {
@@ -103,8 +135,23 @@ DATABASES = {
         'PASSWORD': os.environ.get('POSTGRES_PASSWORD'),
         'HOST': os.environ.get('POSTGRES_HOST'),
         'PORT': os.environ.get('POSTGRES_PORT'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
     }
 }
+if DB_CONNECTION_MODE == 'pool':
+    # Quem mantém as conexões abertas é o pool.
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+        'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', WEB_THREADS)),
+        'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+    }
+elif DB_CONNECTION_MODE == 'pgbouncer':
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+if WEB_SERVER == 'asgi' and DB_CONNECTION_MODE != 'pool':
+    DATABASES['default']['CONN_MAX_AGE'] = 0
 
 
 # Password validation
@@ -187,6 +234,27 @@ SOCIALACCOUNT_PROVIDERS = {
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
 
+# CACHE SETTINGS
+# ------------------------------------------------------------------------------
+# Per-user reference data (accounts, categories, fixed recurrences) is cached,
+# see config/cache.py. Redis when CACHE_URL is set (docker-compose), local
+# memory otherwise (development and tests).
+if os.environ.get('CACHE_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['CACHE_URL'],
+            'KEY_PREFIX': 'hfm',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'hfm',
+        }
+    }
+
 # CELERY SETTINGS
 # ------------------------------------------------------------------------------
 # Using Redis as the broker
@@ -199,9 +267,23 @@ CELERY_TIMEZONE = "UTC" # Or your preferred timezone
 
 # Celery Beat (Scheduler) settings
 CELERY_BEAT_SCHEDULE = {
-    # A única tarefa agendada agora é a de efetivação.
+    # Estende o horizonte das recorrências fixas (linhas reais até N meses à frente).
+    'materializar-recorrencias-fixas-diariamente': {
+        'task': 'transactions.tasks.materialize_fixed_recurrences',
+        'schedule': crontab(minute=2, hour=0),
+    },
+    # Gera as recorrências do dia antes da efetivação, que então as efetiva.
+    'processar-recorrencias-diariamente': {
+        'task': 'recurring.tasks.process_recurring_transactions',
+        'schedule': crontab(minute=5, hour=0),
+    },
     'efetivar-transacoes-pendentes-diariamente': {
         'task': 'transactions.tasks.efetivar_transacoes_pendentes',
         'schedule': crontab(minute=10, hour=0),
     },
+    # Snapshot de saldo do fim do mês que acabou (só trabalha no dia 1; depois, no-op).
+    'snapshots-de-saldo-diariamente': {
+        'task': 'transactions.tasks.snapshot_account_balances',
+        'schedule': crontab(minute=20, hour=0),
+    },
 }
\ No newline at end of file
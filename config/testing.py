@@ -0,0 +1,33 @@
+# config/testing.py
+"""Test helpers shared by the apps' test suites."""
+
+
+class QueryBudgetMixin:
+    """
+    For TestCase classes: checks a request against the query budget that its
+    view declares (`query_budget` class attribute), using the numbers recorded
+    by RequestMetricsMiddleware, so tests and production report the same thing.
+    """
+
+    def assertWithinQueryBudget(self, url, data=None, budget=None, max_duplicates=0, method='get'):
+        response = getattr(self.client, method)(url, data or {})
+        metrics = getattr(response.wsgi_request, 'metrics', None)
+        if metrics is None:
+            self.fail("RequestMetricsMiddleware is not installed.")
+        if budget is None:
+            view_class = getattr(response.wsgi_request.resolver_match.func, 'view_class', None)
+            budget = getattr(view_class, 'query_budget', None)
+            if budget is None:
+                self.fail(f"{url} has no declared query_budget.")
+
+        details = '\n'.join(f"{count}x {sql}" for sql, count in metrics.queries.most_common())
+        self.assertLessEqual(
+            metrics.query_count, budget,
+            f"{url} ran {metrics.query_count} queries, budget is {budget}:\n{details}"
+        )
+        if max_duplicates is not None:
+            self.assertLessEqual(
+                metrics.duplicate_queries, max_duplicates,
+                f"{url} repeated queries {metrics.duplicate_queries} times (N+1?):\n{details}"
+            )
+        return response
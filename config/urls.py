@@ -1,14 +1,16 @@
 # config/urls.py
 from django.contrib import admin
 from django.urls import path, include
-from config.views import HomePageView
+from config.views import HomePageView, cache_stats_view, metrics_view
 
 urlpatterns = [
     path('', HomePageView.as_view(), name='home'),
+    path('admin/cache-stats/', cache_stats_view, name='cache_stats'),
+    path('admin/metrics/', metrics_view, name='request_metrics'),
     path('admin/', admin.site.urls),
     path('auth/', include('allauth.urls')), # Renamed for clarity
     path('accounts/', include('accounts.urls', namespace='accounts')),
     path('transactions/', include('transactions.urls', namespace='transactions')),
     # path('transfers/', include('transfers.urls', namespace='transfers')),
-    # path('recurring/', include('recurring.urls', namespace='recurring')), 
+    path('recurring/', include('recurring.urls', namespace='recurring')),
 ]
\ No newline at end of file
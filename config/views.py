@@ -1,7 +1,43 @@
-from django.views.generic import TemplateView
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+from django.views.generic import TemplateView, View
+
+from config.cache import cache_stats
+from config.middleware import registry
+
+async def alist(queryset):
+    """
+    Evaluates a queryset with the async ORM (an awaitable, so it can go to
+    asyncio.gather; the queries still run one at a time on the request's
+    sync_to_async thread).
+    """
+    return [row async for row in queryset]
+
+class AsyncJsonView(View):
+    """
+    Base for async JSON views: handlers are `async def` methods, and anonymous
+    requests get a 401. LoginRequiredMixin cannot be used here, since reading
+    request.user in async code would query the database synchronously.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Authentication required.'}, status=401)
+        return await super().dispatch(request, *args, **kwargs)
 
 class HomePageView(TemplateView):
     """
     A view to render the main home page template.
     """
-    template_name = "home.html"
\ No newline at end of file
+    template_name = "home.html"
+
+@staff_member_required
+def cache_stats_view(request):
+    """Hit/miss counters of the per-user cache in the process serving this request (staff only)."""
+    return JsonResponse(cache_stats())
+
+@staff_member_required
+def metrics_view(request):
+    """Rolling per-view latency and query statistics of this process (staff only)."""
+    return JsonResponse({'views': registry.snapshot(), 'cache': cache_stats()})
@@ -1,3 +1,11 @@
+# recurring/admin.py
 from django.contrib import admin
+from .models import RecurringTransaction
 
-# Register your models here.
+@admin.register(RecurringTransaction)
+class RecurringTransactionAdmin(admin.ModelAdmin):
+    list_display = ('description', 'user', 'account', 'transaction_type', 'amount', 'frequency',
+                    'start_date', 'end_date', 'next_run_date')
+    list_filter = ('frequency', 'transaction_type', 'user')
+    search_fields = ('description',)
+    readonly_fields = ('next_run_date', 'last_run_date')
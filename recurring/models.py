@@ -0,0 +1,124 @@
+# recurring/models.py
+import calendar
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+from accounts.models import Account
+from transactions.models import Category, Transaction
+
+
+def next_occurrence(frequency, anchor, on_or_after):
+    """
+    First date of the schedule that starts on `anchor` falling on or after
+    `on_or_after`. Monthly rules keep the anchor's day of month, clamped to the
+    last day of shorter months (Jan 31 -> Feb 28 -> Mar 31).
+    """
+    if on_or_after <= anchor:
+        return anchor
+    if frequency == RecurringTransaction.Frequency.DAILY:
+        return on_or_after
+    if frequency == RecurringTransaction.Frequency.WEEKLY:
+        return anchor + timedelta(days=-(-(on_or_after - anchor).days // 7) * 7)
+
+    year, month = on_or_after.year, on_or_after.month
+    while True:
+        candidate = on_or_after.replace(day=min(anchor.day, calendar.monthrange(year, month)[1]))
+        if candidate >= on_or_after:
+            return candidate
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        on_or_after = on_or_after.replace(year=year, month=month, day=1)
+
+
+class RecurringTransaction(models.Model):
+    """
+    A rule that generates a real transaction on every date of its schedule.
+
+    `next_run_date` is the next date still to be generated (NULL once the rule
+    has ended), so the daily job only reads the rules that are due.
+    """
+    class Frequency(models.TextChoices):
+        DAILY = 'DAILY', 'Daily'
+        WEEKLY = 'WEEKLY', 'Weekly'
+        MONTHLY = 'MONTHLY', 'Monthly'
+
+    class TransactionType(models.TextChoices):
+        INCOME = 'INCOME', 'Income'
+        EXPENSE = 'EXPENSE', 'Expense'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='recurring_transactions'
+    )
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='recurring_transactions')
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='recurring_transactions'
+    )
+    transaction_type = models.CharField(max_length=10, choices=TransactionType.choices)
+    amount = models.DecimalField(max_digits=15, decimal_places=2)
+    description = models.TextField(blank=True)
+    frequency = models.CharField(max_length=10, choices=Frequency.choices, default=Frequency.MONTHLY)
+    start_date = models.DateField()
+    end_date = models.DateField(null=True, blank=True)
+    # Mantidos pela tarefa diária; recalculados a cada save().
+    next_run_date = models.DateField(null=True, blank=True, editable=False)
+    last_run_date = models.DateField(null=True, blank=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['start_date']
+        indexes = [
+            # Tarefa diária: apenas as regras ativas que já venceram.
+            models.Index(
+                fields=['next_run_date'],
+                name='recurring_next_run_idx',
+                condition=models.Q(next_run_date__isnull=False),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_frequency_display()} {self.transaction_type} - {self.amount}"
+
+    def occurrence_on_or_after(self, day):
+        """The first scheduled date on or after `day`, or None if the rule has ended by then."""
+        occurrence = next_occurrence(self.frequency, self.start_date, max(day, self.start_date))
+        if self.end_date and occurrence > self.end_date:
+            return None
+        return occurrence
+
+    def reschedule(self, today=None):
+        """
+        Sets next_run_date after a create or edit. A new rule starts today at the
+        earliest (no back-filling); an existing one continues after the last date
+        it generated, so days missed by the job are still caught up.
+        """
+        if self.last_run_date:
+            self.next_run_date = self.occurrence_on_or_after(self.last_run_date + timedelta(days=1))
+        else:
+            self.next_run_date = self.occurrence_on_or_after(today or timezone.now().date())
+
+    def save(self, *args, **kwargs):
+        self.reschedule()
+        super().save(*args, **kwargs)
+
+    def build_transaction(self, day):
+        """The (unsaved) transaction this rule generates on `day`."""
+        return Transaction(
+            user_id=self.user_id,
+            account_id=self.account_id,
+            category_id=self.category_id,
+            transaction_type=self.transaction_type,
+            amount=self.amount,
+            date=day,
+            description=self.description,
+            recurrence_id=self.pk,
+        )
@@ -1,45 +1,78 @@
 # recurring/tasks.py
+import logging
+import time
+from datetime import timedelta
+
 from celery import shared_task
+from django.db import transaction as db_transaction
 from django.utils import timezone
+
+from transactions.services import create_transactions
 from .models import RecurringTransaction
-from transactions.models import Transaction
+
+logger = logging.getLogger(__name__)
+
+
+def generate_due_batch(today, batch_size):
+    """
+    Generates the occurrences of up to `batch_size` due rules in one database
+    transaction and returns (rules processed, transactions created).
+
+    Only rules with next_run_date <= today are read (through the partial index),
+    claimed with SELECT ... FOR UPDATE SKIP LOCKED. A rule whose next_run_date
+    lies in the past (the job did not run for a few days) gets every missed
+    occurrence up to today. The transactions are bulk-inserted with their
+    balance and summary effects applied once, and all rules move to their next
+    date in a single bulk UPDATE, in the same transaction as the inserts, so a
+    date is never generated twice.
+    """
+    with db_transaction.atomic():
+        rules = list(
+            RecurringTransaction.objects.select_for_update(skip_locked=True)
+            .filter(next_run_date__lte=today)
+            .order_by('next_run_date', 'pk')[:batch_size]
+        )
+        if not rules:
+            return 0, 0
+
+        rows = []
+        for rule in rules:
+            day = rule.next_run_date
+            while day is not None and day <= today:
+                rows.append(rule.build_transaction(day))
+                rule.last_run_date = day
+                day = rule.occurrence_on_or_after(day + timedelta(days=1))
+            rule.next_run_date = day
+
+        create_transactions(rows)
+        RecurringTransaction.objects.bulk_update(rules, ['next_run_date', 'last_run_date'])
+
+    return len(rules), len(rows)
+
 
 @shared_task
-def process_recurring_transactions():
+def process_recurring_transactions(batch_size=1000, max_batches=None):
     """
-    A Celery task that finds and creates transactions that are due.
+    Creates the transactions of every recurring rule that is due, in bounded
+    batches committed on their own. The cost depends on the rules due today,
+    not on how many rules exist.
     """
     today = timezone.now().date()
-    due_recurrences = RecurringTransaction.objects.filter(start_date__lte=today)
-    
-    for rt in due_recurrences:
-        # Check if it's past the end date
-        if rt.end_date and today > rt.end_date:
-            continue
-
-        # Logic to check if a transaction should be created today
-        should_create = False
-        if rt.frequency == 'DAILY':
-            should_create = True
-        elif rt.frequency == 'WEEKLY':
-            if today.weekday() == rt.start_date.weekday():
-                should_create = True
-        elif rt.frequency == 'MONTHLY':
-            # This is a simple logic, can be improved for end-of-month cases
-            if today.day == rt.start_date.day:
-                should_create = True
-        
-        # If it should be created, check if it hasn't been created already today
-        if should_create:
-            if not Transaction.objects.filter(recurring_transaction=rt, date=today).exists():
-                Transaction.objects.create(
-                    user=rt.user,
-                    account=rt.account,
-                    transaction_type=rt.transaction_type,
-                    amount=rt.amount,
-                    date=today,
-                    category=rt.category,
-                    description=rt.description,
-                    recurring_transaction=rt
-                )
-    return "Processed recurring transactions."
\ No newline at end of file
+    batches = []
+
+    while max_batches is None or len(batches) < max_batches:
+        started = time.monotonic()
+        rules, created = generate_due_batch(today, batch_size)
+        if not rules:
+            break
+        elapsed = time.monotonic() - started
+        batches.append({'rules': rules, 'created': created, 'seconds': round(elapsed, 4)})
+        logger.info(
+            "Batch %d: %d recorrências geraram %d transações (%.3fs).",
+            len(batches), rules, created, elapsed
+        )
+
+    created = sum(batch['created'] for batch in batches)
+    if not created:
+        logger.info("Nenhuma recorrência vencida.")
+    return {'created': created, 'batches': batches}
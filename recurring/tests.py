@@ -1,3 +1,160 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Account
+from transactions.balances import calculate_balances
+from transactions.models import MonthlySummary, Transaction
+from transactions.tasks import efetivar_transacoes_pendentes
+from .models import RecurringTransaction, next_occurrence
+from .tasks import generate_due_batch, process_recurring_transactions
+
+
+class NextOccurrenceTests(TestCase):
+    def test_monthly_clamps_to_the_end_of_shorter_months(self):
+        anchor = date(2025, 1, 31)
+        monthly = RecurringTransaction.Frequency.MONTHLY
+        self.assertEqual(next_occurrence(monthly, anchor, date(2025, 2, 1)), date(2025, 2, 28))
+        self.assertEqual(next_occurrence(monthly, anchor, date(2025, 3, 1)), date(2025, 3, 31))
+        self.assertEqual(next_occurrence(monthly, anchor, date(2025, 12, 31)), date(2025, 12, 31))
+        self.assertEqual(next_occurrence(monthly, anchor, date(2026, 1, 1)), date(2026, 1, 31))
+
+    def test_weekly_keeps_the_weekday_and_daily_every_day(self):
+        anchor = date(2025, 1, 6)
+        self.assertEqual(next_occurrence('WEEKLY', anchor, date(2025, 1, 7)), date(2025, 1, 13))
+        self.assertEqual(next_occurrence('WEEKLY', anchor, date(2025, 1, 13)), date(2025, 1, 13))
+        self.assertEqual(next_occurrence('DAILY', anchor, date(2025, 3, 2)), date(2025, 3, 2))
+        self.assertEqual(next_occurrence('DAILY', anchor, date(2024, 3, 2)), anchor)
+
+
+class RecurringGenerationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.now().date()
+        self.user = get_user_model().objects.create_user(
+            username='recurring', email='recurring@example.com', password='secret'
+        )
+        self.account = Account.objects.create(
+            user=self.user, name='Checking', initial_balance=Decimal('100.00'), balance=Decimal('100.00')
+        )
+
+    def make_rule(self, **kwargs):
+        values = {
+            'user': self.user,
+            'account': self.account,
+            'transaction_type': RecurringTransaction.TransactionType.EXPENSE,
+            'amount': Decimal('10.00'),
+            'description': 'Assinatura',
+            'frequency': RecurringTransaction.Frequency.DAILY,
+            'start_date': self.today,
+        }
+        values.update(kwargs)
+        return RecurringTransaction.objects.create(**values)
+
+    def test_new_rule_starts_today_without_back_filling(self):
+        rule = self.make_rule(start_date=self.today - timedelta(days=30))
+        self.assertEqual(rule.next_run_date, self.today)
+        future = self.make_rule(start_date=self.today + timedelta(days=3))
+        self.assertEqual(future.next_run_date, self.today + timedelta(days=3))
+        ended = self.make_rule(start_date=self.today - timedelta(days=30), end_date=self.today - timedelta(days=1))
+        self.assertIsNone(ended.next_run_date)
+
+    def test_due_rule_generates_todays_transaction_and_advances(self):
+        rule = self.make_rule()
+        result = process_recurring_transactions()
+
+        self.assertEqual(result['created'], 1)
+        created = Transaction.objects.get()
+        self.assertEqual(created.recurrence_id, rule.pk)
+        self.assertEqual(created.date, self.today)
+        self.assertEqual(created.status, Transaction.Status.PENDING)
+        self.assertTrue(MonthlySummary.objects.filter(user=self.user).exists())
+        rule.refresh_from_db()
+        self.assertEqual(rule.last_run_date, self.today)
+        self.assertEqual(rule.next_run_date, self.today + timedelta(days=1))
+
+        # Rodar de novo no mesmo dia não duplica nada.
+        self.assertEqual(process_recurring_transactions()['created'], 0)
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_missed_days_are_caught_up_once(self):
+        rule = self.make_rule(start_date=self.today - timedelta(days=10))
+        RecurringTransaction.objects.filter(pk=rule.pk).update(next_run_date=self.today - timedelta(days=3))
+
+        self.assertEqual(generate_due_batch(self.today, batch_size=100), (1, 4))
+        dates = sorted(Transaction.objects.values_list('date', flat=True))
+        self.assertEqual(dates, [self.today - timedelta(days=n) for n in (3, 2, 1, 0)])
+        self.assertEqual(generate_due_batch(self.today, batch_size=100), (0, 0))
+
+    def test_end_date_stops_the_rule(self):
+        rule = self.make_rule(start_date=self.today - timedelta(days=5), end_date=self.today - timedelta(days=1))
+        RecurringTransaction.objects.filter(pk=rule.pk).update(next_run_date=self.today - timedelta(days=2))
+
+        self.assertEqual(generate_due_batch(self.today, batch_size=100), (1, 2))
+        rule.refresh_from_db()
+        self.assertIsNone(rule.next_run_date)
+        self.assertEqual(rule.last_run_date, self.today - timedelta(days=1))
+
+    def test_editing_a_rule_keeps_its_place_in_the_schedule(self):
+        rule = self.make_rule()
+        process_recurring_transactions()
+        rule.refresh_from_db()
+        rule.amount = Decimal('12.00')
+        rule.save()
+        self.assertEqual(rule.next_run_date, self.today + timedelta(days=1))
+
+    def test_cost_depends_on_due_rules_not_on_all_rules(self):
+        for _ in range(3):
+            self.make_rule()
+        later = [
+            RecurringTransaction(
+                user=self.user, account=self.account, transaction_type='EXPENSE', amount=Decimal('1.00'),
+                frequency='MONTHLY', start_date=self.today, next_run_date=self.today + timedelta(days=5),
+            )
+            for _ in range(200)
+        ]
+        RecurringTransaction.objects.bulk_create(later)
+
+        # Regras vencidas, insert em lote, resumos mensais e um único UPDATE das regras (+ savepoints,
+        # inclusive o da criação de resumos, que repete a soma se outra gravação criou a linha antes).
+        with self.assertNumQueries(13):
+            self.assertEqual(generate_due_batch(self.today, batch_size=100), (3, 3))
+        self.assertEqual(Transaction.objects.count(), 3)
+
+    def test_batches_and_balances_after_completion(self):
+        for _ in range(5):
+            self.make_rule()
+        result = process_recurring_transactions(batch_size=2)
+        self.assertEqual([batch['rules'] for batch in result['batches']], [2, 2, 1])
+
+        efetivar_transacoes_pendentes()
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal('50.00'))
+        self.assertEqual(self.account.balance, calculate_balances([self.account])[self.account.pk])
+
+
+class RecurringViewTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='recurring', email='recurring@example.com', password='secret'
+        )
+        self.account = Account.objects.create(user=self.user, name='Checking')
+        self.client.force_login(self.user)
+
+    def test_create_schedules_the_rule(self):
+        today = timezone.now().date()
+        response = self.client.post(reverse('recurring:recurring_transaction_create'), {
+            'account': self.account.pk, 'transaction_type': 'INCOME', 'amount': '1000.00',
+            'description': 'Salário', 'frequency': 'MONTHLY', 'start_date': today.isoformat(),
+        })
+        self.assertRedirects(response, reverse('recurring:recurring_transaction_list'))
+        rule = RecurringTransaction.objects.get()
+        self.assertEqual(rule.next_run_date, today)
 
-# Create your tests here.
+        response = self.client.get(reverse('recurring:recurring_transaction_list'))
+        self.assertContains(response, 'Monthly')
@@ -1,9 +1,43 @@
 # transactions/admin.py
 from django.contrib import admin
-from .models import Transaction
+from .budgets import set_budget
+from .models import AccountBalanceSnapshot, Budget, MonthlySummary, Transaction
 
 @admin.register(Transaction)
 class TransactionAdmin(admin.ModelAdmin):
     list_display = ('date', 'account', 'status', 'completion_date','transaction_type', 'amount', 'category',"frequency", 'user')
     list_filter = ('transaction_type', 'category', 'account', 'user')
-    search_fields = ('description', 'category')
\ No newline at end of file
+    search_fields = ('description', 'category')
+
+@admin.register(MonthlySummary)
+class MonthlySummaryAdmin(admin.ModelAdmin):
+    list_display = ('year', 'month', 'account', 'category', 'completed_income', 'completed_expense',
+                    'pending_income', 'pending_expense', 'user')
+    list_filter = ('year', 'user')
+    list_select_related = ('account', 'category', 'user')
+
+@admin.register(AccountBalanceSnapshot)
+class AccountBalanceSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('as_of_date', 'account', 'balance')
+    list_filter = ('as_of_date',)
+    list_select_related = ('account',)
+
+@admin.register(Budget)
+class BudgetAdmin(admin.ModelAdmin):
+    list_display = ('year', 'month', 'category', 'limit', 'spent', 'user')
+    list_filter = ('year', 'user')
+    list_select_related = ('category', 'user')
+    # O gasto é um contador mantido pelas gravações de transações; depois de criado,
+    # um orçamento só muda de limite.
+    readonly_fields = ('spent',)
+
+    def get_readonly_fields(self, request, obj=None):
+        if obj is None:
+            return self.readonly_fields
+        return ('user', 'category', 'year', 'month', 'spent')
+
+    def save_model(self, request, obj, form, change):
+        if change:
+            obj.save(update_fields=['limit'])
+        else:
+            obj.pk = set_budget(obj.user, obj.category, obj.year, obj.month, obj.limit).pk
@@ -0,0 +1,182 @@
+# transactions/analytics.py
+"""
+Category spending analytics, computed in the database from the monthly
+summaries (MonthlySummary, one row per user, account, category and month).
+
+Totals are GROUP BY queries; rolling averages and month-over-month deltas are
+window functions over the monthly totals of each category, with RANGE frames
+on the month number so that a month without spending counts as zero instead
+of being skipped. Only the aggregated rows come back to Python.
+
+Spend is the expense total of a month, completed and pending. Transfers are
+not expenses: their outgoing legs are EXPENSE rows, counted apart in
+MonthlySummary.transfer_expense and subtracted here.
+"""
+from datetime import date
+
+from django.db.models import DecimalField, F, Func, Q, Sum, Window
+from django.db.models.expressions import ValueRange
+
+from .balances import CENT, ZERO
+from .dates import month_bounds, month_end
+from .models import MonthlySummary, Transaction
+from .projections import month_index
+
+ROLLING_WINDOWS = (3, 6, 12)
+
+
+def month_number():
+    """The month index (see projections.month_index) of a summary row, for RANGE frames."""
+    return F('year') * 12 + F('month') - 1
+
+
+def spend():
+    """Expense total (completed and pending, without transfers) of a group of summary rows."""
+    return Sum(F('completed_expense') + F('pending_expense') - F('transfer_expense'))
+
+
+class WindowSum(Func):
+    """
+    SUM as a window function over an aggregate of the same GROUP BY, e.g.
+    SUM(SUM(x)) OVER (...): the totals per group, summed across the frame.
+    (Sum itself refuses to wrap another aggregate.)
+    """
+    function = 'SUM'
+    window_compatible = True
+    output_field = DecimalField(max_digits=15, decimal_places=2)
+
+
+class GroupedWindow(Window):
+    """A window over grouped rows: its partition and order are already in the GROUP BY."""
+
+    def get_group_by_cols(self):
+        return []
+
+
+def summary_months(user_id, first_index, last_index):
+    """The user's summaries of months [first_index, last_index] (month indexes)."""
+    first_year, first_month = divmod(first_index, 12)
+    last_year, last_month = divmod(last_index, 12)
+    # year/month separados: o índice (user, year, month) faz a busca por intervalo.
+    return MonthlySummary.objects.filter(
+        Q(year__gt=first_year) | Q(year=first_year, month__gte=first_month + 1),
+        Q(year__lt=last_year) | Q(year=last_year, month__lte=last_month + 1),
+        user_id=user_id,
+    )
+
+
+def category_spend(user_id, start, end, limit=None):
+    """
+    Spend per category between `start` and `end` (inclusive), largest first,
+    with each category's share of the total. Whole months are read from the
+    summaries; the days of a partial first or last month from the
+    transactions themselves. Returns [{'category_id', 'category', 'spend', 'share'}].
+    """
+    first_full = month_index(start) if start.day == 1 else month_index(start) + 1
+    last_full = month_index(end) if end == month_end(end) else month_index(end) - 1
+    totals = {}
+
+    def add(rows):
+        for category_id, name, amount in rows:
+            if amount:
+                previous = totals.get(category_id, (name, ZERO))[1]
+                totals[category_id] = (name, previous + amount)
+
+    if first_full <= last_full:
+        add(summary_months(user_id, first_full, last_full).values('category_id').annotate(
+            total=spend()
+        ).values_list('category_id', 'category__name', 'total'))
+
+    # Dias avulsos no começo e no fim do intervalo (ou o intervalo todo, se menor que um mês).
+    edges = Q()
+    if first_full > last_full:
+        edges = Q(date__gte=start, date__lte=end)
+    else:
+        if start.day != 1:
+            edges |= Q(date__gte=start, date__lt=month_bounds(start.year, start.month)[1])
+        if end != month_end(end):
+            edges |= Q(date__gte=month_bounds(end.year, end.month)[0], date__lte=end)
+    if edges:
+        add(Transaction.objects.filter(
+            edges, user_id=user_id, transaction_type=Transaction.TransactionType.EXPENSE, transfer_id__isnull=True
+        ).order_by().values('category_id').annotate(
+            total=Sum('amount')
+        ).values_list('category_id', 'category__name', 'total'))
+
+    grand_total = sum(amount for _, amount in totals.values())
+    rows = [
+        {
+            'category_id': category_id,
+            'category': name,
+            'spend': amount.quantize(CENT),
+            'share': round(float(amount / grand_total), 4) if grand_total else 0.0,
+        }
+        for category_id, (name, amount) in totals.items()
+    ]
+    rows.sort(key=lambda row: (-row['spend'], row['category'] or ''))
+    return rows[:limit] if limit else rows
+
+
+def category_trends(user_id, first_month, last_month, category_ids=None):
+    """
+    Monthly spend of each category in months [first_month, last_month] (month
+    indexes), with the change from the month before and the rolling 3/6/12-month
+    averages, all computed by window functions in one query. Months without
+    spending are omitted from the result but count as zero in the windows.
+    Returns {category_id: [{'month', 'spend', 'previous', 'delta', 'avg_3', 'avg_6', 'avg_12'}]}.
+    """
+    # Os 11 meses anteriores entram só para alimentar as médias e o delta.
+    rows = summary_months(user_id, first_month - max(ROLLING_WINDOWS) + 1, last_month)
+    if category_ids is not None:
+        # O __in descarta None; "sem categoria" entra pelo isnull.
+        selected = Q(category_id__in=[pk for pk in category_ids if pk is not None])
+        if None in category_ids:
+            selected |= Q(category_id__isnull=True)
+        rows = rows.filter(selected)
+
+    def over(months):
+        return GroupedWindow(
+            WindowSum(spend()), partition_by=[F('category_id')], order_by=month_number().asc(),
+            frame=ValueRange(start=-(months - 1), end=0),
+        )
+
+    rows = rows.order_by().values('category_id', 'year', 'month').annotate(
+        number=month_number(),
+        spend=spend(),
+        last_two=over(2),
+        **{f'sum_{months}': over(months) for months in ROLLING_WINDOWS},
+    ).order_by('category_id', 'number')
+
+    trends = {}
+    for row in rows:
+        amount = row['spend'] or ZERO
+        if row['number'] < first_month or not amount:
+            continue
+        # Valores já vêm com 2 casas (DecimalField); só as médias precisam arredondar.
+        previous = (row['last_two'] or ZERO) - amount
+        trends.setdefault(row['category_id'], []).append({
+            'month': date(row['year'], row['month'], 1),
+            'spend': amount,
+            'previous': previous,
+            'delta': amount - previous,
+            **{f'avg_{months}': ((row[f'sum_{months}'] or ZERO) / months).quantize(CENT) for months in ROLLING_WINDOWS},
+        })
+    return trends
+
+
+def category_report(user_id, start, end, top=5):
+    """
+    The `top` categories by spend between `start` and `end`, each with its
+    monthly trend over the months the range touches (whole months). Three
+    queries at most.
+    """
+    categories = category_spend(user_id, start, end, limit=top)
+    trends = category_trends(
+        user_id, month_index(start), month_index(end),
+        category_ids=[row['category_id'] for row in categories],
+    ) if categories else {}
+    return {
+        'start': start,
+        'end': end,
+        'categories': [{**row, 'trend': trends.get(row['category_id'], [])} for row in categories],
+    }
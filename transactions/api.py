@@ -0,0 +1,178 @@
+# transactions/api.py
+from itertools import groupby
+
+from dateutil.relativedelta import relativedelta
+from django import forms
+from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+
+from config.api import ApiError, JsonApiView, ReadOnlyApiView, cleaned_data, revalidated
+from .analytics import category_report
+from .models import AccountBalanceSnapshot, Category, Transaction
+from .networth import household_net_worth, net_worth
+from .projections import month_index
+from .snapshots import last_closed_month_end
+
+
+class TransactionApiFilterForm(forms.Form):
+    """Filtros opcionais da API de transações (datas inclusivas); nenhum faz consulta."""
+
+    account = forms.UUIDField(required=False)
+    start = forms.DateField(required=False)
+    end = forms.DateField(required=False)
+    status = forms.ChoiceField(choices=[('', 'Any')] + Transaction.Status.choices, required=False)
+    transaction_type = forms.ChoiceField(
+        choices=[('', 'Any')] + Transaction.TransactionType.choices, required=False
+    )
+
+
+class TransactionApiView(ReadOnlyApiView):
+    """
+    The user's transactions, newest first, paginated by keyset on
+    (date, created_at, id). Filters: account (id), start, end, status,
+    transaction_type.
+    """
+    model = Transaction
+    fields = {
+        'id': 'pk',
+        'date': 'date',
+        'completion_date': 'completion_date',
+        'status': 'status',
+        'transaction_type': 'transaction_type',
+        'amount': 'amount',
+        'account_id': 'account_id',
+        'account': 'account__name',
+        'to_account_id': 'to_account_id',
+        'category_id': 'category_id',
+        'category': 'category__name',
+        'description': 'description',
+        'frequency': 'frequency',
+        'installment_number': 'installment_number',
+        'recurrence_id': 'recurrence_id',
+        'transfer_id': 'transfer_id',
+        'created_at': 'created_at',
+    }
+    default_fields = ('id', 'date', 'status', 'transaction_type', 'amount', 'account_id', 'category_id', 'description')
+    ordering = ('-date', '-created_at', '-pk')
+    query_budget = 4
+
+    def get_queryset(self):
+        filters = cleaned_data(TransactionApiFilterForm(self.request.GET))
+        queryset = super().get_queryset()
+        if filters['account']:
+            queryset = queryset.filter(account_id=filters['account'])
+        if filters['start']:
+            queryset = queryset.filter(date__gte=filters['start'])
+        if filters['end']:
+            queryset = queryset.filter(date__lte=filters['end'])
+        if filters['status']:
+            queryset = queryset.filter(status=filters['status'])
+        if filters['transaction_type']:
+            queryset = queryset.filter(transaction_type=filters['transaction_type'])
+        return queryset
+
+
+class CategoryApiView(ReadOnlyApiView):
+    """The user's categories, by name."""
+    model = Category
+    fields = {'id': 'pk', 'name': 'name', 'transaction_type': 'transaction_type'}
+    default_fields = ('id', 'name', 'transaction_type')
+    ordering = ('name', 'pk')
+    query_budget = 3
+
+
+class BalanceHistoryForm(forms.Form):
+    account = forms.UUIDField(required=False)
+    start = forms.DateField(required=False)
+    end = forms.DateField(required=False)
+
+
+@method_decorator(revalidated, name='get')
+class BalanceHistoryApiView(JsonApiView):
+    """
+    Month-end balances of the user's accounts (or only `account`) from `start`
+    to `end`, by default the ten years up to the last closed month, for a
+    balance-over-time chart. One query on the balance snapshots, bounded by
+    max_months times the number of accounts.
+    """
+    default_years = 10
+    max_months = 360
+    query_budget = 3
+
+    def get(self, request):
+        filters = cleaned_data(BalanceHistoryForm(request.GET))
+        end = filters['end'] or last_closed_month_end()
+        start = filters['start'] or end - relativedelta(years=self.default_years)
+        if start > end:
+            raise ApiError("'start' must not be after 'end'.")
+        if month_index(end) - month_index(start) >= self.max_months:
+            raise ApiError(f"The range can cover at most {self.max_months} months.")
+
+        snapshots = AccountBalanceSnapshot.objects.filter(
+            account__user=request.user, as_of_date__gte=start, as_of_date__lte=end
+        )
+        if filters['account']:
+            snapshots = snapshots.filter(account_id=filters['account'])
+        rows = snapshots.order_by('as_of_date', 'account_id').values_list('as_of_date', 'account_id', 'balance')
+
+        series = []
+        for as_of, points in groupby(rows, key=lambda row: row[0]):
+            balances = {str(account_id): balance for _, account_id, balance in points}
+            series.append({'date': as_of, 'balances': balances, 'total': sum(balances.values())})
+        return JsonResponse({'start': start, 'end': end, 'series': series})
+
+
+class NetWorthApiView(JsonApiView):
+    """
+    The user's net worth by account type, assets and liabilities and the
+    change since the last month end; `?scope=household` sums every member of
+    the user's household (cached).
+    """
+    query_budget = 4
+
+    def get(self, request):
+        scope = request.GET.get('scope', 'user')
+        if scope == 'user':
+            return JsonResponse({'scope': scope, **net_worth([request.user.pk])})
+        if scope != 'household':
+            raise ApiError("'scope' must be 'user' or 'household'.")
+        if request.user.household_id is None:
+            raise ApiError("You are not a member of a household.")
+        return JsonResponse({'scope': scope, **household_net_worth(request.user.household_id)})
+
+
+class CategoryAnalyticsForm(forms.Form):
+    start = forms.DateField(required=False)
+    end = forms.DateField(required=False)
+    top = forms.IntegerField(required=False, min_value=1, max_value=50)
+
+    max_months = 120
+
+    def clean(self):
+        cleaned = super().clean()
+        if self.errors:
+            return cleaned
+        # Padrão: os últimos 12 meses, contando o mês corrente.
+        end = cleaned['end'] or timezone.now().date()
+        start = cleaned['start'] or end.replace(day=1) - relativedelta(months=11)
+        if start > end:
+            raise forms.ValidationError("'start' must not be after 'end'.")
+        if month_index(end) - month_index(start) >= self.max_months:
+            raise forms.ValidationError(f"The range can cover at most {self.max_months} months.")
+        cleaned.update(start=start, end=end, top=cleaned['top'] or 5)
+        return cleaned
+
+
+@method_decorator(revalidated, name='get')
+class CategoryAnalyticsApiView(JsonApiView):
+    """
+    Spending analytics: the `top` categories by spend from `start` to `end`
+    (default the last 12 months), with their share of the total and the
+    monthly trend of each (month-over-month delta, 3/6/12-month averages).
+    """
+    query_budget = 5
+
+    def get(self, request):
+        filters = cleaned_data(CategoryAnalyticsForm(request.GET))
+        return JsonResponse(category_report(request.user.pk, filters['start'], filters['end'], filters['top']))
@@ -0,0 +1,156 @@
+# transactions/async_views.py
+"""
+Async JSON read path for the hot endpoints, served by the ASGI application.
+
+The views use the async ORM and await their independent queries with
+asyncio.gather, joining the results in Python instead of with JOINs. The
+queries do not run concurrently: Django's async ORM hands each one to
+sync_to_async on the request's single thread-sensitive executor, so they
+run one after another on one connection. What ASGI buys is that a request
+waiting on the database does not hold a worker thread, so one process
+serves many slow or concurrent clients.
+"""
+import asyncio
+import heapq
+from decimal import Decimal
+
+from django.db.models import Sum
+from django.http import JsonResponse
+from django.utils import timezone
+
+from accounts.models import Account
+from config.views import AsyncJsonView, alist
+from .balances import CENT
+from .dashboard import REAL_ROW_ORDERING
+from .dates import month_bounds
+from .materializer import is_materialized
+from .models import Category, MonthlySummary, Transaction
+from .projections import project_fixed
+
+SUMMARY_FIELDS = ('completed_income', 'completed_expense', 'pending_income', 'pending_expense')
+ROW_FIELDS = (
+    'id', 'date', 'account_id', 'category_id', 'transaction_type', 'amount', 'description',
+    'status', 'completion_date', 'transfer_id', 'recurrence_id',
+)
+
+
+def requested_month(request):
+    """(year, month) from the query string, defaulting to the current month; None if invalid."""
+    now = timezone.now()
+    try:
+        year = int(request.GET.get('year', now.year))
+        month = int(request.GET.get('month', now.month))
+    except ValueError:
+        return None
+    if not 1 <= month <= 12 or not 1 <= year <= 9999:
+        return None
+    return year, month
+
+
+def invalid_month():
+    return JsonResponse({'error': "'year' and 'month' must be a valid year and month (1-12)."}, status=400)
+
+
+def month_totals(totals):
+    """Income/expense/net of a month from the four summary sums (None when there are no rows)."""
+    totals = {field: Decimal(totals[field] or 0).quantize(CENT) for field in SUMMARY_FIELDS}
+    income = totals['completed_income'] + totals['pending_income']
+    expense = totals['completed_expense'] + totals['pending_expense']
+    return {**totals, 'income': income, 'expense': expense, 'net': income - expense}
+
+
+class MonthTransactionsApiView(AsyncJsonView):
+    """
+    The month the dashboard shows, as JSON: every real row of the month plus
+    FIXED occurrences beyond the materialised horizon, in date order, and the
+    month totals. Real rows, FIXED parents, accounts, categories and totals are
+    five independent queries, awaited together but run one after another (see
+    the module docstring).
+    """
+    query_budget = 7
+
+    async def get(self, request):
+        selected = requested_month(request)
+        if selected is None:
+            return invalid_month()
+        year, month = selected
+        user = request.user
+        first_day, next_month_first_day = month_bounds(year, month)
+
+        rows, parents, accounts, categories, totals = await asyncio.gather(
+            alist(Transaction.objects.filter(
+                user=user, date__gte=first_day, date__lt=next_month_first_day
+            ).order_by(*REAL_ROW_ORDERING).values(*ROW_FIELDS)),
+            alist(Transaction.objects.filter(user=user, frequency=Transaction.Frequency.FIXED).only(
+                'pk', 'date', 'account_id', 'category_id', 'transaction_type', 'amount', 'description',
+                'transfer_id', 'materialized_from', 'next_occurrence_date',
+            )),
+            alist(Account.objects.filter(user=user).values_list('pk', 'name')),
+            alist(Category.objects.filter(user=user).values_list('pk', 'name')),
+            MonthlySummary.objects.filter(user=user, year=year, month=month).aaggregate(
+                **{field: Sum(field) for field in SUMMARY_FIELDS}
+            ),
+        )
+
+        projected = [
+            {
+                'id': occurrence.parent.pk, 'date': occurrence.date, 'account_id': occurrence.account_id,
+                'category_id': occurrence.category_id, 'transaction_type': occurrence.transaction_type,
+                'amount': occurrence.amount, 'description': occurrence.description,
+                'status': occurrence.status, 'completion_date': None, 'transfer_id': occurrence.transfer_id,
+                'recurrence_id': occurrence.parent.pk, 'is_projection': True,
+            }
+            for occurrence in project_fixed(parents, first_day, next_month_first_day)
+            if not is_materialized(occurrence)
+        ]
+        # project_fixed agrupa por "mãe"; o merge precisa das duas listas em ordem de data.
+        projected.sort(key=lambda row: row['date'])
+        account_names, category_names = dict(accounts), dict(categories)
+        transactions = []
+        for row in heapq.merge(rows, projected, key=lambda row: row['date']):
+            row.setdefault('is_projection', False)
+            row['account'] = account_names.get(row['account_id'])
+            row['category'] = category_names.get(row['category_id'])
+            transactions.append(row)
+
+        return JsonResponse({
+            'year': year,
+            'month': month,
+            'totals': month_totals(totals),
+            'transactions': transactions,
+        })
+
+
+class MonthSummaryApiView(AsyncJsonView):
+    """
+    Month totals by category and by account, read from the monthly summaries
+    (three aggregations, awaited together but run one after another).
+    """
+    query_budget = 5
+
+    async def get(self, request):
+        selected = requested_month(request)
+        if selected is None:
+            return invalid_month()
+        year, month = selected
+        summaries = MonthlySummary.objects.filter(user=request.user, year=year, month=month)
+        sums = {field: Sum(field) for field in SUMMARY_FIELDS}
+
+        by_category, by_account, totals = await asyncio.gather(
+            alist(summaries.values('category_id', 'category__name').annotate(**sums).order_by('category__name')),
+            alist(summaries.values('account_id', 'account__name').annotate(**sums).order_by('account__name')),
+            summaries.aaggregate(**sums),
+        )
+        return JsonResponse({
+            'year': year,
+            'month': month,
+            'totals': month_totals(totals),
+            'categories': [
+                {'id': row['category_id'], 'name': row['category__name'], **month_totals(row)}
+                for row in by_category
+            ],
+            'accounts': [
+                {'id': row['account_id'], 'name': row['account__name'], **month_totals(row)}
+                for row in by_account
+            ],
+        })
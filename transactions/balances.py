@@ -0,0 +1,129 @@
+# transactions/balances.py
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction as db_transaction
+from django.db.models import Sum, F, Case, When, Value, DecimalField
+
+from accounts.models import Account
+from config.cache import ACCOUNTS, DATA, invalidate_user_cache
+from .models import Transaction
+
+ZERO = Decimal('0.00')
+CENT = Decimal('0.01')
+
+
+def balance_expression():
+    """
+    The signed SUM used to aggregate completed transactions into a balance.
+    Transfers are stored as INCOME/EXPENSE legs, so TRANSFER rows count as zero.
+    """
+    return Sum(Case(
+        When(transaction_type=Transaction.TransactionType.INCOME, then=F('amount')),
+        When(transaction_type=Transaction.TransactionType.EXPENSE, then=-F('amount')),
+        default=Value(ZERO),
+        output_field=DecimalField(max_digits=15, decimal_places=2)
+    ))
+
+
+def balance_contribution(state):
+    """
+    Returns the signed amount a transaction adds to its account balance.
+    `state` is a model instance or a named row exposing account_id,
+    transaction_type, amount and completion_date; None counts as zero.
+    """
+    if state is None or state.completion_date is None:
+        return ZERO
+    # Uma instância ainda não recarregada pode trazer o valor como string ('12.50').
+    if state.transaction_type == Transaction.TransactionType.INCOME:
+        return Decimal(state.amount)
+    if state.transaction_type == Transaction.TransactionType.EXPENSE:
+        return -Decimal(state.amount)
+    return ZERO
+
+
+def apply_balance_deltas(deltas):
+    """
+    Adds each delta to its account balance with a single UPDATE statement,
+    so concurrent writers never overwrite each other's changes.
+    """
+    deltas = {account_id: delta for account_id, delta in deltas.items() if delta}
+    if not deltas:
+        return 0
+    increment = Case(
+        *[When(pk=account_id, then=Value(delta)) for account_id, delta in deltas.items()],
+        default=Value(ZERO),
+        output_field=DecimalField(max_digits=15, decimal_places=2)
+    )
+    return Account.objects.filter(pk__in=deltas).update(balance=F('balance') + increment)
+
+
+class BalanceDeltas:
+    """
+    Collects signed balance changes per account. Removing the old state of a row
+    and adding its new state covers every kind of edit, including moving a
+    transaction to another account.
+    """
+
+    def __init__(self):
+        self.by_account = defaultdict(lambda: ZERO)
+
+    def add(self, state, sign=1):
+        amount = balance_contribution(state)
+        if amount:
+            self.by_account[state.account_id] += sign * amount
+
+    def remove(self, state):
+        self.add(state, sign=-1)
+
+    def apply(self):
+        deltas = dict(self.by_account)
+        self.by_account.clear()
+        apply_balance_deltas(deltas)
+        return deltas
+
+
+def calculate_balances(accounts):
+    """
+    Recomputes balances from scratch (initial balance + every completed
+    transaction) with one grouped query. Returns {account_id: balance}.
+    """
+    accounts = list(accounts)
+    totals = dict(
+        Transaction.objects.filter(
+            account__in=accounts,
+            completion_date__isnull=False
+        ).values('account_id').annotate(total=balance_expression()).values_list('account_id', 'total')
+    )
+    # SQLite soma decimais em ponto flutuante; arredonda para centavos como o campo.
+    return {
+        account.pk: (account.initial_balance + (totals.get(account.pk) or ZERO)).quantize(CENT)
+        for account in accounts
+    }
+
+
+def find_balance_mismatches(accounts):
+    """Returns (account, stored_balance, expected_balance) for every drifted account."""
+    accounts = list(accounts)
+    expected = calculate_balances(accounts)
+    return [
+        (account, account.balance, expected[account.pk])
+        for account in accounts
+        if account.balance != expected[account.pk]
+    ]
+
+
+def rebuild_balances(accounts):
+    """
+    Rewrites the stored balance of every drifted account. Returns the mismatches fixed.
+    The accounts are locked (in primary-key order) and re-read before the
+    history is summed, so a write committed meanwhile is not overwritten.
+    """
+    with db_transaction.atomic():
+        locked = Account.objects.select_for_update().filter(pk__in=[account.pk for account in accounts]).order_by('pk')
+        mismatches = find_balance_mismatches(locked)
+        for account, _, expected in mismatches:
+            account.balance = expected
+        Account.objects.bulk_update([account for account, _, _ in mismatches], ['balance'])
+    invalidate_user_cache({account.user_id for account, _, _ in mismatches}, ACCOUNTS, DATA)
+    return mismatches
@@ -0,0 +1,146 @@
+# transactions/budgets.py
+"""
+Category budgets (Budget): a monthly limit and a `spent` counter.
+
+The counter is kept by the transaction write paths, like the balances and the
+monthly summaries: every write goes through TransactionEffects, whose
+BudgetDeltas collector turns it into one UPDATE ... SET spent = spent + delta.
+The addition happens in the database, so concurrent writers cannot lose each
+other's changes, and reading a budget is a single indexed row.
+"""
+from collections import defaultdict
+
+from django.db import transaction as db_transaction
+from django.db.models import Case, DecimalField, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from config.cache import DATA, invalidate_user_cache
+from .models import Budget, MonthlySummary, Transaction
+from .summaries import KEY_CHUNK, ZERO
+
+KEY_FIELDS = ('user_id', 'category_id', 'year', 'month')
+
+
+def budget_key(state):
+    return (state.user_id, state.category_id, state.date.year, state.date.month)
+
+
+class BudgetDeltas:
+    """
+    Collects signed changes to the `spent` of budgets, keyed by (user,
+    category, year, month). Only expenses with a category count; keys
+    without a budget are dropped after one read (see apply_budget_deltas).
+    """
+
+    def __init__(self):
+        self.by_key = defaultdict(lambda: ZERO)
+
+    def add(self, state, sign=1):
+        if state is None or state.transaction_type != Transaction.TransactionType.EXPENSE:
+            return
+        if state.category_id is not None and state.amount:
+            self.by_key[budget_key(state)] += sign * state.amount
+
+    def remove(self, state):
+        self.add(state, sign=-1)
+
+    def apply(self):
+        deltas = {key: delta for key, delta in self.by_key.items() if delta}
+        self.by_key.clear()
+        if deltas:
+            apply_budget_deltas(deltas)
+        return deltas
+
+
+def apply_budget_deltas(deltas):
+    """
+    Adds {(user, category, year, month): delta} to the matching budgets. The
+    budgets of the affected users and months are read first, so a batch that
+    touches no budget costs that one SELECT; the rest is one UPDATE per
+    KEY_CHUNK budgets.
+    """
+    keys = {key[0] for key in deltas}, {key[2] for key in deltas}, {key[3] for key in deltas}
+    # Superconjunto (usuários x anos x meses), filtrado pelas chaves aqui.
+    budgets = Budget.objects.filter(user_id__in=keys[0], year__in=keys[1], month__in=keys[2]).values_list(
+        'pk', *KEY_FIELDS
+    )
+    increments = {row[0]: deltas[row[1:]] for row in budgets if row[1:] in deltas}
+    updated = 0
+    pks = sorted(increments)
+    for start in range(0, len(pks), KEY_CHUNK):
+        chunk = pks[start:start + KEY_CHUNK]
+        increment = Case(
+            *[When(pk=pk, then=Value(increments[pk])) for pk in chunk],
+            default=Value(ZERO), output_field=DecimalField(max_digits=15, decimal_places=2),
+        )
+        updated += Budget.objects.filter(pk__in=chunk).update(spent=F('spent') + increment)
+    return updated
+
+
+def summary_spent():
+    """The month's expenses of a budget's category, from the monthly summaries (for subqueries)."""
+    return Coalesce(Subquery(
+        MonthlySummary.objects.filter(
+            user_id=OuterRef('user_id'), category_id=OuterRef('category_id'),
+            year=OuterRef('year'), month=OuterRef('month'),
+        ).order_by().values('category_id').annotate(
+            total=Sum(F('completed_expense') + F('pending_expense'))
+        ).values('total')
+    ), Value(ZERO), output_field=DecimalField(max_digits=15, decimal_places=2))
+
+
+def transaction_spent():
+    """The same total aggregated from the transactions themselves, for checks and rebuilds."""
+    return Coalesce(Subquery(
+        Transaction.objects.filter(
+            user_id=OuterRef('user_id'), category_id=OuterRef('category_id'),
+            date__year=OuterRef('year'), date__month=OuterRef('month'),
+            transaction_type=Transaction.TransactionType.EXPENSE,
+        ).order_by().values('category_id').annotate(total=Sum('amount')).values('total')
+    ), Value(ZERO), output_field=DecimalField(max_digits=15, decimal_places=2))
+
+
+def set_budget(user, category, year, month, limit):
+    """
+    Creates or changes the budget of `category` in a month. A new budget
+    starts from what was already spent, read from the monthly summaries in
+    the same statement that sets it.
+    """
+    with db_transaction.atomic():
+        budget, created = Budget.objects.update_or_create(
+            user=user, category=category, year=year, month=month, defaults={'limit': limit}
+        )
+        if created:
+            Budget.objects.filter(pk=budget.pk).update(spent=summary_spent())
+            budget.refresh_from_db(fields=['spent'])
+    invalidate_user_cache([user.pk], DATA)
+    return budget
+
+
+def month_budgets(user_id, year, month):
+    """The user's budgets of a month with their categories, by category name (one query)."""
+    return list(
+        Budget.objects.filter(user_id=user_id, year=year, month=month)
+        .select_related('category').order_by('category__name')
+    )
+
+
+def budget_for(state):
+    """The budget an expense counts against, with its category, or None (one indexed lookup)."""
+    if state.transaction_type != Transaction.TransactionType.EXPENSE or state.category_id is None:
+        return None
+    return Budget.objects.filter(**dict(zip(KEY_FIELDS, budget_key(state)))).select_related('category').first()
+
+
+def find_budget_mismatches(user_ids):
+    """Returns (budget, stored spent, expected spent) for every budget whose counter drifted."""
+    budgets = Budget.objects.filter(user_id__in=user_ids).annotate(expected=transaction_spent()).order_by('pk')
+    return [(budget, budget.spent, budget.expected) for budget in budgets if budget.spent != budget.expected]
+
+
+@db_transaction.atomic
+def rebuild_budgets(user_ids):
+    """Recomputes the `spent` of every budget of the given users. Returns how many were rewritten."""
+    rebuilt = Budget.objects.filter(user_id__in=user_ids).update(spent=transaction_spent())
+    invalidate_user_cache(user_ids, DATA)
+    return rebuilt
@@ -0,0 +1,105 @@
+# transactions/dashboard.py
+import heapq
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from operator import attrgetter
+
+from django.db.models import Count
+
+by_date = attrgetter('date')
+# Ordem das linhas reais; pk desempata linhas com a mesma data e created_at, para
+# que LIMIT/OFFSET de páginas diferentes nunca repitam nem pulem uma linha.
+REAL_ROW_ORDERING = ('date', '-created_at', '-pk')
+
+
+def share_related_objects(*row_lists):
+    """
+    Makes rows that point to the same account or category share one instance,
+    so the dashboard holds each related object once no matter how many real or
+    projected rows reference it. Only relations already loaded (select_related)
+    are touched, so this never issues a query.
+    """
+    shared = {}
+    for rows in row_lists:
+        for row in rows:
+            for field_name in ('account', 'to_account', 'category'):
+                field = row._meta.get_field(field_name)
+                if not field.is_cached(row):
+                    continue
+                related = getattr(row, field_name)
+                if related is not None:
+                    setattr(row, field_name, shared.setdefault((related.__class__, related.pk), related))
+
+
+class MergedTransactionList:
+    """
+    A read-only sequence that interleaves real rows, ordered and sliced by the
+    database, with in-memory projected rows, ordered by date.
+
+    The order is the one the dashboard has always used: ascending date, real rows
+    before projections on the same date, real rows newest first among themselves
+    (pk breaking ties) and projections in the order they were given. The
+    Paginator only asks for `count()` and one slice, so a page costs a per-day
+    histogram (at most 31 rows for a month) plus one LIMIT/OFFSET query for the
+    real rows it shows.
+    """
+
+    def __init__(self, queryset, projections):
+        self.queryset = queryset.order_by(*REAL_ROW_ORDERING)
+        self.projections = sorted(projections, key=by_date)
+        self._projection_offsets = None
+
+    def _get_projection_offsets(self):
+        """
+        For each projection, its position in the merged sequence: its own index
+        plus the number of real rows dated on or before it.
+        """
+        if self._projection_offsets is None:
+            # Agrupa pela primeira chave de REAL_ROW_ORDERING: as demais só ordenam
+            # dentro do dia, e a posição de uma projeção depende só da data.
+            histogram = list(
+                self.queryset.order_by(REAL_ROW_ORDERING[0]).values('date').annotate(rows=Count('pk'))
+                .values_list('date', 'rows')
+            )
+            dates = [day for day, _ in histogram]
+            real_up_to = [0] + list(accumulate(rows for _, rows in histogram))
+            self._real_count = real_up_to[-1]
+            self._projection_offsets = [
+                index + real_up_to[bisect_right(dates, projection.date)]
+                for index, projection in enumerate(self.projections)
+            ]
+        return self._projection_offsets
+
+    def count(self):
+        self._get_projection_offsets()
+        return self._real_count + len(self.projections)
+
+    def __len__(self):
+        return self.count()
+
+    def _split(self, position):
+        """Returns how many (real rows, projections) precede a merged position."""
+        projections_before = bisect_left(self._get_projection_offsets(), position)
+        return position - projections_before, projections_before
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            if index < 0:
+                index += self.count()
+            rows = self[index:index + 1] if index >= 0 else []
+            if not rows:
+                raise IndexError(index)
+            return rows[0]
+        start, stop, step = index.indices(self.count())
+        if step != 1:
+            raise ValueError("MergedTransactionList does not support stepped slices.")
+        if start >= stop:
+            return []
+        real_start, projected_start = self._split(start)
+        real_stop, projected_stop = self._split(stop)
+        real_rows = list(self.queryset[real_start:real_stop]) if real_stop > real_start else []
+        projected_rows = self.projections[projected_start:projected_stop]
+        # As projeções delegam account/category ao "pai", então é ele que compartilha as instâncias.
+        share_related_objects(real_rows, [projection.parent for projection in projected_rows])
+        # Em caso de empate na data, heapq.merge mantém as linhas reais primeiro.
+        return list(heapq.merge(real_rows, projected_rows, key=by_date))
@@ -0,0 +1,19 @@
+# transactions/dates.py
+from datetime import date, timedelta
+
+
+def month_bounds(year, month):
+    """
+    Returns the half-open range [first day of the month, first day of the next
+    month). Filtering with `date__gte`/`date__lt` on these bounds keeps the
+    lookup sargable, unlike `date__year`/`date__month` which become EXTRACT().
+    """
+    first = date(year, month, 1)
+    if month == 12:
+        return first, date(year + 1, 1, 1)
+    return first, date(year, month + 1, 1)
+
+
+def month_end(day):
+    """Last day of the month of `day`."""
+    return month_bounds(day.year, day.month)[1] - timedelta(days=1)
@@ -0,0 +1,63 @@
+# transactions/effects.py
+from collections import namedtuple
+
+from config.cache import ACCOUNTS, DATA, FIXED_PARENTS, invalidate_user_cache
+from .balances import BalanceDeltas
+from .budgets import BudgetDeltas
+from .snapshots import SnapshotDeltas
+from .summaries import SummaryDeltas
+
+# Campos de uma transação dos quais dependem os dados derivados (saldos, resumos).
+LEDGER_FIELDS = (
+    'user_id', 'account_id', 'category_id', 'transaction_type', 'amount', 'date', 'completion_date', 'transfer_id',
+)
+LedgerState = namedtuple('LedgerState', LEDGER_FIELDS)
+
+
+class TransactionEffects:
+    """
+    Collects the changes that a set of transaction writes causes in derived data
+    (account balances, monthly summaries, month-end balance snapshots and budget
+    counters) and applies them together.
+
+    Callers describe each write as the removal of the old state of a row and the
+    addition of its new state; a state is a Transaction instance or a named row
+    from `values_list(*LEDGER_FIELDS, named=True)`.
+
+    Applying also invalidates the cached accounts (their balances moved) and
+    FIXED parents of every user involved, and moves their data version.
+    """
+
+    def __init__(self):
+        self.collectors = [BalanceDeltas(), SummaryDeltas(), SnapshotDeltas(), BudgetDeltas()]
+        self.user_ids = set()
+
+    def add(self, state, sign=1):
+        if state is not None:
+            self.user_ids.add(state.user_id)
+        for collector in self.collectors:
+            collector.add(state, sign)
+
+    def remove(self, state):
+        self.add(state, sign=-1)
+
+    def apply(self):
+        for collector in self.collectors:
+            collector.apply()
+        invalidate_user_cache(self.user_ids, ACCOUNTS, FIXED_PARENTS, DATA)
+
+
+def ledger_states(queryset):
+    """The current ledger state of every row in `queryset`, as named tuples."""
+    return queryset.values_list('pk', *LEDGER_FIELDS, named=True)
+
+
+def ledger_state(instance):
+    """
+    The ledger state of a Transaction instance, with every value converted by
+    its field's to_python(): right after create(date='2026-01-05', amount='9.90')
+    the instance still holds the strings it was given.
+    """
+    return LedgerState(*(
+        instance._meta.get_field(field).to_python(getattr(instance, field)) for field in LEDGER_FIELDS
+    ))
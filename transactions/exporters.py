@@ -0,0 +1,181 @@
+# transactions/exporters.py
+import csv
+import json
+
+from .models import Transaction
+
+# (column name, queryset lookup), in output order.
+EXPORT_COLUMNS = (
+    ('id', 'pk'),
+    ('date', 'date'),
+    ('completion_date', 'completion_date'),
+    ('status', 'status'),
+    ('transaction_type', 'transaction_type'),
+    ('amount', 'amount'),
+    ('account', 'account__name'),
+    ('to_account', 'to_account__name'),
+    ('category', 'category__name'),
+    ('description', 'description'),
+    ('frequency', 'frequency'),
+    ('installment_number', 'installment_number'),
+    ('installments', 'installments'),
+    ('recurrence_id', 'recurrence_id'),
+    ('transfer_id', 'transfer_id'),
+)
+COLUMN_NAMES = [name for name, _ in EXPORT_COLUMNS]
+
+CHUNK_SIZE = 2000
+
+
+class ExportError(Exception):
+    """Raised when an export cannot be produced (e.g. a missing optional dependency)."""
+
+
+def export_queryset(user=None, account=None, start=None, end=None, status=None):
+    """
+    Rows to export as plain tuples (see EXPORT_COLUMNS), oldest first. `start`
+    and `end` are inclusive dates; every filter is optional.
+    """
+    queryset = Transaction.objects.all()
+    if user is not None:
+        queryset = queryset.filter(user=user)
+    if account is not None:
+        queryset = queryset.filter(account=account)
+    if start is not None:
+        queryset = queryset.filter(date__gte=start)
+    if end is not None:
+        queryset = queryset.filter(date__lte=end)
+    if status:
+        queryset = queryset.filter(status=status)
+    return queryset.order_by('date', 'pk').values_list(*(lookup for _, lookup in EXPORT_COLUMNS))
+
+
+def iter_rows(queryset, chunk_size=CHUNK_SIZE):
+    """
+    Streams the rows `chunk_size` at a time. On PostgreSQL .iterator() uses a
+    server-side cursor, so the result set is never held in memory at once.
+    """
+    return queryset.iterator(chunk_size=chunk_size)
+
+
+class _Echo:
+    """Pseudo-buffer for csv.writer: write() returns the line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def _text(value):
+    return '' if value is None else str(value)
+
+
+def to_csv(rows):
+    """Yields the CSV export line by line, header first."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(COLUMN_NAMES)
+    for row in rows:
+        yield writer.writerow([_text(value) for value in row])
+
+
+def to_jsonl(rows):
+    """Yields one JSON object per line; dates, decimals and UUIDs become strings."""
+    for row in rows:
+        yield json.dumps(
+            {name: (value if value is None or isinstance(value, int) else str(value))
+             for name, value in zip(COLUMN_NAMES, row)},
+            ensure_ascii=False
+        ) + '\n'
+
+
+class _ChunkSink:
+    """
+    Write-only file object that keeps what was written until drained, so a
+    Parquet file can be streamed out one row group at a time.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def to_parquet(rows, row_group_size=CHUNK_SIZE * 10):
+    """
+    Yields a Parquet file in byte chunks, one row group of `row_group_size`
+    rows at a time. Requires the optional pyarrow package.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ExportError("Parquet export requires the 'pyarrow' package.")
+
+    schema = pa.schema([
+        ('id', pa.string()),
+        ('date', pa.date32()),
+        ('completion_date', pa.date32()),
+        ('status', pa.string()),
+        ('transaction_type', pa.string()),
+        ('amount', pa.decimal128(15, 2)),
+        ('account', pa.string()),
+        ('to_account', pa.string()),
+        ('category', pa.string()),
+        ('description', pa.string()),
+        ('frequency', pa.string()),
+        ('installment_number', pa.int64()),
+        ('installments', pa.int64()),
+        ('recurrence_id', pa.string()),
+        ('transfer_id', pa.string()),
+    ])
+    uuid_columns = {'id', 'recurrence_id', 'transfer_id'}
+
+    def record_batch(batch):
+        columns = list(zip(*batch))
+        return pa.record_batch([
+            pa.array(
+                [None if value is None else str(value) for value in column] if name in uuid_columns else column,
+                type=schema.field(name).type
+            )
+            for name, column in zip(COLUMN_NAMES, columns)
+        ], schema=schema)
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode='w'), schema)
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == row_group_size:
+            writer.write_batch(record_batch(batch))
+            batch = []
+            yield sink.drain()
+    if batch:
+        writer.write_batch(record_batch(batch))
+    writer.close()
+    yield sink.drain()
+
+
+# formato -> (gerador, content type, extensão)
+FORMATS = {
+    'csv': (to_csv, 'text/csv; charset=utf-8', 'csv'),
+    'jsonl': (to_jsonl, 'application/x-ndjson', 'jsonl'),
+    'parquet': (to_parquet, 'application/vnd.apache.parquet', 'parquet'),
+}
@@ -1,7 +1,19 @@
 # transactions/forms.py
 
 from django import forms
-from .models import Transaction, Category, Account
+from config.cache import user_accounts, user_categories
+from .models import Budget, Transaction, Category, Account
+
+
+def use_cached_choices(field, objects):
+    """
+    Renders a ModelChoiceField from an already loaded (cached) list instead of
+    querying its queryset; the queryset is still used to validate submissions.
+    """
+    choices = [(obj.pk, field.label_from_instance(obj)) for obj in objects]
+    if field.empty_label is not None:
+        choices.insert(0, ('', field.empty_label))
+    field.choices = choices
 
 class TransactionForm(forms.ModelForm):
     """
@@ -72,6 +84,11 @@ class TransactionForm(forms.ModelForm):
             self.fields['account'].queryset = Account.objects.filter(user=user)
             self.fields['to_account'].queryset = Account.objects.filter(user=user)
             self.fields['category'].queryset = Category.objects.filter(user=user)
+            # As opções vêm do cache por usuário, sem consultar o banco a cada renderização.
+            accounts = user_accounts(user.pk)
+            use_cached_choices(self.fields['account'], accounts)
+            use_cached_choices(self.fields['to_account'], accounts)
+            use_cached_choices(self.fields['category'], user_categories(user.pk))
 
         # --- Melhorias de UX nos Labels e Textos de Ajuda ---
         
@@ -83,4 +100,62 @@ class TransactionForm(forms.ModelForm):
         self.fields['transaction_type'].label = "Operation Type"
 
         # O campo 'to_account' não é obrigatório para Receitas/Despesas
-        self.fields['to_account'].required = False
\ No newline at end of file
+        self.fields['to_account'].required = False
+
+class StatementImportForm(forms.Form):
+    """Upload de um extrato bancário (CSV ou OFX) para uma das contas do usuário."""
+
+    account = forms.ModelChoiceField(queryset=Account.objects.none())
+    file_format = forms.ChoiceField(label="Format", choices=[('csv', 'CSV'), ('ofx', 'OFX')])
+    statement = forms.FileField(
+        help_text="CSV columns: date, amount, description (optional: type, category)."
+    )
+
+    def __init__(self, *args, **kwargs):
+        user = kwargs.pop('user', None)
+        super().__init__(*args, **kwargs)
+        if user:
+            self.fields['account'].queryset = Account.objects.filter(user=user)
+
+
+class TransactionExportForm(forms.Form):
+    """Filtros da exportação de transações (todos opcionais, exceto o formato)."""
+
+    format = forms.ChoiceField(choices=[('csv', 'CSV'), ('jsonl', 'JSON Lines'), ('parquet', 'Parquet')])
+    account = forms.ModelChoiceField(queryset=Account.objects.none(), required=False)
+    start = forms.DateField(required=False)
+    end = forms.DateField(required=False)
+    status = forms.ChoiceField(choices=[('', 'Any')] + Transaction.Status.choices, required=False)
+
+    def __init__(self, *args, **kwargs):
+        user = kwargs.pop('user', None)
+        super().__init__(*args, **kwargs)
+        if user:
+            self.fields['account'].queryset = Account.objects.filter(user=user)
+
+
+class BudgetForm(forms.ModelForm):
+    """Limite mensal de gastos de uma categoria de despesa."""
+
+    class Meta:
+        model = Budget
+        fields = ['category', 'year', 'month', 'limit']
+
+    def __init__(self, *args, **kwargs):
+        user = kwargs.pop('user', None)
+        super().__init__(*args, **kwargs)
+        self.fields['month'].widget = forms.Select(choices=[(month, f'{month:02d}') for month in range(1, 13)])
+        if user:
+            self.fields['category'].queryset = Category.objects.filter(
+                user=user, transaction_type=Category.TransactionType.EXPENSE
+            )
+            use_cached_choices(self.fields['category'], [
+                category for category in user_categories(user.pk)
+                if category.transaction_type == Category.TransactionType.EXPENSE
+            ])
+
+    def clean_month(self):
+        month = self.cleaned_data['month']
+        if not 1 <= month <= 12:
+            raise forms.ValidationError("Choose a month between 1 and 12.")
+        return month
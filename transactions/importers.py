@@ -0,0 +1,216 @@
+# transactions/importers.py
+import csv
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from .effects import TransactionEffects
+from .models import Category, Transaction, dedupe_hash
+from .services import create_transactions
+
+
+class StatementError(ValueError):
+    """Raised for a statement line that cannot be understood."""
+
+
+@dataclass
+class StatementLine:
+    date: date
+    amount: Decimal  # Negativo para saídas.
+    description: str
+    category: str = ''
+
+
+@dataclass
+class ImportResult:
+    read: int = 0
+    inserted: int = 0
+    duplicates: int = 0
+    seconds: float = 0.0
+    batches: list = field(default_factory=list)
+
+    @property
+    def rows_per_second(self):
+        return self.read / self.seconds if self.seconds else 0.0
+
+
+def parse_amount(value):
+    """
+    Parses '1234.56', '-1,234.56', '1.234,56' or '(12.00)'. The last separator
+    is taken as the decimal one, so both US and Brazilian bank exports work.
+    """
+    text = value.strip().replace(' ', '').replace('R$', '').replace('$', '')
+    negative = text.startswith('(') and text.endswith(')')
+    text = text.strip('()')
+    if ',' in text and text.rfind(',') > text.rfind('.'):
+        text = text.replace('.', '').replace(',', '.')
+    else:
+        text = text.replace(',', '')
+    try:
+        amount = Decimal(text)
+    except InvalidOperation:
+        raise StatementError(f"Invalid amount: {value!r}")
+    return -amount if negative else amount
+
+
+def parse_date(value):
+    text = value.strip()
+    try:
+        return date.fromisoformat(text[:10])
+    except ValueError:
+        pass
+    for pattern, length in (('%d/%m/%Y', 10), ('%Y%m%d', 8)):
+        try:
+            return datetime.strptime(text[:length], pattern).date()
+        except ValueError:
+            continue
+    raise StatementError(f"Invalid date: {value!r}")
+
+
+def parse_csv(lines):
+    """
+    Yields StatementLines from an iterable of CSV text lines with a header row.
+    Required columns: date, amount, description. Optional: type (INCOME or
+    EXPENSE, for files with unsigned amounts) and category (a category name).
+    The file is read one line at a time.
+    """
+    reader = csv.DictReader(lines)
+    columns = {name.strip().lower(): name for name in reader.fieldnames or []}
+    missing = {'date', 'amount', 'description'} - set(columns)
+    if missing:
+        raise StatementError(f"Missing CSV columns: {', '.join(sorted(missing))}")
+
+    for row in reader:
+        amount = parse_amount(row[columns['amount']])
+        kind = (row.get(columns.get('type', ''), '') or '').strip().upper()
+        if kind == Transaction.TransactionType.EXPENSE:
+            amount = -abs(amount)
+        elif kind == Transaction.TransactionType.INCOME:
+            amount = abs(amount)
+        yield StatementLine(
+            date=parse_date(row[columns['date']]),
+            amount=amount,
+            description=(row[columns['description']] or '').strip(),
+            category=(row.get(columns.get('category', ''), '') or '').strip(),
+        )
+
+
+OFX_TAG = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+
+
+def parse_ofx(lines):
+    """
+    Yields StatementLines from the <STMTTRN> blocks of an OFX file (SGML or
+    XML flavour), scanning it one line at a time.
+    """
+    current = None
+    for line in lines:
+        for closing, tag, value in OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == 'STMTTRN':
+                if closing and current is not None:
+                    yield _ofx_line(current)
+                    current = None
+                elif not closing:
+                    current = {}
+            elif current is not None and not closing:
+                current[tag] = value.strip()
+
+
+def _ofx_line(values):
+    if 'DTPOSTED' not in values or 'TRNAMT' not in values:
+        raise StatementError(f"Incomplete OFX transaction: {values!r}")
+    return StatementLine(
+        date=parse_date(values['DTPOSTED']),
+        amount=parse_amount(values['TRNAMT']),
+        description=values.get('MEMO') or values.get('NAME', ''),
+    )
+
+
+PARSERS = {
+    'csv': parse_csv,
+    'ofx': parse_ofx,
+}
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+@db_transaction.atomic
+def import_statement(lines, account, fmt='csv', batch_size=5000):
+    """
+    Imports a bank statement into `account` as completed transactions.
+
+    Lines are parsed lazily and inserted in chunks of `batch_size` with
+    bulk_create, so memory depends on the chunk size, not the file size. A line
+    whose (account, date, amount, normalized description) hash already existed
+    before the import is skipped; repeated lines inside the file are kept, as
+    they are separate statement entries. Balances and monthly summaries are
+    updated once, after the last chunk.
+    """
+    result = ImportResult()
+    started = time.monotonic()
+    import_started_at = timezone.now()
+    categories = dict(Category.objects.filter(user=account.user_id).values_list('name', 'pk'))
+    effects = TransactionEffects()
+
+    for chunk in _chunks(PARSERS[fmt](lines), batch_size):
+        batch_started = time.monotonic()
+        result.read += len(chunk)
+        hashed = []
+        for line in chunk:
+            transaction_type = (
+                Transaction.TransactionType.EXPENSE if line.amount < 0 else Transaction.TransactionType.INCOME
+            )
+            amount = abs(line.amount)
+            row_hash = dedupe_hash(account.pk, line.date, transaction_type, amount, line.description)
+            hashed.append((row_hash, transaction_type, amount, line))
+
+        existing = set(Transaction.objects.filter(
+            account=account,
+            dedupe_hash__in={row_hash for row_hash, *_ in hashed},
+            created_at__lt=import_started_at
+        ).order_by().values_list('dedupe_hash', flat=True))
+        # Só instancia os modelos das linhas novas.
+        new_rows = [
+            Transaction(
+                user_id=account.user_id,
+                account=account,
+                transaction_type=transaction_type,
+                amount=amount,
+                date=line.date,
+                category_id=categories.get(line.category),
+                description=line.description,
+                status=Transaction.Status.COMPLETED,
+                completion_date=line.date,
+            )
+            for row_hash, transaction_type, amount, line in hashed
+            if row_hash not in existing
+        ]
+        if new_rows:
+            create_transactions(new_rows, batch_size=batch_size, effects=effects)
+
+        result.inserted += len(new_rows)
+        result.duplicates += len(chunk) - len(new_rows)
+        result.batches.append({
+            'rows': len(chunk),
+            'inserted': len(new_rows),
+            'seconds': round(time.monotonic() - batch_started, 4),
+        })
+
+    effects.apply()
+    result.seconds = time.monotonic() - started
+    return result
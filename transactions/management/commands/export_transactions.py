@@ -0,0 +1,68 @@
+# transactions/management/commands/export_transactions.py
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import Account
+from transactions.exporters import CHUNK_SIZE, FORMATS, ExportError, export_queryset, iter_rows
+from transactions.models import Transaction
+
+
+class Command(BaseCommand):
+    help = "Streams transactions to a CSV, JSON Lines or Parquet file without loading them into memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--output', help="Output file; defaults to stdout (not for parquet).")
+        parser.add_argument('--user', type=int, help="Only transactions of this user id.")
+        parser.add_argument('--account', help="Only transactions of this account id.")
+        parser.add_argument('--start', help="First date (YYYY-MM-DD), inclusive.")
+        parser.add_argument('--end', help="Last date (YYYY-MM-DD), inclusive.")
+        parser.add_argument('--status', choices=Transaction.Status.values)
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help="Rows fetched from the database per round trip.",
+        )
+
+    def handle(self, *args, **options):
+        fmt = options['format']
+        if fmt == 'parquet' and not options['output']:
+            raise CommandError("Parquet output needs --output.")
+
+        account = options['account']
+        if account is not None:
+            try:
+                account = uuid.UUID(account)
+            except ValueError:
+                raise CommandError(f"Account {options['account']} is not a valid id.")
+            owner = Account.objects.filter(pk=account).values_list('user_id', flat=True).first()
+            if owner is None:
+                raise CommandError(f"Account {account} does not exist.")
+            if options['user'] is not None and owner != options['user']:
+                raise CommandError(f"Account {account} does not belong to user {options['user']}.")
+
+        writer = FORMATS[fmt][0]
+        rows = iter_rows(export_queryset(
+            user=options['user'],
+            account=account,
+            start=options['start'],
+            end=options['end'],
+            status=options['status'],
+        ), chunk_size=options['chunk_size'])
+
+        try:
+            if options['output']:
+                if fmt == 'parquet':
+                    output = open(options['output'], 'wb')
+                else:
+                    output = open(options['output'], 'w', encoding='utf-8', newline='')
+                with output:
+                    for chunk in writer(rows):
+                        output.write(chunk)
+            else:
+                for chunk in writer(rows):
+                    self.stdout.write(chunk, ending='')
+        except ExportError as error:
+            raise CommandError(str(error))
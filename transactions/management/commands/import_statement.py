@@ -0,0 +1,52 @@
+# transactions/management/commands/import_statement.py
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import Account
+from transactions.importers import PARSERS, StatementError, import_statement
+
+
+class Command(BaseCommand):
+    help = "Imports a CSV or OFX bank statement into an account, skipping lines that already exist."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Path of the statement file.")
+        parser.add_argument('--account', required=True, help="Id of the target account.")
+        parser.add_argument(
+            '--format',
+            choices=sorted(PARSERS),
+            help="Statement format; defaults to the file extension.",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help="Number of lines inserted per bulk_create.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            account = Account.objects.get(pk=options['account'])
+        except (Account.DoesNotExist, ValueError):
+            raise CommandError(f"Account {options['account']} does not exist.")
+
+        fmt = options['format'] or options['path'].rsplit('.', 1)[-1].lower()
+        if fmt not in PARSERS:
+            raise CommandError(f"Unknown statement format '{fmt}'; use --format.")
+
+        tracemalloc.start()
+        try:
+            with open(options['path'], encoding='utf-8-sig', errors='replace') as lines:
+                result = import_statement(lines, account, fmt=fmt, batch_size=options['batch_size'])
+        except (OSError, StatementError) as error:
+            raise CommandError(str(error))
+        finally:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Read {result.read} lines in {result.seconds:.2f}s ({result.rows_per_second:.0f} rows/s), "
+            f"inserted {result.inserted}, skipped {result.duplicates} duplicates, "
+            f"peak memory {peak / 1024 / 1024:.1f} MiB."
+        ))
@@ -0,0 +1,48 @@
+# transactions/management/commands/rebuild_balance_snapshots.py
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import Account
+from transactions.snapshots import find_snapshot_mismatches, rebuild_snapshots
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the month-end balance snapshots from the transactions, or checks them for drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help="Only compare stored snapshots with the transactions; exit with an error on drift.",
+        )
+        parser.add_argument('--user', type=int, help="Limit to this user id.")
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help="Number of accounts processed per grouped query.",
+        )
+
+    def handle(self, *args, **options):
+        accounts = Account.objects.order_by('pk')
+        if options['user']:
+            accounts = accounts.filter(user_id=options['user'])
+        accounts = list(accounts)
+
+        batch_size = options['batch_size']
+        mismatches = []
+        rebuilt = 0
+        for start in range(0, len(accounts), batch_size):
+            batch = accounts[start:start + batch_size]
+            if options['check']:
+                mismatches.extend(find_snapshot_mismatches(batch))
+            else:
+                rebuilt += rebuild_snapshots(batch)
+
+        if options['check']:
+            for (account_id, as_of), stored, expected in mismatches:
+                self.stdout.write(f"{account_id} {as_of}: stored {stored}, expected {expected}")
+            if mismatches:
+                raise CommandError(f"{len(mismatches)} balance snapshots are out of date.")
+            self.stdout.write(self.style.SUCCESS(f"Balance snapshots of {len(accounts)} accounts are consistent."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} balance snapshots for {len(accounts)} accounts."))
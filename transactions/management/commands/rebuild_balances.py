@@ -0,0 +1,56 @@
+# transactions/management/commands/rebuild_balances.py
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import Account
+from transactions.balances import find_balance_mismatches, rebuild_balances
+
+
+class Command(BaseCommand):
+    help = "Recalculates account balances from the full transaction history and fixes any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help="Only report drifted balances; exit with an error if any are found.",
+        )
+        parser.add_argument('--user', type=int, help="Limit to the accounts of this user id.")
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help="Number of accounts checked per grouped query.",
+        )
+
+    def handle(self, *args, **options):
+        accounts = Account.objects.order_by('pk')
+        if options['user']:
+            accounts = accounts.filter(user_id=options['user'])
+
+        batch_size = options['batch_size']
+        checked = 0
+        mismatches = []
+        # Processa as contas em lotes para manter a memória e as queries limitadas.
+        last_pk = None
+        while True:
+            batch = accounts if last_pk is None else accounts.filter(pk__gt=last_pk)
+            batch = list(batch[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            checked += len(batch)
+            if options['check']:
+                mismatches.extend(find_balance_mismatches(batch))
+            else:
+                mismatches.extend(rebuild_balances(batch))
+
+        for account, stored, expected in mismatches:
+            self.stdout.write(f"{account.pk} {account.name}: stored {stored}, expected {expected}")
+
+        if options['check'] and mismatches:
+            raise CommandError(f"{len(mismatches)} of {checked} account balances are out of date.")
+
+        verb = "found" if options['check'] else "fixed"
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {checked} accounts, {verb} {len(mismatches)} drifted balances."
+        ))
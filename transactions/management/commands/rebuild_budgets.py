@@ -0,0 +1,48 @@
+# transactions/management/commands/rebuild_budgets.py
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions.budgets import find_budget_mismatches, rebuild_budgets
+
+
+class Command(BaseCommand):
+    help = "Recomputes what was spent against each budget from the transactions, or checks it for drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help="Only compare the stored counters with the transactions; exit with an error on drift.",
+        )
+        parser.add_argument('--user', type=int, help="Limit to this user id.")
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help="Number of users processed per query.",
+        )
+
+    def handle(self, *args, **options):
+        user_ids = get_user_model().objects.order_by('pk').values_list('pk', flat=True)
+        if options['user']:
+            user_ids = user_ids.filter(pk=options['user'])
+        user_ids = list(user_ids)
+
+        batch_size = options['batch_size']
+        mismatches = []
+        rebuilt = 0
+        for start in range(0, len(user_ids), batch_size):
+            batch = user_ids[start:start + batch_size]
+            if options['check']:
+                mismatches.extend(find_budget_mismatches(batch))
+            else:
+                rebuilt += rebuild_budgets(batch)
+
+        if options['check']:
+            for budget, stored, expected in mismatches:
+                self.stdout.write(f"Budget {budget.pk} ({budget}): stored {stored}, expected {expected}")
+            if mismatches:
+                raise CommandError(f"{len(mismatches)} budgets are out of date.")
+            self.stdout.write(self.style.SUCCESS(f"Budgets of {len(user_ids)} users are consistent."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Recomputed {rebuilt} budgets for {len(user_ids)} users."))
@@ -0,0 +1,44 @@
+# transactions/management/commands/seed_synthetic.py
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions.synthetic import seed_households
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates synthetic households (accounts, categories, salaries, spending, installments, "
+        "FIXED recurrences and transfers) for benchmarks and load tests."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help="Number of households to create.")
+        parser.add_argument('--months', type=int, default=24, help="Months of history per household.")
+        parser.add_argument('--per-month', type=int, default=40, help="Day-to-day expenses per month.")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed; same seed, same data.")
+        parser.add_argument('--prefix', default='synthetic', help="Username prefix of the created users.")
+        parser.add_argument('--today', type=date.fromisoformat, help="Reference date (YYYY-MM-DD); defaults to today.")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Rows per bulk_create.")
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['months'] < 1:
+            raise CommandError("--users and --months must be at least 1.")
+
+        started = time.monotonic()
+        result = seed_households(
+            options['users'],
+            months=options['months'],
+            per_month=options['per_month'],
+            seed=options['seed'],
+            prefix=options['prefix'],
+            today=options['today'],
+            batch_size=options['batch_size'],
+        )
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {result.users} users, {result.accounts} accounts, {result.categories} categories and "
+            f"{result.transactions} transactions in {elapsed:.1f}s "
+            f"({result.transactions / elapsed if elapsed else 0:.0f} rows/s)."
+        ))
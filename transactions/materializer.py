@@ -0,0 +1,170 @@
+# transactions/materializer.py
+"""
+Materialisation of FIXED recurrences: real child rows up to a rolling horizon.
+
+A FIXED parent is itself the first occurrence of its recurrence. Every later
+month gets a child Transaction (frequency NONE, `recurrence_id` = parent pk,
+`installment_number` = month ordinal, parent = 1), created PENDING like any
+other future row, so it is counted in summaries, listed by a plain range scan
+and can be completed. `materialized_from` and `next_occurrence_date` on the
+parent bound the materialised part; occurrences outside it (months before the
+parent was first materialised, and those past the horizon) are still
+projected in memory.
+"""
+import uuid
+from datetime import timedelta
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .effects import TransactionEffects, ledger_states
+from .models import Transaction
+from .projections import month_dates, month_index
+from .services import create_transactions
+
+
+def horizon_end(today=None):
+    """Last date that must have real rows: FIXED_HORIZON_MONTHS months after today."""
+    return (today or timezone.now().date()) + relativedelta(months=settings.FIXED_HORIZON_MONTHS)
+
+
+def occurrence_after(parent, day):
+    """First occurrence of `parent` strictly after `day`."""
+    index = month_index(day)
+    return next(d for d in month_dates(index, index + 1, parent.date.day) if d > day)
+
+
+def materialization_start(parent, today=None):
+    """
+    First child date of a parent that has none yet: the occurrence after the
+    parent itself, but never before the current month. Earlier months are not
+    back-filled; they would be created PENDING and then completed today.
+    """
+    today = today or timezone.now().date()
+    return occurrence_after(parent, max(parent.date, today.replace(day=1) - timedelta(days=1)))
+
+
+def occurrence_dates(parent, first, last):
+    """Occurrences of `parent` in [first, last]."""
+    if first > last:
+        return []
+    dates = month_dates(month_index(first), month_index(last), parent.date.day)
+    return [d for d in dates if first <= d <= last]
+
+
+def is_materialized(occurrence):
+    """Whether a projected Occurrence already exists as a row (the parent itself or a child)."""
+    parent = occurrence.parent
+    if occurrence.date <= parent.date:
+        return True
+    if parent.next_occurrence_date is None:
+        return False
+    # Meses entre a "mãe" e o início da materialização não têm linha: seguem projetados.
+    return (parent.materialized_from or parent.next_occurrence_date) <= occurrence.date < parent.next_occurrence_date
+
+
+def build_children(parent, dates):
+    """Builds (without saving) the child rows of `parent` on `dates`."""
+    return [
+        Transaction(
+            user_id=parent.user_id,
+            account_id=parent.account_id,
+            to_account_id=parent.to_account_id,
+            category_id=parent.category_id,
+            transaction_type=parent.transaction_type,
+            amount=parent.amount,
+            date=day,
+            description=parent.description,
+            status=Transaction.Status.PENDING,
+            recurrence_id=parent.pk,
+            installment_number=month_index(day) - month_index(parent.date) + 1,
+            # As duas pernas de uma transferência fixa geram o mesmo id em cada mês.
+            transfer_id=uuid.uuid5(parent.transfer_id, day.isoformat()) if parent.transfer_id else None,
+        )
+        for day in dates
+    ]
+
+
+def materialize_parents(parents, until, today=None):
+    """
+    Creates the missing children of each parent up to `until` (inclusive) and
+    moves its next_occurrence_date past it. Returns the number of rows created.
+    """
+    rows, advanced = [], []
+    for parent in parents:
+        first = parent.next_occurrence_date or materialization_start(parent, today)
+        if first > until:
+            continue
+        rows.extend(build_children(parent, occurrence_dates(parent, first, until)))
+        parent.materialized_from = parent.materialized_from or first
+        parent.next_occurrence_date = occurrence_after(parent, until)
+        advanced.append(parent)
+    if rows:
+        create_transactions(rows)
+        Transaction.objects.bulk_update(advanced, ['materialized_from', 'next_occurrence_date'])
+    return len(rows)
+
+
+def materialize_due_batch(until, batch_size, after=None, today=None):
+    """
+    Extends up to `batch_size` FIXED parents whose next occurrence falls within
+    the horizon, in one database transaction. Parents are claimed with
+    SELECT ... FOR UPDATE SKIP LOCKED and walked in primary-key order from
+    `after`; returns (parents read, rows created, last pk).
+    """
+    with db_transaction.atomic():
+        due = Transaction.objects.select_for_update(skip_locked=True).filter(
+            Q(next_occurrence_date__isnull=True) | Q(next_occurrence_date__lte=until),
+            frequency=Transaction.Frequency.FIXED,
+        ).order_by('pk')
+        if after is not None:
+            due = due.filter(pk__gt=after)
+        parents = list(due[:batch_size])
+        if not parents:
+            return 0, 0, after
+        return len(parents), materialize_parents(parents, until, today), parents[-1].pk
+
+
+def delete_pending_children(parent, effects):
+    """
+    Deletes the children of `parent` that are not completed, in one statement,
+    with their effect removed through `effects`. Completed ones are history and stay.
+    """
+    children = Transaction.objects.filter(recurrence_id=parent.pk, completion_date__isnull=True).exclude(pk=parent.pk)
+    for state in ledger_states(children):
+        effects.remove(state)
+    # Um DELETE só, sem carregar as linhas nem disparar post_delete por linha;
+    # os efeitos já foram removidos acima.
+    children._raw_delete(children.db)
+
+
+@db_transaction.atomic
+def resync_children(parent, today=None):
+    """
+    After an edit of a FIXED parent: its pending children are replaced by new
+    ones built from the parent as it is now, from where its materialisation
+    started (the current month for a parent without children) up to the
+    horizon. Months that already have a completed child are left alone.
+    """
+    until = horizon_end(today)
+    effects = TransactionEffects()
+    delete_pending_children(parent, effects)
+    completed = {
+        month_index(day) for day in
+        Transaction.objects.filter(recurrence_id=parent.pk).exclude(pk=parent.pk).values_list('date', flat=True)
+    }
+    # Refaz o mesmo trecho que já era materializado (as pendentes apagadas acima),
+    # sem estender para trás; uma "mãe" ainda sem filhas começa no mês corrente.
+    start = parent.materialized_from or materialization_start(parent, today)
+    dates = [day for day in occurrence_dates(parent, start, until) if month_index(day) not in completed]
+    create_transactions(build_children(parent, dates), effects=effects)
+    effects.user_ids.add(parent.user_id)  # Mesmo sem filhas, as "mães" em cache mudaram.
+    effects.apply()
+    parent.materialized_from = start
+    parent.next_occurrence_date = occurrence_after(parent, until)
+    Transaction.objects.filter(pk=parent.pk).update(
+        materialized_from=parent.materialized_from, next_occurrence_date=parent.next_occurrence_date
+    )
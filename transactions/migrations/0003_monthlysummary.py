@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:35
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('transactions', '0002_transaction_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('completed_income', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('completed_expense', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('pending_income', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('pending_expense', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_summaries', to='accounts.account')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='monthly_summaries', to='transactions.category')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Monthly summaries',
+                'indexes': [models.Index(fields=['user', 'year', 'month'], name='summary_user_month_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'account', 'category', 'year', 'month'), name='unique_monthly_summary', nulls_distinct=False)],
+            },
+        ),
+    ]
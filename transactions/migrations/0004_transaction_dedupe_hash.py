@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:43
+
+import hashlib
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def normalize_description(description):
+    """Copy of transactions.models.normalize_description as it was when this migration was written."""
+    return ' '.join((description or '').casefold().split())
+
+
+def dedupe_hash(account_id, date, transaction_type, amount, description):
+    """Copy of transactions.models.dedupe_hash as it was when this migration was written."""
+    signed = -amount if transaction_type == 'EXPENSE' else amount
+    key = f"{account_id}|{date.isoformat()}|{signed:.2f}|{normalize_description(description)}"
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def backfill_dedupe_hash(apps, schema_editor):
+    """Fills the hash of existing rows in primary-key order, 2000 rows at a time."""
+    Transaction = apps.get_model('transactions', 'Transaction')
+    rows = Transaction.objects.order_by('pk').only('pk', 'account_id', 'date', 'transaction_type', 'amount', 'description')
+    last_pk = None
+    while True:
+        batch = list((rows if last_pk is None else rows.filter(pk__gt=last_pk))[:2000])
+        if not batch:
+            break
+        for row in batch:
+            row.dedupe_hash = dedupe_hash(row.account_id, row.date, row.transaction_type, row.amount, row.description)
+        Transaction.objects.bulk_update(batch, ['dedupe_hash'])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('transactions', '0003_monthlysummary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='dedupe_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['account', 'dedupe_hash'], name='transaction_dedupe_idx'),
+        ),
+        migrations.RunPython(backfill_dedupe_hash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('transactions', '0004_transaction_dedupe_hash'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='next_occurrence_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('frequency', 'FIXED')), fields=['next_occurrence_date'], name='transaction_fixed_next_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('recurrence_id__isnull', False)), fields=['recurrence_id'], name='transaction_recurrence_idx'),
+        ),
+    ]
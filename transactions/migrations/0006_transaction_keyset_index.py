@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('transactions', '0005_fixed_materialization'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='transaction_user_date_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='transaction_fixed_parent_idx',
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'date', 'created_at', 'id'], name='transaction_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('frequency', 'FIXED')), fields=['user', 'date', 'created_at'], name='transaction_fixed_parent_idx'),
+        ),
+    ]
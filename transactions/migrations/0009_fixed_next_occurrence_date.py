@@ -0,0 +1,45 @@
+import calendar
+from datetime import date, timedelta
+
+from django.db import migrations
+
+
+def month_day(year, month, day):
+    """Day `day` of the month, clamped to its last day (31 -> 30, 28 or 29)."""
+    return date(year, month, min(day, calendar.monthrange(year, month)[1]))
+
+
+def materialization_start(parent, today):
+    """Copy of materializer.materialization_start as it was when this migration was written."""
+    after = max(parent.date, today.replace(day=1) - timedelta(days=1))
+    candidate = month_day(after.year, after.month, parent.date.day)
+    if candidate > after:
+        return candidate
+    year, month = divmod(after.year * 12 + after.month, 12)
+    return month_day(year, month + 1, parent.date.day)
+
+
+def set_next_occurrence_date(apps, schema_editor):
+    """
+    FIXED parents never materialised start at the current month, so the first
+    run of materialize_fixed_recurrences does not back-fill past months.
+    """
+    Transaction = apps.get_model('transactions', 'Transaction')
+    today = date.today()
+    parents = list(
+        Transaction.objects.filter(frequency='FIXED', next_occurrence_date__isnull=True).only('pk', 'date')
+    )
+    for parent in parents:
+        parent.next_occurrence_date = materialization_start(parent, today)
+    Transaction.objects.bulk_update(parents, ['next_occurrence_date'], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0008_budget'),
+    ]
+
+    operations = [
+        migrations.RunPython(set_next_occurrence_date, migrations.RunPython.noop),
+    ]
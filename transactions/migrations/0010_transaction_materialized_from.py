@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:50
+
+from django.db import migrations, models
+from django.db.models import Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def set_materialized_from(apps, schema_editor):
+    """
+    Materialised FIXED parents start at their earliest child; those without any
+    child (next_occurrence_date set by 0009) start at next_occurrence_date, so
+    every earlier month goes back to being projected.
+    """
+    Transaction = apps.get_model('transactions', 'Transaction')
+    first_child = Transaction.objects.filter(recurrence_id=OuterRef('pk')).exclude(pk=OuterRef('pk')).order_by().values(
+        'recurrence_id'
+    ).annotate(first=Min('date')).values('first')
+    Transaction.objects.filter(frequency='FIXED', next_occurrence_date__isnull=False).update(
+        materialized_from=Coalesce(Subquery(first_child[:1]), 'next_occurrence_date')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0009_fixed_next_occurrence_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='materialized_from',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(set_materialized_from, migrations.RunPython.noop),
+    ]
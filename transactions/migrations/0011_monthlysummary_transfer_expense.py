@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:58
+
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def backfill_transfer_expense(apps, schema_editor):
+    """Fills the new counter of existing summaries from the outgoing transfer legs."""
+    Transaction = apps.get_model('transactions', 'Transaction')
+    MonthlySummary = apps.get_model('transactions', 'MonthlySummary')
+    rows = Transaction.objects.filter(transaction_type='EXPENSE', transfer_id__isnull=False).annotate(
+        year=ExtractYear('date'), month=ExtractMonth('date'),
+    ).order_by().values('user_id', 'account_id', 'category_id', 'year', 'month').annotate(total=Sum('amount'))
+    for row in rows.iterator():
+        total = row.pop('total')
+        MonthlySummary.objects.filter(**row).update(transfer_expense=total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0010_transaction_materialized_from'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='monthlysummary',
+            name='transfer_expense',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=15),
+        ),
+        migrations.RunPython(backfill_transfer_expense, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,24 @@
-from django.db import models
+from django.db import models, transaction as db_transaction
 from django.conf import settings
 from accounts.models import Account # Import the Account model
+import hashlib
 import uuid
 
+
+def normalize_description(description):
+    """Case- and whitespace-insensitive form of a description, used for duplicate detection."""
+    return ' '.join((description or '').casefold().split())
+
+
+def dedupe_hash(account_id, date, transaction_type, amount, description):
+    """
+    SHA-256 over (account, date, signed amount, normalized description). Two rows
+    with the same hash are considered the same bank statement line.
+    """
+    signed = -amount if transaction_type == 'EXPENSE' else amount
+    key = f"{account_id}|{date.isoformat()}|{signed:.2f}|{normalize_description(description)}"
+    return hashlib.sha256(key.encode()).hexdigest()
+
 class Category(models.Model):
     """
     Represents a user-defined category for transactions.
@@ -62,6 +78,11 @@ class Transaction(models.Model):
     )
 
     recurrence_id = models.UUIDField(null=True, blank=True, editable=False)
+    # Só para "mães" FIXED: primeira "filha" materializada e próxima ocorrência que
+    # ainda não tem linha própria (nulas enquanto nenhuma "filha" foi materializada).
+    # Ocorrências fora desse intervalo são projetadas. Veja materializer.py.
+    materialized_from = models.DateField(null=True, blank=True, editable=False)
+    next_occurrence_date = models.DateField(null=True, blank=True, editable=False)
 
     frequency = models.CharField(
         max_length=20, # Aumentado para acomodar 'INSTALLMENT'
@@ -110,9 +131,186 @@ class Transaction(models.Model):
     )  
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Preenchido a cada gravação; usado pelo importador de extratos para detectar duplicatas.
+    dedupe_hash = models.CharField(max_length=64, blank=True, editable=False)
 
     def __str__(self):
         return f"{self.transaction_type} - {self.amount} on {self.date}"
 
+    def save(self, *args, **kwargs):
+        # A linha e os efeitos gravados pelos sinais (saldos, resumos, orçamentos)
+        # entram na mesma transação do banco: ninguém vê uma sem os outros.
+        with db_transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            super().save(*args, **kwargs)
+
+    def refresh_dedupe_hash(self):
+        # Antes do save os campos ainda podem ser strings (create(date='2026-01-05')).
+        field = self._meta.get_field
+        self.dedupe_hash = dedupe_hash(
+            self.account_id, field('date').to_python(self.date), self.transaction_type,
+            field('amount').to_python(self.amount), self.description
+        )
+
     class Meta:
-        ordering = ['-date', '-created_at']
\ No newline at end of file
+        ordering = ['-date', '-created_at']
+        indexes = [
+            # Dashboard: transações do usuário num intervalo de datas. created_at e id
+            # completam a ordem da API de leitura (keyset), percorrida de trás para frente.
+            models.Index(fields=['user', 'date', 'created_at', 'id'], name='transaction_user_date_idx'),
+            models.Index(fields=['user', 'frequency'], name='transaction_user_freq_idx'),
+            # Recalculo de saldo: transações efetivadas de uma conta.
+            models.Index(fields=['account', 'completion_date'], name='transaction_acct_done_idx'),
+            # Detecção de duplicatas na importação de extratos.
+            models.Index(fields=['account', 'dedupe_hash'], name='transaction_dedupe_idx'),
+            # Tarefa noturna: apenas as pendentes que já venceram.
+            models.Index(
+                fields=['date'],
+                name='transaction_pending_date_idx',
+                condition=models.Q(completion_date__isnull=True),
+            ),
+            # "Mães" de recorrências fixas, projetadas em todos os meses (já na ordem padrão).
+            models.Index(
+                fields=['user', 'date', 'created_at'],
+                name='transaction_fixed_parent_idx',
+                condition=models.Q(frequency='FIXED'),
+            ),
+            # Materializador: "mães" fixas cujo horizonte precisa avançar.
+            models.Index(
+                fields=['next_occurrence_date'],
+                name='transaction_fixed_next_idx',
+                condition=models.Q(frequency='FIXED'),
+            ),
+            # "Filhas" de uma recorrência (parcelas, ocorrências fixas materializadas).
+            models.Index(
+                fields=['recurrence_id'],
+                name='transaction_recurrence_idx',
+                condition=models.Q(recurrence_id__isnull=False),
+            ),
+        ]
+
+class MonthlySummary(models.Model):
+    """
+    Pre-aggregated totals of a user's transactions for one account, category and
+    month (by transaction date). Kept up to date incrementally by the transaction
+    write paths; `manage.py rebuild_summaries` recomputes it from scratch.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='monthly_summaries'
+    )
+    account = models.ForeignKey(
+        Account,
+        on_delete=models.CASCADE,
+        related_name='monthly_summaries'
+    )
+    # Nulo agrupa as transações sem categoria (inclusive as pernas de transferências).
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='monthly_summaries'
+    )
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    completed_income = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    completed_expense = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    pending_income = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    pending_expense = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    # Parte das despesas acima que é perna de saída de transferência (não é gasto).
+    transfer_expense = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'account', 'category', 'year', 'month'],
+                name='unique_monthly_summary',
+                nulls_distinct=False,
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'year', 'month'], name='summary_user_month_idx'),
+        ]
+        verbose_name_plural = 'Monthly summaries'
+
+    @property
+    def income(self):
+        return self.completed_income + self.pending_income
+
+    @property
+    def expense(self):
+        return self.completed_expense + self.pending_expense
+
+    @property
+    def net(self):
+        return self.income - self.expense
+
+    def __str__(self):
+        return f"{self.account} {self.year}-{self.month:02d}"
+
+
+class AccountBalanceSnapshot(models.Model):
+    """
+    The balance of an account at the end of a month: its initial balance plus
+    every transaction completed on or before `as_of_date` (by completion date).
+    Written for each month end by a daily task, moved incrementally when an
+    older transaction changes; `manage.py rebuild_balance_snapshots` recomputes
+    it from scratch.
+    """
+    account = models.ForeignKey(
+        Account,
+        on_delete=models.CASCADE,
+        related_name='balance_snapshots'
+    )
+    as_of_date = models.DateField()
+    balance = models.DecimalField(max_digits=15, decimal_places=2)
+
+    class Meta:
+        constraints = [
+            # Também é o índice das buscas "último snapshot da conta até a data X".
+            models.UniqueConstraint(fields=['account', 'as_of_date'], name='unique_balance_snapshot'),
+        ]
+
+    def __str__(self):
+        return f"{self.account} {self.as_of_date}: {self.balance}"
+
+
+class Budget(models.Model):
+    """
+    A monthly spending limit for a category. `spent` is a counter of the
+    category's expenses in the month (completed and pending), moved with F()
+    updates by every transaction write, so checking a budget never reads the
+    transactions; `manage.py rebuild_budgets` recomputes it from scratch.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='budgets'
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='budgets'
+    )
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    limit = models.DecimalField(max_digits=15, decimal_places=2)
+    spent = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            # Também é o índice das buscas por mês (user, year, month).
+            models.UniqueConstraint(fields=['user', 'year', 'month', 'category'], name='unique_budget'),
+        ]
+
+    @property
+    def remaining(self):
+        return self.limit - self.spent
+
+    @property
+    def over_budget(self):
+        return self.spent > self.limit
+
+    def __str__(self):
+        return f"{self.category} {self.year}-{self.month:02d}: {self.spent}/{self.limit}"
@@ -0,0 +1,82 @@
+# transactions/networth.py
+"""
+Net worth: the balances of a user's (or a household's) accounts, totalled by
+account type, split into assets and liabilities, with the change since the
+last month end.
+
+Everything comes from one grouped query over Account: the stored balances,
+and for each account the month-end snapshot (AccountBalanceSnapshot) read by
+an indexed subquery. The result has one row per account type, so the cost
+does not grow with the number of accounts beyond that single scan.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models import Case, Count, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from accounts.models import Account
+from config.cache import group_cached
+from .balances import CENT, ZERO
+from .models import AccountBalanceSnapshot
+from .snapshots import last_closed_month_end
+
+# Saldo de cartão é dívida: fica negativo com as compras.
+LIABILITY_TYPES = (Account.AccountType.CREDIT_CARD,)
+
+
+def net_worth(user_ids, today=None):
+    """
+    Net worth of the accounts of `user_ids`. For the change, an account opened
+    after the last month end started from zero; an older one without a
+    snapshot there (from before snapshots existed) counts as unchanged.
+    Liabilities are reported as the positive amount owed.
+    """
+    as_of = last_closed_month_end(today)
+    previous = AccountBalanceSnapshot.objects.filter(account=OuterRef('pk'), as_of_date=as_of).values('balance')
+    rows = Account.objects.filter(user_id__in=user_ids).order_by().values('account_type').annotate(
+        accounts=Count('pk'),
+        total=Sum('balance'),
+        previous=Sum(Coalesce(
+            Subquery(previous),
+            Case(When(created_at__date__gt=as_of, then=Value(ZERO)), default=F('balance')),
+        )),
+    ).order_by('account_type')
+
+    labels = dict(Account.AccountType.choices)
+    types, assets, liabilities, change = [], ZERO, ZERO, ZERO
+    for row in rows:
+        total = (row['total'] or ZERO).quantize(CENT)
+        row_change = (total - (row['previous'] or ZERO)).quantize(CENT)
+        liability = row['account_type'] in LIABILITY_TYPES
+        if liability:
+            liabilities -= total
+        else:
+            assets += total
+        change += row_change
+        types.append({
+            'account_type': row['account_type'],
+            'label': labels.get(row['account_type'], row['account_type']),
+            'liability': liability,
+            'accounts': row['accounts'],
+            'balance': total,
+            'change': row_change,
+        })
+    return {
+        'as_of': as_of,
+        'types': types,
+        'assets': assets,
+        'liabilities': liabilities,
+        'net_worth': assets - liabilities,
+        'change': change,
+    }
+
+
+def household_net_worth(household_id, today=None):
+    """
+    Net worth of every member of a household together, cached until any member
+    writes (see config.cache.group_cached) or a new month end is reached.
+    """
+    member_ids = list(get_user_model().objects.filter(household_id=household_id).values_list('pk', flat=True))
+    as_of = last_closed_month_end(today)
+    return group_cached(
+        f'networth:{household_id}:{as_of.isoformat()}', member_ids, lambda: net_worth(member_ids, today)
+    )
@@ -0,0 +1,126 @@
+# transactions/projections.py
+import calendar
+from datetime import date
+
+from .models import Transaction
+
+
+def month_index(day):
+    """Months since year 0, so month arithmetic becomes integer arithmetic."""
+    return day.year * 12 + day.month - 1
+
+
+class Occurrence:
+    """
+    A projected (not stored) monthly occurrence of a FIXED parent transaction.
+
+    It only holds the parent and the projected date; every other attribute the
+    dashboard reads is delegated to the parent, so projecting years of
+    occurrences allocates two references per row instead of a model instance.
+    """
+    __slots__ = ('parent', 'date')
+
+    status = Transaction.Status.PENDING
+    completion_date = None
+    is_projection = True
+
+    def __init__(self, parent, date):
+        self.parent = parent
+        self.date = date
+
+    def __repr__(self):
+        return f"<Occurrence {self.parent.pk} on {self.date}>"
+
+    @property
+    def id(self):
+        return self.parent.id
+
+    pk = id
+
+    @property
+    def user_id(self):
+        return self.parent.user_id
+
+    @property
+    def account(self):
+        return self.parent.account
+
+    @property
+    def account_id(self):
+        return self.parent.account_id
+
+    @property
+    def to_account(self):
+        return self.parent.to_account
+
+    @property
+    def category(self):
+        return self.parent.category
+
+    @property
+    def category_id(self):
+        return self.parent.category_id
+
+    @property
+    def description(self):
+        return self.parent.description
+
+    @property
+    def amount(self):
+        return self.parent.amount
+
+    @property
+    def transaction_type(self):
+        return self.parent.transaction_type
+
+    @property
+    def transfer_id(self):
+        return self.parent.transfer_id
+
+    @property
+    def frequency(self):
+        return self.parent.frequency
+
+
+def month_dates(first_month, last_month, day):
+    """
+    The date of day `day` in every month of [first_month, last_month] (month
+    indexes), clamped to the last day of shorter months (31 -> 30, 28 or 29).
+    """
+    dates = []
+    for index in range(first_month, last_month + 1):
+        year, month = divmod(index, 12)
+        month += 1
+        dates.append(date(year, month, min(day, calendar.monthrange(year, month)[1])))
+    return dates
+
+
+def project_fixed(parents, start, end):
+    """
+    Projects every FIXED parent into the half-open date range [start, end),
+    whatever its length. A parent recurs monthly on the day of month of its own
+    date, starting with that date.
+
+    The dates for each day of the month are computed once for the whole range
+    and shared by all parents with that day, so the per-parent work is a slice
+    of a precomputed table. Returns Occurrences ordered by parent, then date.
+    """
+    if start >= end:
+        return []
+    first_month = month_index(start)
+    last_month = month_index(end)
+    tables = {}
+    occurrences = []
+
+    for parent in parents:
+        day = parent.date.day
+        table = tables.get(day)
+        if table is None:
+            table = tables[day] = month_dates(first_month, last_month, day)
+        offset = max(month_index(parent.date) - first_month, 0)
+        for occurrence_date in table[offset:]:
+            if occurrence_date >= end:
+                break
+            if occurrence_date >= start and occurrence_date >= parent.date:
+                occurrences.append(Occurrence(parent, occurrence_date))
+    return occurrences
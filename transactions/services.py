@@ -0,0 +1,105 @@
+# transactions/services.py
+import uuid
+
+from dateutil.relativedelta import relativedelta
+from django.db import transaction as db_transaction
+
+from .effects import TransactionEffects
+from .models import Transaction
+
+
+def build_installments(*, user, account, transaction_type, amount, start_date, description,
+                       installments, initial_status=Transaction.Status.PENDING, category=None):
+    """
+    Builds (without saving) one Transaction per monthly installment of an
+    income or expense. Only the first installment takes `initial_status`.
+    """
+    recurrence_group_id = uuid.uuid4()
+    transactions = []
+    for i in range(installments):
+        current_date = start_date + relativedelta(months=i)
+        current_status = initial_status if i == 0 else Transaction.Status.PENDING
+        transactions.append(Transaction(
+            user=user,
+            account=account,
+            transaction_type=transaction_type,
+            amount=amount,
+            date=current_date,
+            category=category,
+            description=f"{description} ({i+1}/{installments})",
+            status=current_status,
+            recurrence_id=recurrence_group_id,
+            installment_number=i + 1,
+            completion_date=current_date if current_status == Transaction.Status.COMPLETED else None
+        ))
+    return transactions
+
+
+def build_transfer(*, user, account, to_account, amount, start_date,
+                   initial_status=Transaction.Status.PENDING, is_recurring=False,
+                   frequency=Transaction.Frequency.NONE, installments=1):
+    """
+    Builds (without saving) the EXPENSE/INCOME legs of a transfer, in creation
+    order: out-leg then in-leg for each month. Installment transfers get one pair
+    per installment; single and FIXED transfers get a single pair.
+    """
+    total_creations = installments if is_recurring and frequency == Transaction.Frequency.INSTALLMENT else 1
+    transfer_group_id = uuid.uuid4()
+    transactions = []
+
+    for i in range(total_creations):
+        current_date = start_date + relativedelta(months=i)
+        current_status = initial_status if i == 0 else Transaction.Status.PENDING
+        desc_suffix = f"({i+1}/{installments})" if frequency == Transaction.Frequency.INSTALLMENT else ""
+        shared = dict(
+            user=user,
+            amount=amount,
+            date=current_date,
+            status=current_status,
+            completion_date=current_date if current_status == Transaction.Status.COMPLETED else None,
+            transfer_id=transfer_group_id,
+            # Se for FIXO, marque como tal
+            frequency=frequency if is_recurring else Transaction.Frequency.NONE,
+            # Se for FIXO, installments = 0 (infinito)
+            installments=installments if frequency == Transaction.Frequency.INSTALLMENT else 0,
+            installment_number=i + 1,
+            recurrence_id=transfer_group_id if is_recurring else None,
+        )
+        # --- Perna de SAÍDA ---
+        transactions.append(Transaction(
+            transaction_type=Transaction.TransactionType.EXPENSE,
+            account=account,
+            description=f"Transfer to {to_account.name} {desc_suffix}".strip(),
+            **shared
+        ))
+        # --- Perna de ENTRADA ---
+        transactions.append(Transaction(
+            transaction_type=Transaction.TransactionType.INCOME,
+            account=to_account,
+            description=f"Transfer from {account.name} {desc_suffix}".strip(),
+            **shared
+        ))
+    return transactions
+
+
+@db_transaction.atomic
+def create_transactions(transactions, batch_size=None, effects=None):
+    """
+    Inserts unsaved transactions with a single bulk_create and then applies their
+    effect on account balances and monthly summaries in one pass.
+
+    bulk_create does not send pre_save/post_save, so this is the entry point every
+    batched write path (views, admin, Celery tasks, importers) should use instead
+    of calling Transaction.objects.bulk_create directly. Callers inserting in
+    several chunks can pass their own TransactionEffects and apply it once at the
+    end.
+    """
+    for transaction in transactions:
+        transaction.refresh_dedupe_hash()
+    transactions = Transaction.objects.bulk_create(transactions, batch_size=batch_size)
+    pending_effects = effects if effects is not None else TransactionEffects()
+    for transaction in transactions:
+        pending_effects.add(transaction)
+    if effects is None:
+        pending_effects.apply()
+    return transactions
@@ -1,44 +1,112 @@
 # transactions/signals.py
 
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.db import transaction as db_transaction
 from django.dispatch import receiver
-from django.db.models import Sum, F, Case, When, DecimalField
-from decimal import Decimal
-from .models import Transaction
+from accounts.models import Account
+from config.cache import ACCOUNTS, CATEGORIES, DATA, FIXED_PARENTS, invalidate_user_cache
+from .models import Budget, Category, Transaction
+from .balances import calculate_balances
+from .effects import LEDGER_FIELDS, TransactionEffects, ledger_state
+from .summaries import SummaryDeltas
 
 def update_account_balance(account):
+    """
+    Recalculates an account balance from its full history. The signal receivers
+    below apply incremental deltas instead; this remains the from-scratch path.
+
+    The account row is locked before the history is read, so a concurrent write
+    either committed first (and is in the sum) or waits and applies its delta on
+    top of the new balance; neither is lost.
+    """
     if account:
-        # A lógica agora só precisa se preocupar com Receitas e Despesas
-        trans_agg = account.transactions.filter(completion_date__isnull=False).aggregate(
-            balance=Sum(Case(
-                When(transaction_type='INCOME', then=F('amount')),
-                When(transaction_type='EXPENSE', then=-F('amount')),
-                default=Decimal('0.00'),
-                output_field=DecimalField()
-            ))
-        )['balance'] or Decimal('0.00')
-        
-        # O novo saldo é simplesmente o saldo inicial + as transações
-        new_balance = account.initial_balance + trans_agg
-        
-        account.balance = new_balance
-        account.save(update_fields=['balance'])
+        with db_transaction.atomic():
+            locked = Account.objects.select_for_update().get(pk=account.pk)
+            account.balance = calculate_balances([locked])[locked.pk]
+            Account.objects.filter(pk=locked.pk).update(balance=account.balance)
+        invalidate_user_cache([account.user_id], ACCOUNTS, DATA)
+
+@receiver(pre_save, sender=Transaction)
+def remember_previous_state(sender, instance, **kwargs):
+    """
+    Stores the row as it is in the database before the save, so the post_save
+    receiver can reverse its old effect on balances and summaries.
+    """
+    instance.refresh_dedupe_hash()
+    instance._previous_state = None
+    if not instance._state.adding:
+        # Trava a linha (Transaction.save abre a transação): duas edições simultâneas
+        # da mesma transação não desfazem o mesmo estado antigo duas vezes.
+        instance._previous_state = Transaction.objects.select_for_update().filter(pk=instance.pk).values_list(
+            *LEDGER_FIELDS, named=True
+        ).first()
 
 @receiver(post_save, sender=Transaction)
 def update_balance_on_transaction_save(sender, instance, **kwargs):
     """
     Signal receiver to update account balance when a Transaction is saved (created or updated).
-    
-    If a transaction's account is changed during an update, the old account's
-    balance also needs to be recalculated. The simplest robust way is to update both,
-    though this is an optimization for a later stage. For now, updating the
-    current account is sufficient.
+
+    Applies the difference between the old and the new state of the row, so the
+    cost does not grow with the account history. If the transaction moved to
+    another account, the old account loses its effect and the new one gains it.
+    The monthly summaries are adjusted the same way.
+    """
+    effects = TransactionEffects()
+    effects.remove(getattr(instance, '_previous_state', None))
+    effects.add(ledger_state(instance))
+    effects.apply()
+    instance._previous_state = None
+
+@receiver(pre_delete, sender=Transaction)
+def remember_deleted_state(sender, instance, **kwargs):
+    """
+    Locks the row and stores it as it is in the database (the deletion runs in
+    a transaction), so the post_delete receiver reverses what is really there,
+    and nothing if another request deleted it first.
     """
-    update_account_balance(instance.account)
+    instance._deleted_state = Transaction.objects.select_for_update().filter(pk=instance.pk).values_list(
+        *LEDGER_FIELDS, named=True
+    ).first()
 
 @receiver(post_delete, sender=Transaction)
 def update_balance_on_transaction_delete(sender, instance, **kwargs):
     """
     Signal receiver to update account balance when a Transaction is deleted.
     """
-    update_account_balance(instance.account)
\ No newline at end of file
+    effects = TransactionEffects()
+    effects.remove(getattr(instance, '_deleted_state', instance))
+    effects.apply()
+
+@receiver(pre_delete, sender=Category)
+def move_summaries_to_uncategorized(sender, instance, origin=None, **kwargs):
+    """
+    Deleting a category sets its transactions' category to NULL, so its
+    summaries are folded into the uncategorized bucket before they cascade.
+    When the category goes away with its user, the summaries go too.
+    """
+    if not isinstance(origin, Category) and getattr(origin, 'model', None) is not Category:
+        return
+    deltas = SummaryDeltas()
+    for summary in instance.monthly_summaries.all():
+        totals = deltas.by_key[(summary.user_id, summary.account_id, None, summary.year, summary.month)]
+        for field in totals:
+            totals[field] += getattr(summary, field)
+    deltas.apply()
+
+@receiver(post_save, sender=Account)
+@receiver(post_delete, sender=Account)
+def invalidate_cached_accounts(sender, instance, **kwargs):
+    """Cached account lists and FIXED parents (which carry account names) are stale."""
+    invalidate_user_cache([instance.user_id], ACCOUNTS, FIXED_PARENTS, DATA)
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_cached_categories(sender, instance, **kwargs):
+    """Cached category lists and FIXED parents (which carry category names) are stale."""
+    invalidate_user_cache([instance.user_id], CATEGORIES, FIXED_PARENTS, DATA)
+
+@receiver(post_save, sender=Budget)
+@receiver(post_delete, sender=Budget)
+def invalidate_cached_budgets(sender, instance, **kwargs):
+    """The month fragment of the dashboard shows the budgets."""
+    invalidate_user_cache([instance.user_id], DATA)
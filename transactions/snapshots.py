@@ -0,0 +1,221 @@
+# transactions/snapshots.py
+"""
+Month-end balance snapshots (AccountBalanceSnapshot).
+
+The balance of an account at the end of any past day is the latest snapshot
+on or before that day plus the transactions completed after it, so a
+historical balance costs one index lookup and a scan of (usually) one month of
+rows instead of an aggregate over the whole history.
+
+Snapshot dates are always in the past (a month end is written once the month
+is over), so writes completed in the current month never touch a snapshot.
+"""
+from collections import defaultdict
+from datetime import date
+
+from django.db import transaction as db_transaction
+from django.db.models import Case, DecimalField, Exists, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import ExtractMonth, ExtractYear
+from django.utils import timezone
+
+from accounts.models import Account
+from config.cache import DATA, invalidate_user_cache
+from .balances import CENT, ZERO, balance_contribution, balance_expression
+from .dates import month_end
+from .models import AccountBalanceSnapshot, Transaction
+from .projections import month_index
+
+
+def index_month_end(index):
+    """Last day of the month with month index `index` (see projections.month_index)."""
+    year, month = divmod(index, 12)
+    return month_end(date(year, month + 1, 1))
+
+
+def last_closed_month_end(today=None):
+    """The most recent month end before `today`."""
+    today = today or timezone.now().date()
+    return index_month_end(month_index(today) - 1)
+
+
+def balances_on(account_ids, day):
+    """
+    Balance of each account at the end of `day`: its latest snapshot on or
+    before `day` plus what was completed after the snapshot, up to `day`
+    (the initial balance plus everything up to `day` when there is no
+    snapshot). Two queries for any number of accounts. Returns {account_id: balance}.
+    """
+    snapshots = AccountBalanceSnapshot.objects.filter(
+        account=OuterRef('pk'), as_of_date__lte=day
+    ).order_by('-as_of_date')
+    rows = list(Account.objects.filter(pk__in=account_ids).annotate(
+        snapshot_date=Subquery(snapshots.values('as_of_date')[:1]),
+        snapshot_balance=Subquery(snapshots.values('balance')[:1]),
+    ).values_list('pk', 'initial_balance', 'snapshot_date', 'snapshot_balance'))
+    if not rows:
+        return {}
+
+    # Só o trecho depois do snapshot de cada conta (índice account + completion_date).
+    after_snapshot = Q()
+    for account_id, _, snapshot_date, _ in rows:
+        if snapshot_date is None:
+            after_snapshot |= Q(account_id=account_id)
+        else:
+            after_snapshot |= Q(account_id=account_id, completion_date__gt=snapshot_date)
+    totals = dict(
+        Transaction.objects.filter(after_snapshot, completion_date__isnull=False, completion_date__lte=day)
+        .values('account_id').annotate(total=balance_expression()).values_list('account_id', 'total')
+    )
+    return {
+        account_id: ((initial if snapshot_date is None else snapshot) + (totals.get(account_id) or ZERO)).quantize(CENT)
+        for account_id, initial, snapshot_date, snapshot in rows
+    }
+
+
+def snapshot_due_batch(as_of, batch_size, after=None):
+    """
+    Writes the `as_of` snapshot of up to `batch_size` accounts that do not
+    have it yet, walking them in primary-key order from `after`. Each balance
+    starts from the account's previous snapshot. Returns (snapshots written, last pk).
+
+    Like calculate_snapshots, an account only has snapshots from the month it
+    was created or first completed a transaction in, whichever is earlier.
+    """
+    started = Q(created_at__date__lte=as_of) | Exists(Transaction.objects.filter(
+        account=OuterRef('pk'), completion_date__isnull=False, completion_date__lte=as_of
+    ))
+    missing = Account.objects.filter(
+        started, ~Exists(AccountBalanceSnapshot.objects.filter(account=OuterRef('pk'), as_of_date=as_of))
+    ).order_by('pk')
+    if after is not None:
+        missing = missing.filter(pk__gt=after)
+    owners = dict(missing.values_list('pk', 'user_id')[:batch_size])
+    if not owners:
+        return 0, after
+    balances = balances_on(list(owners), as_of)
+    AccountBalanceSnapshot.objects.bulk_create(
+        [AccountBalanceSnapshot(account_id=pk, as_of_date=as_of, balance=balance) for pk, balance in balances.items()],
+        update_conflicts=True,
+        unique_fields=['account', 'as_of_date'],
+        update_fields=['balance'],
+    )
+    # Séries e totais em cache (histórico, patrimônio) ganham um ponto novo.
+    invalidate_user_cache(set(owners.values()), DATA)
+    return len(owners), list(owners)[-1]
+
+
+class SnapshotDeltas:
+    """
+    Collects signed balance changes per account and month of completion. A
+    change completed in a closed month moves every snapshot from that month's
+    end on; the changes of the current month (no snapshot yet) are dropped
+    without a query.
+    """
+
+    def __init__(self):
+        self.by_account = defaultdict(lambda: defaultdict(lambda: ZERO))
+        self.latest = last_closed_month_end()
+
+    def add(self, state, sign=1):
+        amount = balance_contribution(state)
+        if amount and state.completion_date <= self.latest:
+            self.by_account[state.account_id][month_end(state.completion_date)] += sign * amount
+
+    def remove(self, state):
+        self.add(state, sign=-1)
+
+    def apply(self):
+        deltas = {
+            account_id: {day: delta for day, delta in months.items() if delta}
+            for account_id, months in self.by_account.items()
+        }
+        deltas = {account_id: months for account_id, months in deltas.items() if months}
+        self.by_account.clear()
+        if deltas:
+            apply_snapshot_deltas(deltas)
+        return deltas
+
+
+def apply_snapshot_deltas(deltas):
+    """
+    Adds {account_id: {month_end: delta}} to the snapshots on or after each
+    month end, in a single UPDATE: a snapshot gets the sum of the deltas of its
+    account up to its own date.
+    """
+    condition = Q()
+    cases = []
+    for account_id, months in deltas.items():
+        condition |= Q(account_id=account_id, as_of_date__gte=min(months))
+        cumulative, running = [], ZERO
+        for day in sorted(months):
+            running += months[day]
+            cumulative.append((day, running))
+        # Do mais recente para o mais antigo: vale o primeiro When que casar.
+        cases += [
+            When(account_id=account_id, as_of_date__gte=day, then=Value(total))
+            for day, total in reversed(cumulative)
+        ]
+    increment = Case(*cases, default=Value(ZERO), output_field=DecimalField(max_digits=15, decimal_places=2))
+    return AccountBalanceSnapshot.objects.filter(condition).update(balance=F('balance') + increment)
+
+
+def calculate_snapshots(accounts, until):
+    """
+    Month-end balances of `accounts` from scratch, from the month of each
+    account's creation or first completed transaction (whichever is earlier)
+    up to the last month end on or before `until`, with one grouped query.
+    Returns {(account_id, as_of_date): balance}.
+    """
+    accounts = list(accounts)
+    rows = Transaction.objects.filter(
+        account__in=accounts, completion_date__isnull=False, completion_date__lte=until
+    ).annotate(
+        year=ExtractYear('completion_date'), month=ExtractMonth('completion_date')
+    ).order_by().values('account_id', 'year', 'month').annotate(total=balance_expression())
+    monthly = defaultdict(dict)
+    for row in rows:
+        monthly[row['account_id']][row['year'] * 12 + row['month'] - 1] = row['total'] or ZERO
+
+    last = month_index(until) if until == month_end(until) else month_index(until) - 1
+    snapshots = {}
+    for account in accounts:
+        months = monthly.get(account.pk, {})
+        balance = account.initial_balance
+        for index in range(min([month_index(account.created_at.date()), *months]), last + 1):
+            balance += months.get(index, ZERO)
+            snapshots[(account.pk, index_month_end(index))] = balance.quantize(CENT)
+    return snapshots
+
+
+def find_snapshot_mismatches(accounts, until=None):
+    """
+    Returns (key, stored, expected) for every stored snapshot that drifted or
+    should not exist. A missing month is not drift (balances_on starts from the
+    snapshot before it); the rebuild fills it.
+    """
+    accounts = list(accounts)
+    expected = calculate_snapshots(accounts, until or last_closed_month_end())
+    stored = {
+        (account_id, as_of): balance for account_id, as_of, balance in
+        AccountBalanceSnapshot.objects.filter(account__in=accounts).values_list('account_id', 'as_of_date', 'balance')
+    }
+    return [
+        (key, stored[key], expected.get(key))
+        for key in sorted(stored, key=str)
+        if stored[key] != expected.get(key)
+    ]
+
+
+@db_transaction.atomic
+def rebuild_snapshots(accounts, until=None):
+    """Replaces the snapshots of `accounts` with freshly aggregated ones. Returns how many were written."""
+    accounts = list(accounts)
+    expected = calculate_snapshots(accounts, until or last_closed_month_end())
+    AccountBalanceSnapshot.objects.filter(account__in=accounts).delete()
+    AccountBalanceSnapshot.objects.bulk_create(
+        [AccountBalanceSnapshot(account_id=key[0], as_of_date=key[1], balance=balance)
+         for key, balance in expected.items()],
+        batch_size=1000,
+    )
+    invalidate_user_cache({account.user_id for account in accounts}, DATA)
+    return len(expected)
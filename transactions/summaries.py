@@ -0,0 +1,183 @@
+# transactions/summaries.py
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction as db_transaction
+from django.db.models import Q, Sum, Case, When, Value, F, DecimalField
+from django.db.models.functions import ExtractYear, ExtractMonth
+
+from config.cache import DATA, invalidate_user_cache
+from .models import MonthlySummary, Transaction
+
+ZERO = Decimal('0.00')
+KEY_FIELDS = ('user_id', 'account_id', 'category_id', 'year', 'month')
+TOTAL_FIELDS = ('completed_income', 'completed_expense', 'pending_income', 'pending_expense', 'transfer_expense')
+KEY_CHUNK = 100
+
+
+def summary_key(state):
+    return (state.user_id, state.account_id, state.category_id, state.date.year, state.date.month)
+
+
+def summary_field(state):
+    """The MonthlySummary counter a transaction contributes to, or None for TRANSFER rows."""
+    if state.transaction_type == Transaction.TransactionType.INCOME:
+        kind = 'income'
+    elif state.transaction_type == Transaction.TransactionType.EXPENSE:
+        kind = 'expense'
+    else:
+        return None
+    status = 'pending' if state.completion_date is None else 'completed'
+    return f'{status}_{kind}'
+
+
+class SummaryDeltas:
+    """
+    Collects signed changes to MonthlySummary counters, keyed by
+    (user, account, category, year, month), and applies them in a constant
+    number of queries whatever the number of keys.
+    """
+
+    def __init__(self):
+        self.by_key = defaultdict(lambda: dict.fromkeys(TOTAL_FIELDS, ZERO))
+
+    def add(self, state, sign=1):
+        if state is None:
+            return
+        field = summary_field(state)
+        if field and state.amount:
+            totals = self.by_key[summary_key(state)]
+            totals[field] += sign * state.amount
+            if state.transfer_id is not None and field.endswith('_expense'):
+                totals['transfer_expense'] += sign * state.amount
+
+    def remove(self, state):
+        self.add(state, sign=-1)
+
+    def apply(self):
+        deltas = {key: totals for key, totals in self.by_key.items() if any(totals.values())}
+        self.by_key.clear()
+        if deltas:
+            apply_summary_deltas(deltas)
+        return deltas
+
+
+@db_transaction.atomic
+def apply_summary_deltas(deltas):
+    """
+    Locks the existing summary rows for the given keys, adds the deltas and
+    creates the missing rows. A key that does not exist and only has negative
+    deltas is skipped: its rows are being removed together with their account,
+    category or user. A row that a concurrent writer created first is retried
+    as an update.
+    """
+    # Trava só as linhas das chaves pedidas. Um OR por chave num único SELECT
+    # estoura o limite de expressões do banco em lotes grandes, então vai em
+    # grupos de KEY_CHUNK chaves (categoria None casa com IS NULL).
+    keys = sorted(deltas, key=str)
+    existing = {}
+    for start in range(0, len(keys), KEY_CHUNK):
+        condition = Q()
+        for key in keys[start:start + KEY_CHUNK]:
+            condition |= Q(**dict(zip(KEY_FIELDS, key)))
+        for summary in MonthlySummary.objects.select_for_update().filter(condition).order_by('pk'):
+            existing[tuple(getattr(summary, field) for field in KEY_FIELDS)] = summary
+
+    to_update, to_create = [], []
+    for key, totals in deltas.items():
+        summary = existing.get(key)
+        if summary is None:
+            if not any(amount > 0 for amount in totals.values()):
+                continue
+            to_create.append(MonthlySummary(**dict(zip(KEY_FIELDS, key)), **totals))
+            continue
+        for field, amount in totals.items():
+            setattr(summary, field, getattr(summary, field) + amount)
+        to_update.append(summary)
+
+    MonthlySummary.objects.bulk_update(to_update, TOTAL_FIELDS, batch_size=500)
+    if not to_create:
+        return
+    try:
+        with db_transaction.atomic():
+            MonthlySummary.objects.bulk_create(to_create, batch_size=1000)
+    except IntegrityError:
+        # Outra gravação criou uma dessas linhas depois da nossa leitura: agora elas
+        # existem e são travadas e somadas como as demais.
+        created = [tuple(getattr(summary, field) for field in KEY_FIELDS) for summary in to_create]
+        apply_summary_deltas({key: deltas[key] for key in created})
+
+
+def summary_totals(**filters):
+    """Sum of the summary counters matching `filters`, as a dict of Decimals."""
+    totals = MonthlySummary.objects.filter(**filters).aggregate(
+        **{field: Sum(field) for field in TOTAL_FIELDS}
+    )
+    return {field: totals[field] or ZERO for field in TOTAL_FIELDS}
+
+
+def calculate_summaries(transactions):
+    """
+    Aggregates the given Transaction queryset into summary totals from scratch
+    with one grouped query. Returns {key: {field: amount}} for non-empty keys.
+    """
+    decimal = DecimalField(max_digits=15, decimal_places=2)
+
+    def total(transaction_type, completed):
+        return Sum(Case(
+            When(transaction_type=transaction_type, completion_date__isnull=not completed, then=F('amount')),
+            default=Value(ZERO),
+            output_field=decimal
+        ))
+
+    def transfer_expense():
+        return Sum(Case(
+            When(transaction_type=Transaction.TransactionType.EXPENSE, transfer_id__isnull=False, then=F('amount')),
+            default=Value(ZERO),
+            output_field=decimal
+        ))
+
+    rows = transactions.annotate(
+        year=ExtractYear('date'),
+        month=ExtractMonth('date'),
+    ).order_by().values(*KEY_FIELDS).annotate(
+        completed_income=total(Transaction.TransactionType.INCOME, True),
+        completed_expense=total(Transaction.TransactionType.EXPENSE, True),
+        pending_income=total(Transaction.TransactionType.INCOME, False),
+        pending_expense=total(Transaction.TransactionType.EXPENSE, False),
+        transfer_expense=transfer_expense(),
+    )
+    expected = {}
+    for row in rows:
+        totals = {field: row[field] or ZERO for field in TOTAL_FIELDS}
+        if any(totals.values()):
+            expected[tuple(row[field] for field in KEY_FIELDS)] = totals
+    return expected
+
+
+def find_summary_mismatches(user_ids):
+    """Returns (key, stored_totals, expected_totals) for every summary that drifted."""
+    expected = calculate_summaries(Transaction.objects.filter(user_id__in=user_ids))
+    stored = {
+        tuple(row[field] for field in KEY_FIELDS): {field: row[field] for field in TOTAL_FIELDS}
+        for row in MonthlySummary.objects.filter(user_id__in=user_ids).values(*KEY_FIELDS, *TOTAL_FIELDS)
+    }
+    empty = dict.fromkeys(TOTAL_FIELDS, ZERO)
+    return [
+        (key, stored.get(key, empty), expected.get(key, empty))
+        for key in sorted(set(stored) | set(expected), key=str)
+        if stored.get(key, empty) != expected.get(key, empty)
+    ]
+
+
+@db_transaction.atomic
+def rebuild_summaries(user_ids):
+    """Replaces the summaries of the given users with freshly aggregated ones."""
+    expected = calculate_summaries(Transaction.objects.filter(user_id__in=user_ids))
+    MonthlySummary.objects.filter(user_id__in=user_ids).delete()
+    MonthlySummary.objects.bulk_create(
+        [MonthlySummary(**dict(zip(KEY_FIELDS, key)), **totals) for key, totals in expected.items()],
+        batch_size=1000,
+    )
+    invalidate_user_cache(user_ids, DATA)
+    return len(expected)
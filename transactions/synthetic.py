@@ -0,0 +1,188 @@
+# transactions/synthetic.py
+"""
+Synthetic household data for benchmarks and load tests: users with realistic
+accounts, categories, salaries, day-to-day spending, installment purchases,
+FIXED recurrences and transfers. Everything is generated from a seed, so the
+same arguments always produce the same data.
+"""
+import random
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction as db_transaction
+
+from accounts.models import Account
+from .effects import TransactionEffects
+from .models import Category, Transaction
+from .services import build_installments, build_transfer, create_transactions
+
+ACCOUNT_TEMPLATES = (
+    ('Checking', Account.AccountType.CHECKING, 2500),
+    ('Savings', Account.AccountType.SAVINGS, 8000),
+    ('Credit Card', Account.AccountType.CREDIT_CARD, 0),
+    ('Brokerage', Account.AccountType.INVESTMENT, 15000),
+)
+INCOME_CATEGORIES = ('Salary', 'Freelance', 'Interest')
+EXPENSE_CATEGORIES = (
+    'Groceries', 'Restaurants', 'Transport', 'Health', 'Leisure', 'Utilities', 'Education', 'Shopping',
+)
+# (descrição, categoria, valor médio) das recorrências mensais fixas.
+FIXED_EXPENSES = (
+    ('Rent', 'Utilities', 1800), ('Internet', 'Utilities', 120), ('Streaming', 'Leisure', 45),
+    ('Gym', 'Health', 90), ('School', 'Education', 950), ('Phone', 'Utilities', 60),
+)
+SHOPS = ('Mercado', 'Padaria', 'Farmácia', 'Posto', 'Restaurante', 'Loja', 'Uber', 'Cinema', 'Feira', 'Livraria')
+
+
+@dataclass
+class SeedResult:
+    users: int = 0
+    accounts: int = 0
+    categories: int = 0
+    transactions: int = 0
+
+
+def money(rng, mean):
+    """A positive amount around `mean`, skewed like real spending."""
+    return Decimal(str(round(rng.lognormvariate(0, 0.5) * mean, 2))).quantize(Decimal('0.01'))
+
+
+def household_transactions(rng, user, accounts, categories, start, months, today, per_month):
+    """Builds (without saving) `months` months of one household's transactions starting at `start`."""
+    checking, savings, card = accounts[0], accounts[1], accounts[2]
+    income = [c for c in categories if c.transaction_type == Category.TransactionType.INCOME]
+    expense = [c for c in categories if c.transaction_type == Category.TransactionType.EXPENSE]
+    by_name = {c.name: c for c in categories}
+    salary = Decimal(rng.randrange(3000, 15000, 100))
+    rows = []
+
+    def status_for(day):
+        # Passado efetivado (com algumas pendências recentes esquecidas), futuro pendente.
+        forgotten = (today - day).days < 10 and rng.random() < 0.3
+        if day <= today and not forgotten:
+            return Transaction.Status.COMPLETED, day
+        return Transaction.Status.PENDING, None
+
+    for description, category, mean in rng.sample(FIXED_EXPENSES, rng.randint(2, len(FIXED_EXPENSES))):
+        rows.append(Transaction(
+            user=user, account=checking, category=by_name[category], transaction_type='EXPENSE',
+            amount=money(rng, mean), date=start + relativedelta(days=rng.randint(0, 27)),
+            description=description, frequency=Transaction.Frequency.FIXED, installments=0,
+        ))
+
+    for month in range(months):
+        first = start + relativedelta(months=month)
+        status, completion = status_for(first + relativedelta(days=4))
+        rows.append(Transaction(
+            user=user, account=checking, category=by_name['Salary'], transaction_type='INCOME',
+            amount=salary, date=first + relativedelta(days=4), description='Salário',
+            status=status, completion_date=completion,
+        ))
+        if rng.random() < 0.3:
+            day = first + relativedelta(days=rng.randint(0, 27))
+            status, completion = status_for(day)
+            rows.append(Transaction(
+                user=user, account=checking, category=rng.choice(income), transaction_type='INCOME',
+                amount=money(rng, 800), date=day, description='Extra', status=status, completion_date=completion,
+            ))
+
+        for _ in range(per_month):
+            day = first + relativedelta(days=rng.randint(0, 27))
+            status, completion = status_for(day)
+            category = rng.choice(expense)
+            rows.append(Transaction(
+                user=user, account=card if rng.random() < 0.6 else checking, category=category,
+                transaction_type='EXPENSE', amount=money(rng, 60), date=day,
+                description=f"{rng.choice(SHOPS)} {rng.randint(1, 999)}", status=status, completion_date=completion,
+            ))
+
+        if rng.random() < 0.15:
+            purchase = first + relativedelta(days=rng.randint(0, 27))
+            status, _ = status_for(purchase)
+            installments = build_installments(
+                user=user, account=card, transaction_type='EXPENSE', amount=money(rng, 150),
+                start_date=purchase, description=f"{rng.choice(SHOPS)} parcelado",
+                installments=rng.choice((3, 6, 10, 12)), initial_status=status, category=rng.choice(expense),
+            )
+            # As parcelas seguintes que já venceram foram, em geral, pagas.
+            for row in installments[1:]:
+                row.status, row.completion_date = status_for(row.date)
+            rows.extend(installments)
+
+        transfer_day = first + relativedelta(days=rng.randint(5, 10))
+        status, _ = status_for(transfer_day)
+        rows.extend(build_transfer(
+            user=user, account=checking, to_account=savings, amount=money(rng, float(salary) / 10),
+            start_date=transfer_day, initial_status=status,
+        ))
+    return rows
+
+
+def seed_households(users, months=24, per_month=40, seed=0, prefix='synthetic', today=None,
+                    batch_size=5000, users_per_batch=20):
+    """
+    Creates `users` households with `months` months of history each (ending a
+    few months after `today`, so there are future installments and pending rows)
+    and about `per_month` card/checking expenses per month.
+
+    Users, accounts and categories are bulk-created, transactions go through
+    create_transactions in chunks, and balances and monthly summaries are
+    applied once per batch of `users_per_batch` users.
+    """
+    rng = random.Random(seed)
+    today = today or date.today()
+    start = (today - relativedelta(months=max(months - 3, 0))).replace(day=1)
+    User = get_user_model()
+    password = make_password(None)
+    offset = User.objects.filter(username__startswith=prefix).count()
+    result = SeedResult()
+
+    for batch_start in range(0, users, users_per_batch):
+        with db_transaction.atomic():
+            new_users = User.objects.bulk_create([
+                User(username=f'{prefix}{offset + i:06d}', email=f'{prefix}{offset + i:06d}@example.com',
+                     password=password)
+                for i in range(batch_start, min(batch_start + users_per_batch, users))
+            ])
+            if new_users and new_users[0].pk is None:
+                # Bancos sem RETURNING não devolvem o pk no bulk_create; relê pelos usernames.
+                new_users = list(User.objects.filter(username__in=[u.username for u in new_users]).order_by('username'))
+
+            accounts = Account.objects.bulk_create([
+                Account(user=user, name=name, account_type=account_type,
+                        initial_balance=Decimal(initial), balance=Decimal(initial))
+                for user in new_users for name, account_type, initial in ACCOUNT_TEMPLATES
+            ])
+            categories = Category.objects.bulk_create([
+                Category(user=user, name=name, transaction_type=transaction_type)
+                for user in new_users
+                for names, transaction_type in ((INCOME_CATEGORIES, 'INCOME'), (EXPENSE_CATEGORIES, 'EXPENSE'))
+                for name in names
+            ])
+
+            effects = TransactionEffects()
+            chunk = []
+            for index, user in enumerate(new_users):
+                user_accounts = accounts[index * len(ACCOUNT_TEMPLATES):(index + 1) * len(ACCOUNT_TEMPLATES)]
+                per_user = len(INCOME_CATEGORIES) + len(EXPENSE_CATEGORIES)
+                user_categories = categories[index * per_user:(index + 1) * per_user]
+                chunk.extend(household_transactions(
+                    rng, user, user_accounts, user_categories, start, months, today, per_month
+                ))
+                if len(chunk) >= batch_size:
+                    create_transactions(chunk, batch_size=batch_size, effects=effects)
+                    result.transactions += len(chunk)
+                    chunk = []
+            if chunk:
+                create_transactions(chunk, batch_size=batch_size, effects=effects)
+                result.transactions += len(chunk)
+            effects.apply()
+
+        result.users += len(new_users)
+        result.accounts += len(accounts)
+        result.categories += len(categories)
+    return result
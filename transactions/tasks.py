@@ -1,46 +1,126 @@
-# transactions/tasks.py (CORRIGIDO)
+# transactions/tasks.py
+import logging
+import time
+
 from celery import shared_task
+from django.db import transaction as db_transaction
 from django.utils import timezone
+
+from .effects import TransactionEffects, ledger_states
+from .materializer import horizon_end, materialize_due_batch
 from .models import Transaction
-# Importe a função de atualização de saldo
-from .signals import update_account_balance
-from accounts.models import Account
+from .snapshots import last_closed_month_end, snapshot_due_batch
+
+logger = logging.getLogger(__name__)
+
+
+def complete_due_batch(today, batch_size):
+    """
+    Completes up to `batch_size` due pending transactions in one database
+    transaction and returns (rows completed, accounts touched).
+
+    Rows are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so several workers
+    can run at once without waiting on each other or completing a row twice.
+    Balances of all the accounts in the batch move in a single grouped UPDATE,
+    and the monthly summaries shift the amounts from pending to completed.
+    """
+    with db_transaction.atomic():
+        due = Transaction.objects.select_for_update(skip_locked=True).filter(
+            completion_date__isnull=True,
+            date__lte=today
+        ).order_by('date', 'pk')
+        states = list(ledger_states(due)[:batch_size])
+        if not states:
+            return 0, 0
+
+        Transaction.objects.filter(pk__in=[state.pk for state in states]).update(
+            status=Transaction.Status.COMPLETED,
+            completion_date=today
+        )
+
+        effects = TransactionEffects()
+        for state in states:
+            effects.remove(state)
+            effects.add(state._replace(completion_date=today))
+        effects.apply()
+
+    return len(states), len({state.account_id for state in states})
+
 
 @shared_task
-def efetivar_transacoes_pendentes():
+def efetivar_transacoes_pendentes(batch_size=500, max_batches=None):
     """
-    Finds pending transactions that are due, completes them, and then
-    manually triggers the balance update for all affected accounts.
+    Finds pending transactions that are due and completes them in bounded
+    batches, each committed on its own. If the task dies halfway, the next run
+    simply picks up the rows that are still pending.
     """
     today = timezone.now().date()
-    
-    transactions_to_complete = Transaction.objects.filter(
-        completion_date__isnull=True,
-        date__lte=today
-    )
-
-    # --- CORREÇÃO AQUI ---
-    # 1. Antes de atualizar, pegue a lista de IDs de contas que serão afetadas.
-    #    Usamos .distinct() para garantir que não vamos atualizar a mesma conta várias vezes.
-    affected_account_ids = transactions_to_complete.values_list('account_id', flat=True).distinct()
-
-    if not affected_account_ids:
-        return "Nenhuma transação para efetivar."
-
-    # 2. Execute a atualização em massa (eficiente)
-    count = transactions_to_complete.update(
-        status=Transaction.Status.COMPLETED,
-        completion_date=today
-    )
-
-    # 3. Agora, itere sobre os IDs das contas afetadas e chame a função de sinal manualmente.
-    #    Isso garante que a lógica de cálculo de saldo seja executada.
-    for account_id in affected_account_ids:
-        try:
-            account = Account.objects.get(pk=account_id)
-            update_account_balance(account)
-        except Account.DoesNotExist:
-            # Caso a conta tenha sido deletada, apenas continue.
-            continue
-
-    return f"Efetivado {count} transações e atualizado {len(affected_account_ids)} contas."
\ No newline at end of file
+    batches = []
+
+    while max_batches is None or len(batches) < max_batches:
+        started = time.monotonic()
+        rows, accounts = complete_due_batch(today, batch_size)
+        if not rows:
+            break
+        elapsed = time.monotonic() - started
+        batches.append({'rows': rows, 'accounts': accounts, 'seconds': round(elapsed, 4)})
+        logger.info(
+            "Batch %d: efetivadas %d transações em %d contas (%.3fs).",
+            len(batches), rows, accounts, elapsed
+        )
+
+    completed = sum(batch['rows'] for batch in batches)
+    if not completed:
+        logger.info("Nenhuma transação para efetivar.")
+    return {'completed': completed, 'batches': batches}
+
+
+@shared_task
+def materialize_fixed_recurrences(batch_size=500, max_batches=None):
+    """
+    Extends every FIXED recurrence with real child rows up to the horizon
+    (FIXED_HORIZON_MONTHS ahead). Run daily, it only touches the parents whose
+    next occurrence has just entered the horizon, and creates their rows in
+    bulk, in batches committed on their own.
+    """
+    today = timezone.now().date()
+    until = horizon_end(today)
+    batches = []
+    after = None
+
+    while max_batches is None or len(batches) < max_batches:
+        started = time.monotonic()
+        parents, rows, after = materialize_due_batch(until, batch_size, after=after, today=today)
+        if not parents:
+            break
+        elapsed = time.monotonic() - started
+        batches.append({'parents': parents, 'created': rows, 'seconds': round(elapsed, 4)})
+        logger.info(
+            "Batch %d: %d recorrências fixas, %d ocorrências criadas até %s (%.3fs).",
+            len(batches), parents, rows, until, elapsed
+        )
+
+    return {'created': sum(batch['created'] for batch in batches), 'until': until.isoformat(), 'batches': batches}
+
+
+@shared_task
+def snapshot_account_balances(batch_size=500, max_batches=None):
+    """
+    Writes the balance snapshot of the last closed month end for every account
+    that does not have it yet, in batches. Run daily, it does the work on the
+    first day of each month and is a cheap no-op on the others.
+    """
+    as_of = last_closed_month_end()
+    batches = []
+    after = None
+
+    while max_batches is None or len(batches) < max_batches:
+        started = time.monotonic()
+        written, after = snapshot_due_batch(as_of, batch_size, after=after)
+        if not written:
+            break
+        elapsed = time.monotonic() - started
+        batches.append({'snapshots': written, 'seconds': round(elapsed, 4)})
+        logger.info("Batch %d: %d snapshots de saldo em %s (%.3fs).", len(batches), written, as_of, elapsed)
+
+    return {'written': sum(batch['snapshots'] for batch in batches), 'as_of': as_of.isoformat(), 'batches': batches}
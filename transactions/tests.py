@@ -1,3 +1,1820 @@
-from django.test import TestCase
+import csv
+import importlib.util
+import json
+import os
+import random
+import tempfile
+import threading
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from types import SimpleNamespace
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from dateutil.relativedelta import relativedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from accounts.models import Account
+from config.cache import cache_stats, user_accounts, user_data_version
+from config.middleware import RequestMetrics, registry
+from config.testing import QueryBudgetMixin
+from users.models import Household
+from .analytics import category_spend, category_trends
+from .balances import balance_contribution, calculate_balances
+from .budgets import budget_for, find_budget_mismatches, set_budget
+from .dashboard import MergedTransactionList
+from .effects import TransactionEffects
+from .dates import month_bounds
+from .exporters import export_queryset, iter_rows, to_parquet
+from .forecast import forecast_balances
+from .importers import StatementError, import_statement, parse_amount, parse_ofx
+from .materializer import materialize_due_batch, materialize_parents, resync_children
+from .models import AccountBalanceSnapshot, Budget, Category, MonthlySummary, Transaction, dedupe_hash
+from .networth import household_net_worth, net_worth
+from .projections import Occurrence, month_index, project_fixed
+from .services import build_installments, build_transfer, create_transactions
+from .snapshots import balances_on, find_snapshot_mismatches, last_closed_month_end, rebuild_snapshots
+from .summaries import KEY_CHUNK, TOTAL_FIELDS, apply_summary_deltas, find_summary_mismatches, summary_totals
+from .tasks import (
+    complete_due_batch, efetivar_transacoes_pendentes, materialize_fixed_recurrences, snapshot_account_balances,
+)
+from .signals import update_account_balance
+from .views import TransactionListView
+
+
+class LedgerTestMixin:
+    """Shared fixtures: one user with two accounts."""
+
+    def setUp(self):
+        # O cache por usuário sobrevive entre testes, e os ids de usuário se repetem.
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username='ledger', email='ledger@example.com', password='secret'
+        )
+        self.checking = Account.objects.create(
+            user=self.user, name='Checking', initial_balance=Decimal('100.00'), balance=Decimal('100.00')
+        )
+        self.savings = Account.objects.create(
+            user=self.user, name='Savings', initial_balance=Decimal('50.00'), balance=Decimal('50.00')
+        )
+
+    def make_transaction(self, **kwargs):
+        values = {
+            'user': self.user,
+            'account': self.checking,
+            'transaction_type': Transaction.TransactionType.EXPENSE,
+            'amount': Decimal('10.00'),
+            'date': date(2025, 1, 15),
+        }
+        values.update(kwargs)
+        return Transaction.objects.create(**values)
+
+    def assertBalancesMatchAggregate(self):
+        accounts = list(Account.objects.filter(user=self.user))
+        expected = calculate_balances(accounts)
+        for account in accounts:
+            self.assertEqual(account.balance, expected[account.pk], account.name)
+
+
+class IncrementalBalanceTests(LedgerTestMixin, TestCase):
+
+    def test_pending_transaction_does_not_change_balance(self):
+        self.make_transaction(amount=Decimal('30.00'))
+        self.checking.refresh_from_db()
+        self.assertEqual(self.checking.balance, Decimal('100.00'))
+
+    def test_completed_income_and_expense(self):
+        self.make_transaction(transaction_type='INCOME', amount=Decimal('40.00'), completion_date=date(2025, 1, 15))
+        self.make_transaction(amount=Decimal('15.50'), completion_date=date(2025, 1, 16))
+        self.checking.refresh_from_db()
+        self.assertEqual(self.checking.balance, Decimal('124.50'))
+
+    def test_completing_and_editing_a_transaction(self):
+        transaction = self.make_transaction(amount=Decimal('20.00'))
+        transaction.completion_date = date(2025, 1, 20)
+        transaction.save()
+        self.checking.refresh_from_db()
+        self.assertEqual(self.checking.balance, Decimal('80.00'))
+
+        transaction.amount = Decimal('25.00')
+        transaction.transaction_type = Transaction.TransactionType.INCOME
+        transaction.save()
+        self.checking.refresh_from_db()
+        self.assertEqual(self.checking.balance, Decimal('125.00'))
+        self.assertBalancesMatchAggregate()
+
+    def test_moving_transaction_between_accounts(self):
+        transaction = self.make_transaction(amount=Decimal('30.00'), completion_date=date(2025, 1, 15))
+        transaction.account = self.savings
+        transaction.save()
+        self.checking.refresh_from_db()
+        self.savings.refresh_from_db()
+        self.assertEqual(self.checking.balance, Decimal('100.00'))
+        self.assertEqual(self.savings.balance, Decimal('20.00'))
+        self.assertBalancesMatchAggregate()
+
+    def test_field_values_given_as_strings(self):
+        self.assertEqual(balance_contribution(SimpleNamespace(
+            transaction_type='EXPENSE', amount='12.50', completion_date=date(2025, 1, 5)
+        )), Decimal('-12.50'))
+        Transaction.objects.create(
+            user=self.user, account=self.checking, transaction_type='EXPENSE', amount='12.50',
+            date='2025-01-05', completion_date='2025-01-05',
+        )
+        self.checking.refresh_from_db()
+        self.assertEqual(self.checking.balance, Decimal('87.50'))
+        self.assertBalancesMatchAggregate()
+        self.assertEqual(find_summary_mismatches([self.user.pk]), [])
+
+    def test_delete_reverses_effect(self):
+        transaction = self.make_transaction(amount=Decimal('30.00'), completion_date=date(2025, 1, 15))
+        transaction.delete()
+        self.checking.refresh_from_db()
+        self.assertEqual(self.checking.balance, Decimal('100.00'))
+
+    def test_random_write_sequence_matches_full_aggregate(self):
+        rng = random.Random(42)
+        accounts = [self.checking, self.savings]
+        transactions = []
+        for _ in range(200):
+            action = rng.choice(['create', 'create', 'edit', 'delete'])
+            if action == 'create' or not transactions:
+                transactions.append(self.make_transaction(
+                    account=rng.choice(accounts),
+                    transaction_type=rng.choice(['INCOME', 'EXPENSE', 'TRANSFER']),
+                    amount=Decimal(rng.randint(1, 50000)) / 100,
+                    completion_date=rng.choice([None, date(2025, 1, 1) + timedelta(days=rng.randint(0, 60))]),
+                ))
+            elif action == 'edit':
+                transaction = rng.choice(transactions)
+                transaction.account = rng.choice(accounts)
+                transaction.transaction_type = rng.choice(['INCOME', 'EXPENSE'])
+                transaction.amount = Decimal(rng.randint(1, 50000)) / 100
+                transaction.completion_date = rng.choice([None, date(2025, 2, 1)])
+                transaction.save()
+            else:
+                transactions.pop(rng.randrange(len(transactions))).delete()
+        self.assertBalancesMatchAggregate()
+
+
+class StaleWriteTests(LedgerTestMixin, TestCase):
+    """Writes made from instances loaded before another write moved the balance."""
+
+    def test_recalculation_reads_the_locked_row(self):
+        stale = Account.objects.get(pk=self.checking.pk)
+        self.make_transaction(amount=Decimal('30.00'), completion_date=date(2025, 1, 15))
+        Account.objects.filter(pk=self.checking.pk).update(name='Main', balance=Decimal('0.00'))
+        update_account_balance(stale)
+        self.checking.refresh_from_db()
+        self.assertEqual((self.checking.name, self.checking.balance), ('Main', Decimal('70.00')))
+        self.assertEqual(user_accounts(self.user.pk)[0].balance, Decimal('70.00'))
+
+    def test_deleting_twice_reverses_once(self):
+        transaction = self.make_transaction(amount=Decimal('30.00'), completion_date=date(2025, 1, 15))
+        stale = Transaction.objects.get(pk=transaction.pk)
+        transaction.delete()
+        stale.delete()
+        self.assertBalancesMatchAggregate()
+        self.checking.refresh_from_db()
+        self.assertEqual(self.checking.balance, Decimal('100.00'))
+
+    def test_delete_reverses_the_stored_row(self):
+        transaction = self.make_transaction(amount=Decimal('30.00'), completion_date=date(2025, 1, 15))
+        stale = Transaction.objects.get(pk=transaction.pk)
+        fresh = Transaction.objects.get(pk=transaction.pk)
+        fresh.amount = Decimal('45.00')
+        fresh.save()
+        stale.delete()  # ainda com 30.00 em memória
+        self.assertBalancesMatchAggregate()
+
+    def test_account_edit_keeps_a_concurrent_balance(self):
+        from accounts.views import AccountUpdateView
+
+        stale = Account.objects.get(pk=self.checking.pk)
+        self.make_transaction(amount=Decimal('30.00'), completion_date=date(2025, 1, 15))
+        self.client.force_login(self.user)
+        with mock.patch.object(AccountUpdateView, 'get_object', return_value=stale):
+            self.client.post(f'/accounts/{self.checking.pk}/edit/', {'name': 'Main', 'account_type': 'CHECKING'})
+        self.checking.refresh_from_db()
+        self.assertEqual((self.checking.name, self.checking.balance), ('Main', Decimal('70.00')))
+
+
+@skipUnless(connection.vendor == 'postgresql', "Needs row-level locking (PostgreSQL).")
+class ConcurrentBalanceTests(LedgerTestMixin, TransactionTestCase):
+    """
+    Stress test: writer threads create, edit, complete and delete transactions
+    of one account while another thread keeps recalculating its balance from
+    scratch. Needs a local PostgreSQL, e.g. `docker compose up -d db` and
+    `python manage.py test transactions.tests.ConcurrentBalanceTests`.
+    """
+    writers = 8
+    rounds = 25
+
+    def writer(self):
+        # Cada rodada muda o saldo em exatamente -2.00.
+        for _ in range(self.rounds):
+            self.make_transaction(transaction_type='INCOME', amount=Decimal('3.00'), completion_date=date(2025, 1, 15))
+            pending = self.make_transaction(amount=Decimal('1.00'))
+            pending.completion_date = date(2025, 1, 16)
+            pending.status = Transaction.Status.COMPLETED
+            pending.save()
+            self.make_transaction(amount=Decimal('2.00'), completion_date=date(2025, 1, 15)).delete()
+            edited = self.make_transaction(amount=Decimal('5.00'), completion_date=date(2025, 1, 15))
+            edited.amount = Decimal('4.00')
+            edited.save()
+
+    def recalculator(self, done):
+        while not done.is_set():
+            update_account_balance(Account.objects.get(pk=self.checking.pk))
+
+    def run_thread(self, target, errors, *args):
+        try:
+            target(*args)
+        except Exception as error:  # noqa: BLE001 - conferido no teste
+            errors.append(error)
+        finally:
+            connection.close()
+
+    def test_hammering_one_account_loses_nothing(self):
+        errors, done = [], threading.Event()
+        recalculator = threading.Thread(target=self.run_thread, args=(self.recalculator, errors, done))
+        writers = [threading.Thread(target=self.run_thread, args=(self.writer, errors)) for _ in range(self.writers)]
+        recalculator.start()
+        for thread in writers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        done.set()
+        recalculator.join()
+
+        self.assertEqual(errors, [])
+        self.checking.refresh_from_db()
+        self.assertEqual(self.checking.balance, Decimal('100.00') - Decimal('2.00') * self.writers * self.rounds)
+        self.assertBalancesMatchAggregate()
+
+
+class RebuildBalancesCommandTests(LedgerTestMixin, TestCase):
+
+    def test_check_reports_and_rebuild_fixes_drift(self):
+        self.make_transaction(amount=Decimal('30.00'), completion_date=date(2025, 1, 15))
+        Account.objects.filter(pk=self.checking.pk).update(balance=Decimal('999.00'))
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_balances', '--check', stdout=StringIO())
+
+        out = StringIO()
+        call_command('rebuild_balances', stdout=out)
+        self.assertIn('fixed 1 drifted', out.getvalue())
+        self.checking.refresh_from_db()
+        self.assertEqual(self.checking.balance, Decimal('70.00'))
+        call_command('rebuild_balances', '--check', stdout=StringIO())
+
+
+class BulkCreationServiceTests(LedgerTestMixin, TestCase):
+    COMPARED_FIELDS = (
+        'account_id', 'transaction_type', 'amount', 'date', 'category_id', 'description', 'status',
+        'completion_date', 'frequency', 'installments', 'installment_number',
+    )
+
+    def legacy_installments(self, installments, initial_status):
+        """The one-create-per-installment loop previously inlined in TransactionCreateView."""
+        for i in range(installments):
+            current_date = date(2025, 1, 31) + relativedelta(months=i)
+            current_status = initial_status if i == 0 else Transaction.Status.PENDING
+            Transaction.objects.create(
+                user=self.user, account=self.checking, transaction_type='EXPENSE', amount=Decimal('12.34'),
+                date=current_date, description=f"Sofa ({i+1}/{installments})", status=current_status,
+                recurrence_id=uuid.uuid4(), installment_number=i + 1,
+                completion_date=current_date if current_status == Transaction.Status.COMPLETED else None
+            )
+
+    def rows(self):
+        return list(Transaction.objects.order_by('date', 'account_id', 'description').values_list(*self.COMPARED_FIELDS))
+
+    def balances(self):
+        return list(Account.objects.order_by('name').values_list('name', 'balance'))
+
+    def test_installments_match_legacy_loop(self):
+        self.legacy_installments(12, Transaction.Status.COMPLETED)
+        legacy_rows, legacy_balances = self.rows(), self.balances()
+        Transaction.objects.all().delete()
+
+        created = create_transactions(build_installments(
+            user=self.user, account=self.checking, transaction_type='EXPENSE', amount=Decimal('12.34'),
+            start_date=date(2025, 1, 31), description='Sofa', installments=12,
+            initial_status=Transaction.Status.COMPLETED,
+        ))
+        self.assertEqual(len(created), 12)
+        self.assertEqual(len({t.recurrence_id for t in created}), 1)
+        self.assertEqual(self.rows(), legacy_rows)
+        self.assertEqual(self.balances(), legacy_balances)
+
+    def test_installment_transfer_legs(self):
+        created = create_transactions(build_transfer(
+            user=self.user, account=self.checking, to_account=self.savings, amount=Decimal('25.00'),
+            start_date=date(2025, 3, 10), initial_status=Transaction.Status.COMPLETED,
+            is_recurring=True, frequency=Transaction.Frequency.INSTALLMENT, installments=3,
+        ))
+        self.assertEqual(
+            [(t.account_id, t.transaction_type, t.description) for t in created[:2]],
+            [(self.checking.pk, 'EXPENSE', 'Transfer to Savings (1/3)'),
+             (self.savings.pk, 'INCOME', 'Transfer from Checking (1/3)')],
+        )
+        self.assertEqual(len({t.transfer_id for t in created}), 1)
+        self.checking.refresh_from_db()
+        self.savings.refresh_from_db()
+        self.assertEqual(self.checking.balance, Decimal('75.00'))
+        self.assertEqual(self.savings.balance, Decimal('75.00'))
+        self.assertBalancesMatchAggregate()
+
+    def count_queries(self, installments, start_date):
+        legs = build_transfer(
+            user=self.user, account=self.checking, to_account=self.savings, amount=Decimal('5.00'),
+            start_date=start_date, initial_status=Transaction.Status.COMPLETED,
+            is_recurring=True, frequency=Transaction.Frequency.INSTALLMENT, installments=installments,
+        )
+        with CaptureQueriesContext(connection) as queries:
+            create_transactions(legs)
+        return len(queries)
+
+    def test_query_count_is_constant(self):
+        # Ambos no passado: uma parcela efetivada em mês fechado também move os snapshots de saldo.
+        self.assertEqual(self.count_queries(2, date(2025, 1, 1)), self.count_queries(24, date(2022, 1, 1)))
+
+    def test_create_view_uses_bulk_path(self):
+        self.client.force_login(self.user)
+        response = self.client.post('/transactions/new/', {
+            'transaction_type': 'EXPENSE', 'account': self.checking.pk, 'amount': '10.00',
+            'date': '2025-01-31', 'description': 'Laptop', 'status': 'COMPLETED',
+            'is_recurring': 'on', 'frequency': 'INSTALLMENT', 'installments': 6,
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            list(Transaction.objects.order_by('date').values_list('date', flat=True))[:3],
+            [date(2025, 1, 31), date(2025, 2, 28), date(2025, 3, 31)],
+        )
+        self.checking.refresh_from_db()
+        self.assertEqual(self.checking.balance, Decimal('90.00'))
+
+
+class DashboardIndexTests(LedgerTestMixin, TestCase):
+    """EXPLAIN-based checks that the dashboard access paths hit the composite indexes."""
+
+    def explain(self, queryset):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # Tabelas de teste são minúsculas; força o planner a considerar os índices.
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def dashboard_view(self, year, month):
+        view = TransactionListView()
+        view.request = RequestFactory().get('/transactions/')
+        view.request.user = self.user
+        view.year, view.month = year, month
+        return view
+
+    def test_month_filter_is_a_half_open_range(self):
+        self.make_transaction(date=date(2025, 1, 31))
+        self.make_transaction(date=date(2025, 2, 1))
+        sql = str(self.dashboard_view(2025, 1).get_month_transactions().query)
+        self.assertNotIn('EXTRACT', sql.upper())
+        self.assertNotIn('STRFTIME', sql.upper())
+        self.assertEqual(
+            list(self.dashboard_view(2025, 1).get_month_transactions().values_list('date', flat=True)),
+            [date(2025, 1, 31)],
+        )
+        self.assertEqual(month_bounds(2024, 12), (date(2024, 12, 1), date(2025, 1, 1)))
+
+    def test_month_query_uses_user_date_index(self):
+        plan = self.explain(self.dashboard_view(2025, 1).get_month_transactions())
+        self.assertIn('transaction_user_date_idx', plan)
+
+    def test_fixed_parents_query_uses_partial_index(self):
+        plan = self.explain(self.dashboard_view(2025, 1).get_fixed_parents())
+        self.assertTrue(
+            'transaction_fixed_parent_idx' in plan or 'transaction_user_freq_idx' in plan, plan
+        )
+
+    def test_due_pending_query_uses_partial_index(self):
+        plan = self.explain(Transaction.objects.filter(completion_date__isnull=True, date__lte=date(2025, 1, 1)))
+        self.assertIn('transaction_pending_date_idx', plan)
+
+
+class DashboardQueryCountTests(LedgerTestMixin, TestCase):
+
+    def populate(self, rows):
+        groceries = Category.objects.get_or_create(user=self.user, name='Groceries')[0]
+        salary = Category.objects.get_or_create(user=self.user, name='Salary', transaction_type='INCOME')[0]
+        for i in range(rows):
+            self.make_transaction(
+                account=self.checking if i % 2 else self.savings,
+                category=groceries if i % 3 else salary,
+                date=date(2025, 1, 1 + i % 28),
+            )
+            self.make_transaction(
+                frequency=Transaction.Frequency.FIXED, category=salary, date=date(2024, 6, 1 + i % 28),
+                to_account=self.savings,
+            )
+
+    def assertDashboardQueries(self, rows):
+        self.populate(rows)
+        self.client.force_login(self.user)
+        # Sessão + usuário + "mães" fixas + histograma diário + linhas reais da página + totais
+        # e orçamentos do mês.
+        with self.assertNumQueries(7):
+            response = self.client.get('/transactions/', {'year': 2025, 'month': 1})
+        self.assertEqual(len(response.context['transactions']), min(rows * 2, 100))
+
+    def test_small_page(self):
+        self.assertDashboardQueries(5)
+
+    def test_full_page(self):
+        self.assertDashboardQueries(50)
+
+    def test_related_objects_are_shared(self):
+        self.populate(10)
+        self.client.force_login(self.user)
+        transactions = self.client.get('/transactions/', {'year': 2025, 'month': 1}).context['transactions']
+        self.assertEqual(len({id(t.category) for t in transactions}), 2)
+        self.assertEqual(len({id(t.account) for t in transactions}), 2)
+
+
+class ReferenceDataCacheTests(LedgerTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def get_dashboard(self):
+        return self.client.get('/transactions/', {'year': 2025, 'month': 1})
+
+    def test_warm_dashboard_skips_fixed_parents_query(self):
+        self.make_transaction(frequency=Transaction.Frequency.FIXED, date=date(2024, 6, 10))
+        self.make_transaction(date=date(2025, 2, 20))
+        self.get_dashboard()
+        # Outro mês (fragmento frio): sessão + usuário + histograma + linhas da página + totais
+        # + orçamentos.
+        with self.assertNumQueries(6):
+            response = self.client.get('/transactions/', {'year': 2025, 'month': 2})
+        self.assertEqual(len(response.context['transactions']), 2)
+
+    def test_warm_form_renders_without_reference_queries(self):
+        Category.objects.create(user=self.user, name='Food')
+        self.client.get('/transactions/new/')
+        with self.assertNumQueries(2):  # sessão + usuário
+            response = self.client.get('/transactions/new/')
+        self.assertContains(response, 'Food')
+        self.assertContains(response, 'Savings')
+
+    def test_writes_invalidate(self):
+        self.client.get('/transactions/new/')
+        Category.objects.create(user=self.user, name='Travel')
+        self.assertContains(self.client.get('/transactions/new/'), 'Travel')
+
+        self.assertEqual(len(self.get_dashboard().context['transactions']), 0)
+        self.make_transaction(frequency=Transaction.Frequency.FIXED, date=date(2024, 6, 10))
+        self.assertEqual(len(self.get_dashboard().context['transactions']), 1)
+
+        balances = lambda: {account.name: account.balance for account in user_accounts(self.user.pk)}
+        self.assertEqual(balances()['Checking'], Decimal('100.00'))
+        create_transactions([Transaction(user=self.user, account=self.checking, transaction_type='INCOME',
+                                         amount=Decimal('5.00'), date=date(2025, 1, 2),
+                                         completion_date=date(2025, 1, 2))])
+        self.assertEqual(balances()['Checking'], Decimal('105.00'))
+        self.make_transaction(date=date(2025, 1, 3))
+        efetivar_transacoes_pendentes()  # efetiva a de 3/jan e a "mãe" fixa vencida
+        self.assertEqual(balances()['Checking'], Decimal('85.00'))
+
+    def test_users_do_not_share_entries(self):
+        other = get_user_model().objects.create_user(username='other', password='secret')
+        Account.objects.create(user=other, name='Wallet')
+        self.assertEqual({a.name for a in user_accounts(self.user.pk)}, {'Checking', 'Savings'})
+        self.assertEqual({a.name for a in user_accounts(other.pk)}, {'Wallet'})
+
+    def test_hit_and_miss_counters(self):
+        before = cache_stats()['accounts']
+        user_accounts(self.user.pk)
+        user_accounts(self.user.pk)
+        after = cache_stats()['accounts']
+        self.assertEqual((after['hits'] - before['hits'], after['misses'] - before['misses']), (1, 1))
+        self.assertEqual(self.client.get('/admin/cache-stats/').status_code, 302)
+        self.user.is_staff = True
+        self.user.save()
+        self.assertIn('accounts', self.client.get('/admin/cache-stats/').json())
+
+
+class MonthFragmentCacheTests(LedgerTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+        self.make_transaction(description='Padaria', date=date(2025, 1, 10))
+
+    def get_month(self, month=1, **params):
+        return self.client.get('/transactions/', {'year': 2025, 'month': month, **params})
+
+    def test_unchanged_month_is_served_from_cache(self):
+        cold = self.get_month()
+        with self.assertNumQueries(2):  # sessão + usuário
+            warm = self.get_month()
+        self.assertIn('month_fragment', warm.context)
+        self.assertEqual(cold.content, warm.content)
+
+    def test_every_write_path_moves_the_data_version(self):
+        writes = [
+            lambda: self.make_transaction(description='Farmácia', date=date(2025, 1, 11)),
+            lambda: Category.objects.create(user=self.user, name='Food'),
+            lambda: Account.objects.filter(pk=self.savings.pk).get().save(),
+            lambda: create_transactions([Transaction(user=self.user, account=self.checking, transaction_type='INCOME',
+                                                     amount=Decimal('7.00'), date=date(2025, 1, 12))]),
+            lambda: efetivar_transacoes_pendentes(),
+            lambda: Transaction.objects.get(description='Farmácia').delete(),
+        ]
+        for write in writes:
+            self.get_month()
+            version = user_data_version(self.user.pk)
+            write()
+            self.assertGreater(user_data_version(self.user.pk), version)
+            self.assertNotIn('month_fragment', self.get_month().context)
+        self.assertNotContains(self.get_month(), 'Farmácia')
+
+    def test_key_varies_by_month_page_and_user(self):
+        self.get_month()
+        self.assertNotIn('month_fragment', self.get_month(month=2).context)
+        self.assertNotIn('month_fragment', self.get_month(page='last').context)
+        other = get_user_model().objects.create_user(username='other', password='secret')
+        self.client.force_login(other)
+        self.assertNotContains(self.get_month(), 'Padaria')
+
+
+class AsyncApiTests(QueryBudgetMixin, LedgerTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        registry.clear()
+        self.client.force_login(self.user)
+        self.food = Category.objects.create(user=self.user, name='Food')
+        for day in (3, 9, 21):
+            self.make_transaction(category=self.food, date=date(2025, 1, day), description=f'Mercado {day}')
+        self.make_transaction(transaction_type='INCOME', amount=Decimal('70.00'), date=date(2025, 1, 5),
+                              completion_date=date(2025, 1, 5))
+        self.make_transaction(frequency=Transaction.Frequency.FIXED, date=date(2024, 6, 12), description='Internet')
+
+    def test_month_lists_rows_and_projections_in_date_order(self):
+        data = self.client.get('/transactions/api/month/', {'year': 2025, 'month': 1}).json()
+        self.assertEqual(
+            [(row['date'], row['description'], row['is_projection']) for row in data['transactions']],
+            [('2025-01-03', 'Mercado 3', False), ('2025-01-05', '', False), ('2025-01-09', 'Mercado 9', False),
+             ('2025-01-12', 'Internet', True), ('2025-01-21', 'Mercado 21', False)],
+        )
+        self.assertEqual(data['transactions'][0]['account'], 'Checking')
+        self.assertEqual(data['transactions'][0]['category'], 'Food')
+        self.assertEqual(data['totals']['expense'], '30.00')
+        self.assertEqual(data['totals']['net'], '40.00')
+
+    def test_projections_of_several_parents_merge_in_date_order(self):
+        for day in (25, 4):
+            self.make_transaction(frequency=Transaction.Frequency.FIXED, date=date(2024, 6, day), description=f'Fixa {day}')
+        data = self.client.get('/transactions/api/month/', {'year': 2025, 'month': 1}).json()
+        dates = [row['date'] for row in data['transactions']]
+        self.assertEqual(dates, sorted(dates))
+        self.assertEqual(len(dates), 7)
+
+    def test_summary_and_balances(self):
+        data = self.client.get('/transactions/api/summary/', {'year': 2025, 'month': 1}).json()
+        self.assertEqual({row['name']: row['expense'] for row in data['categories']}, {'Food': '30.00', None: '0.00'})
+        self.assertEqual(data['accounts'][0]['income'], '70.00')
+        data = self.client.get('/accounts/api/balances/').json()
+        self.assertEqual([row['name'] for row in data['accounts']], ['Checking', 'Savings'])
+        self.assertEqual(data['total'], '220.00')
+
+    def test_endpoints_stay_within_their_budgets(self):
+        self.assertWithinQueryBudget('/transactions/api/month/', {'year': 2025, 'month': 1})
+        self.assertWithinQueryBudget('/transactions/api/summary/', {'year': 2025, 'month': 1})
+        self.assertWithinQueryBudget('/accounts/api/balances/')
+
+    def test_errors(self):
+        self.assertEqual(self.client.get('/transactions/api/month/', {'month': 13}).status_code, 400)
+        self.client.logout()
+        self.assertEqual(self.client.get('/transactions/api/month/').status_code, 401)
+        self.assertEqual(self.client.get('/accounts/api/balances/').status_code, 401)
+
+    async def test_async_stack_records_the_queries(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get('/transactions/api/month/', {'year': 2025, 'month': 1})
+        self.assertEqual(len(response.json()['transactions']), 5)
+        self.assertIn('Server-Timing', response.headers)
+        self.assertGreaterEqual(response.asgi_request.metrics.query_count, 5)
+
+
+class ReadOnlyApiTests(QueryBudgetMixin, LedgerTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+        self.food = Category.objects.create(user=self.user, name='Food')
+        create_transactions([
+            Transaction(user=self.user, account=self.checking, category=self.food, transaction_type='EXPENSE',
+                        amount=Decimal('10.00'), date=date(2025, 1, 1 + i % 3), description=f'Row {i}')
+            for i in range(10)
+        ])
+        # Empates em (date, created_at): só o id desempata.
+        Transaction.objects.filter(user=self.user).update(created_at=timezone.now())
+        self.url = '/transactions/api/transactions/'
+
+    def test_default_and_selected_fields(self):
+        row = self.client.get(self.url).json()['results'][0]
+        self.assertEqual(
+            list(row), ['id', 'date', 'status', 'transaction_type', 'amount', 'account_id', 'category_id', 'description']
+        )
+        data = self.client.get(self.url, {'fields': 'date,account,category,amount'}).json()
+        self.assertEqual(data['results'][0], {'date': '2025-01-03', 'account': 'Checking', 'category': 'Food',
+                                              'amount': '10.00'})
+        self.assertIsNone(data['next'])
+
+    def test_cursor_walks_every_row_once_in_order(self):
+        expected = [str(pk) for pk in Transaction.objects.filter(user=self.user)
+                    .order_by('-date', '-created_at', '-pk').values_list('pk', flat=True)]
+        seen, params = [], {'limit': 3, 'fields': 'id'}
+        while True:
+            data = self.client.get(self.url, params).json()
+            seen += [row['id'] for row in data['results']]
+            if not data['next']:
+                break
+            params['cursor'] = data['next']
+        self.assertEqual(seen, expected)
+
+    def test_deep_page_is_a_keyset_range_not_an_offset(self):
+        cursor = self.client.get(self.url, {'limit': 8}).json()['next']
+        with CaptureQueriesContext(connection) as queries:
+            data = self.assertWithinQueryBudget(self.url, {'limit': 8, 'cursor': cursor}).json()
+        self.assertEqual(len(data['results']), 2)
+        self.assertFalse(any('OFFSET' in query['sql'].upper() for query in queries))
+
+    def test_filters(self):
+        self.make_transaction(account=self.savings, transaction_type='INCOME', date=date(2025, 2, 1))
+        data = self.client.get(self.url, {'account': self.savings.pk, 'fields': 'date'}).json()
+        self.assertEqual(data['results'], [{'date': '2025-02-01'}])
+        data = self.client.get(self.url, {'start': '2025-01-02', 'end': '2025-01-02', 'fields': 'date'}).json()
+        self.assertEqual(len(data['results']), 3)
+        data = self.client.get(self.url, {'transaction_type': 'INCOME', 'status': 'PENDING'}).json()
+        self.assertEqual(len(data['results']), 1)
+
+    def test_unchanged_list_revalidates_with_304(self):
+        response = self.client.get(self.url)
+        etag = response.headers['ETag']
+        self.assertIn('Last-Modified', response.headers)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.make_transaction()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_categories_and_accounts(self):
+        self.assertEqual(self.client.get('/transactions/api/categories/').json()['results'][0]['name'], 'Food')
+        data = self.client.get('/accounts/api/', {'fields': 'name,balance'}).json()
+        self.assertEqual(data['results'], [{'name': 'Checking', 'balance': '100.00'},
+                                           {'name': 'Savings', 'balance': '50.00'}])
+        self.assertWithinQueryBudget('/transactions/api/categories/')
+        self.assertWithinQueryBudget('/accounts/api/')
+
+    def test_errors(self):
+        for params in ({'fields': 'id,password'}, {'limit': 0}, {'limit': 'x'}, {'cursor': 'garbage'},
+                       {'start': '2025-13-01'}, {'status': 'LOST'}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn('error', response.json())
+        other = get_user_model().objects.create_user(username='other', email='other@example.com')
+        self.assertEqual(self.client.get(self.url, {'account': Account.objects.create(user=other, name='X').pk})
+                         .json()['results'], [])
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+
+class RequestMetricsTests(QueryBudgetMixin, LedgerTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        registry.clear()
+        self.client.force_login(self.user)
+        food = Category.objects.create(user=self.user, name='Food')
+        for day in range(1, 21):
+            self.make_transaction(category=food, date=date(2025, 1, day))
+        self.make_transaction(frequency=Transaction.Frequency.FIXED, date=date(2024, 6, 10))
+
+    def test_read_views_stay_within_their_budgets(self):
+        self.assertWithinQueryBudget('/transactions/', {'year': 2025, 'month': 1})
+        self.assertWithinQueryBudget('/transactions/forecast/')
+        self.assertWithinQueryBudget('/transactions/categories/')
+        self.assertWithinQueryBudget('/accounts/')
+
+    def test_budget_failure_lists_the_queries(self):
+        with self.assertRaisesMessage(AssertionError, 'budget is 1'):
+            self.assertWithinQueryBudget('/transactions/', {'year': 2025, 'month': 1}, budget=1)
+
+    def test_duplicate_queries_are_counted(self):
+        metrics = RequestMetrics()
+        execute = lambda sql, params, many, context: None
+        for pk in (1, 2, 3):
+            metrics(execute, 'SELECT * FROM account WHERE id = %s', [pk], False, {})
+        metrics(execute, 'SELECT 1', [], False, {})
+        self.assertEqual((metrics.query_count, metrics.duplicate_queries), (4, 2))
+
+    def test_server_timing_header(self):
+        response = self.client.get('/transactions/', {'year': 2025, 'month': 1})
+        timing = response['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn('desc="7 queries, 0 duplicates"', timing)
+        self.assertGreater(response.wsgi_request.metrics.template_seconds, 0)
+
+    def test_streaming_body_is_measured_when_it_ends(self):
+        response = self.client.get('/transactions/export/')
+        self.assertNotIn('transactions:transaction_export', registry.snapshot())
+        before_body = response.wsgi_request.metrics.query_count
+        self.assertIn(f'desc="{before_body} queries', response['Server-Timing'])
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 22)
+        report = registry.snapshot()['transactions:transaction_export']
+        self.assertEqual(report['requests'], 1)
+        self.assertEqual(report['queries']['max'], before_body + 1)  # a leitura das linhas exportadas
+
+    def test_over_budget_is_logged_and_reported_to_staff(self):
+        with mock.patch.object(TransactionListView, 'query_budget', 2), \
+                self.assertLogs('config.middleware', 'WARNING') as logs:
+            self.client.get('/transactions/', {'year': 2025, 'month': 1})
+        self.assertIn('budget 2', logs.output[0])
+        self.client.get('/transactions/', {'year': 2025, 'month': 1})
+
+        self.assertEqual(self.client.get('/admin/metrics/').status_code, 302)
+        self.user.is_staff = True
+        self.user.save()
+        report = self.client.get('/admin/metrics/').json()['views']['transactions:transaction_list']
+        self.assertEqual((report['requests'], report['over_query_budget']), (2, 1))
+        self.assertEqual(sum(report['histogram'].values()), 2)
+        self.assertEqual(report['queries']['max'], 7)
+
+
+class MergedTransactionListTests(LedgerTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        rng = random.Random(7)
+        for _ in range(40):
+            self.make_transaction(date=date(2025, 1, rng.randint(1, 31)), description=str(rng.random()))
+        self.make_transaction(date=date(2025, 2, 1))
+        self.projections = [
+            Occurrence(
+                Transaction(id=uuid.uuid4(), date=date(2024, 1, 1), amount=Decimal('1.00'),
+                            account=self.checking, transaction_type='INCOME'),
+                date(2025, 1, rng.randint(1, 31)),
+            )
+            for _ in range(15)
+        ]
+
+    def month_queryset(self):
+        return Transaction.objects.filter(user=self.user, date__gte=date(2025, 1, 1), date__lt=date(2025, 2, 1))
+
+    def legacy_order(self):
+        """The previous dashboard ordering: materialise everything and sort by date in Python."""
+        return [t.pk for t in sorted(list(self.month_queryset()) + self.projections, key=lambda x: x.date)]
+
+    def test_every_slice_matches_legacy_order(self):
+        expected = self.legacy_order()
+        merged = MergedTransactionList(self.month_queryset(), self.projections)
+        self.assertEqual(merged.count(), 55)
+        self.assertEqual([t.pk for t in merged[0:55]], expected)
+        for start in range(0, 55, 7):
+            for size in (1, 4, 10):
+                self.assertEqual([t.pk for t in merged[start:start + size]], expected[start:start + size])
+        self.assertEqual(merged[-1].pk, expected[-1])
+
+    def test_rows_with_the_same_timestamp_page_deterministically(self):
+        Transaction.objects.filter(user=self.user).update(date=date(2025, 1, 15), created_at=timezone.now())
+        merged = MergedTransactionList(self.month_queryset(), [])
+        pages = [t.pk for start in range(0, 40, 6) for t in merged[start:start + 6]]
+        self.assertEqual(pages, list(self.month_queryset().order_by('-pk').values_list('pk', flat=True)))
+
+    def test_page_fetches_only_its_rows(self):
+        merged = MergedTransactionList(self.month_queryset(), self.projections)
+        merged.count()
+        with CaptureQueriesContext(connection) as queries:
+            rows = merged[10:20]
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(len(queries), 1)
+        self.assertIn('LIMIT', queries[0]['sql'].upper())
+
+    def test_dashboard_pages_match_legacy_order(self):
+        self.client.force_login(self.user)
+        expected = self.legacy_order()
+        with mock.patch.object(TransactionListView, 'paginate_by', 20):
+            pages = [
+                self.client.get('/transactions/', {'year': 2025, 'month': 1, 'page': page}).context['transactions']
+                for page in (1, 2)
+            ]
+        # Os 15 "projetados" do teste não existem no dashboard; compara apenas as linhas reais.
+        real = [pk for pk in expected if not any(pk == p.pk for p in self.projections)]
+        self.assertEqual([t.pk for page in pages for t in page], real)
+
+
+class BalanceSnapshotTests(QueryBudgetMixin, LedgerTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        for day, amount, kind in ((date(2025, 1, 10), '10.00', 'EXPENSE'), (date(2025, 2, 15), '20.00', 'EXPENSE'),
+                                  (date(2025, 3, 5), '100.00', 'INCOME'), (date(2025, 3, 20), '30.00', 'EXPENSE')):
+            self.make_transaction(date=day, completion_date=day, amount=Decimal(amount), transaction_type=kind)
+        self.february = Transaction.objects.get(date=date(2025, 2, 15))
+        self.make_transaction(date=date(2025, 2, 1))  # pendente: não conta
+        self.until = date(2025, 4, 30)
+        rebuild_snapshots([self.checking, self.savings], until=self.until)
+
+    def stored(self, account=None):
+        return list(AccountBalanceSnapshot.objects.filter(account=account or self.checking)
+                    .order_by('as_of_date').values_list('as_of_date', 'balance'))
+
+    def assertSnapshotsConsistent(self):
+        self.assertEqual(find_snapshot_mismatches([self.checking, self.savings], until=self.until), [])
+
+    def test_rebuild_writes_month_end_balances(self):
+        self.assertEqual(self.stored(), [
+            (date(2025, 1, 31), Decimal('90.00')), (date(2025, 2, 28), Decimal('70.00')),
+            (date(2025, 3, 31), Decimal('140.00')), (date(2025, 4, 30), Decimal('140.00')),
+        ])
+        self.assertEqual(self.stored(self.savings), [])
+
+    def test_balance_on_a_day_is_snapshot_plus_delta(self):
+        with self.assertNumQueries(2):
+            balances = balances_on([self.checking.pk, self.savings.pk], date(2025, 3, 10))
+        self.assertEqual(balances, {self.checking.pk: Decimal('170.00'), self.savings.pk: Decimal('50.00')})
+        for day in (date(2024, 12, 31), date(2025, 1, 10), date(2025, 2, 28), date(2025, 3, 19), date(2025, 9, 1)):
+            expected = Decimal('100.00') + sum(
+                (t.amount if t.transaction_type == 'INCOME' else -t.amount)
+                for t in Transaction.objects.filter(account=self.checking, completion_date__lte=day)
+            )
+            self.assertEqual(balances_on([self.checking.pk], day)[self.checking.pk], expected, day)
+
+    def test_back_dated_edits_move_later_snapshots(self):
+        self.february.amount = Decimal('25.00')
+        self.february.save()
+        self.assertEqual([balance for _, balance in self.stored()],
+                         [Decimal('90.00'), Decimal('65.00'), Decimal('135.00'), Decimal('135.00')])
+        self.assertSnapshotsConsistent()
+
+        self.february.completion_date = date(2025, 4, 2)
+        self.february.save()
+        self.assertSnapshotsConsistent()
+        self.february.account = self.savings
+        self.february.save()
+        self.assertSnapshotsConsistent()
+        self.february.delete()
+        self.assertSnapshotsConsistent()
+        complete_due_batch(date(2025, 2, 1), batch_size=10)
+        self.assertEqual(self.stored()[0][1], Decimal('90.00'))
+
+    def test_current_month_writes_touch_no_snapshot(self):
+        today = timezone.now().date()
+        with CaptureQueriesContext(connection) as queries:
+            self.make_transaction(date=today, completion_date=today)
+        self.assertFalse(any('accountbalancesnapshot' in query['sql'] for query in queries))
+
+    def test_daily_task_writes_the_last_month_end_once(self):
+        Account.objects.filter(pk=self.savings.pk).update(created_at=timezone.now() - timedelta(days=400))
+        result = snapshot_account_balances(batch_size=1)
+        self.assertEqual((result['written'], len(result['batches'])), (2, 2))
+        as_of = last_closed_month_end()
+        self.assertEqual(
+            dict(AccountBalanceSnapshot.objects.filter(as_of_date=as_of).values_list('account_id', 'balance')),
+            {self.checking.pk: Decimal('140.00'), self.savings.pk: Decimal('50.00')},
+        )
+        self.assertEqual(snapshot_account_balances()['written'], 0)
+
+    def test_daily_task_skips_accounts_created_after_the_month_end(self):
+        # Poupança: criada agora e sem transações. Conta corrente: criada agora, mas com histórico em 2025.
+        snapshot_account_balances()
+        as_of = last_closed_month_end()
+        self.assertEqual(
+            list(AccountBalanceSnapshot.objects.filter(as_of_date=as_of).values_list('account_id', flat=True)),
+            [self.checking.pk],
+        )
+        self.assertEqual(find_snapshot_mismatches([self.checking, self.savings], until=as_of), [])
+
+    def test_rebuild_command_checks_drift(self):
+        call_command('rebuild_balance_snapshots', stdout=StringIO())
+        call_command('rebuild_balance_snapshots', '--check', stdout=StringIO())
+        AccountBalanceSnapshot.objects.filter(as_of_date=date(2025, 2, 28)).update(balance=Decimal('1.00'))
+        with self.assertRaises(CommandError):
+            call_command('rebuild_balance_snapshots', '--check', stdout=StringIO())
+
+    def test_history_endpoint(self):
+        self.client.force_login(self.user)
+        url = '/transactions/api/balance-history/'
+        response = self.assertWithinQueryBudget(url, {'start': '2025-01-01', 'end': '2025-03-31'})
+        data = response.json()
+        self.assertEqual([(point['date'], point['total']) for point in data['series']],
+                         [('2025-01-31', '90.00'), ('2025-02-28', '70.00'), ('2025-03-31', '140.00')])
+        self.assertEqual(data['series'][0]['balances'], {str(self.checking.pk): '90.00'})
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response.headers['ETag']).status_code, 304)
+        self.assertEqual(self.client.get(url, {'account': self.savings.pk}).json()['series'], [])
+        self.assertEqual(len(self.client.get(url, {'end': '2025-12-31'}).json()['series']), 4)
+        for params in ({'start': '2025-02-01', 'end': '2025-01-01'}, {'start': '1990-01-01', 'end': '2025-01-01'},
+                       {'account': 'x'}):
+            self.assertEqual(self.client.get(url, params).status_code, 400, params)
+
+
+class NetWorthTests(QueryBudgetMixin, LedgerTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.card = Account.objects.create(
+            user=self.user, name='Card', account_type=Account.AccountType.CREDIT_CARD,
+            initial_balance=Decimal('-300.00'), balance=Decimal('-300.00'),
+        )
+        Account.objects.update(created_at=timezone.now() - timedelta(days=400))
+        rebuild_snapshots(Account.objects.all())
+        self.today = timezone.now().date()
+
+    def test_totals_by_type_assets_and_liabilities(self):
+        self.make_transaction(date=self.today, completion_date=self.today, amount=Decimal('10.00'))
+        self.make_transaction(account=self.card, date=self.today, completion_date=self.today, amount=Decimal('5.00'))
+        result = net_worth([self.user.pk])
+        self.assertEqual(
+            [(row['account_type'], row['accounts'], row['balance'], row['change']) for row in result['types']],
+            [('CHECKING', 2, Decimal('140.00'), Decimal('-10.00')), ('CREDIT_CARD', 1, Decimal('-305.00'), Decimal('-5.00'))],
+        )
+        self.assertTrue(result['types'][1]['liability'])
+        self.assertEqual((result['assets'], result['liabilities']), (Decimal('140.00'), Decimal('305.00')))
+        self.assertEqual((result['net_worth'], result['change']), (Decimal('-165.00'), Decimal('-15.00')))
+
+    def test_one_query_whatever_the_number_of_accounts(self):
+        with self.assertNumQueries(1):
+            net_worth([self.user.pk])
+        Account.objects.bulk_create([
+            Account(user=self.user, name=f'Wallet {i}', account_type=Account.AccountType.OTHER, balance=Decimal('1.00'))
+            for i in range(50)
+        ])
+        with self.assertNumQueries(1):
+            result = net_worth([self.user.pk])
+        self.assertEqual(result['assets'], Decimal('200.00'))
+        self.assertEqual(result['change'], Decimal('50.00'))  # contas abertas neste mês partem de zero
+
+    def test_household_rollup_is_cached_until_a_member_writes(self):
+        household = Household.objects.create(name='Casa')
+        partner = get_user_model().objects.create_user(username='partner', email='partner@example.com')
+        Account.objects.create(user=partner, name='Wallet', initial_balance=Decimal('25.00'), balance=Decimal('25.00'))
+        get_user_model().objects.filter(pk__in=[self.user.pk, partner.pk]).update(household=household)
+
+        self.assertEqual(household_net_worth(household.pk)['net_worth'], Decimal('-125.00'))
+        with self.assertNumQueries(1):  # só os membros
+            household_net_worth(household.pk)
+        self.make_transaction(date=self.today, completion_date=self.today, amount=Decimal('10.00'))
+        self.assertEqual(household_net_worth(household.pk)['net_worth'], Decimal('-135.00'))
+
+        self.client.force_login(self.user)
+        data = self.assertWithinQueryBudget('/transactions/api/net-worth/', {'scope': 'household'}).json()
+        self.assertEqual((data['scope'], data['net_worth']), ('household', '-135.00'))
+        data = self.assertWithinQueryBudget('/transactions/api/net-worth/').json()
+        self.assertEqual(data['net_worth'], '-160.00')
+
+    def test_api_errors(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get('/transactions/api/net-worth/', {'scope': 'household'}).status_code, 400)
+        self.assertEqual(self.client.get('/transactions/api/net-worth/', {'scope': 'world'}).status_code, 400)
+        self.client.logout()
+        self.assertEqual(self.client.get('/transactions/api/net-worth/').status_code, 401)
+
+
+class CategoryAnalyticsTests(QueryBudgetMixin, LedgerTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.food = Category.objects.create(user=self.user, name='Food')
+        self.rent = Category.objects.create(user=self.user, name='Rent')
+        # Food: jan 30, fev 60 (em duas contas), abr 90; Rent: 500 por mês de jan a abr.
+        for day, account, amount in (
+            (date(2025, 1, 10), self.checking, '30.00'),
+            (date(2025, 2, 10), self.checking, '20.00'),
+            (date(2025, 2, 20), self.savings, '40.00'),
+            (date(2025, 4, 10), self.checking, '90.00'),
+        ):
+            self.make_transaction(category=self.food, account=account, date=day, amount=Decimal(amount))
+        for month in range(1, 5):
+            self.make_transaction(category=self.rent, date=date(2025, month, 5), amount=Decimal('500.00'))
+        self.make_transaction(
+            category=self.food, transaction_type=Transaction.TransactionType.INCOME, amount=Decimal('999.00')
+        )
+
+    def test_spend_by_category_with_partial_months(self):
+        rows = category_spend(self.user.pk, date(2025, 1, 1), date(2025, 4, 30))
+        self.assertEqual(
+            [(row['category'], row['spend']) for row in rows], [('Rent', Decimal('2000.00')), ('Food', Decimal('180.00'))]
+        )
+        self.assertAlmostEqual(rows[0]['share'] + rows[1]['share'], 1.0, places=3)
+        # 15/01 a 15/02: dias avulsos das pontas, sem mês inteiro no meio.
+        rows = category_spend(self.user.pk, date(2025, 1, 15), date(2025, 2, 15), limit=1)
+        self.assertEqual([(row['category'], row['spend']) for row in rows], [('Rent', Decimal('500.00'))])
+        rows = category_spend(self.user.pk, date(2025, 1, 8), date(2025, 4, 9))
+        self.assertEqual(
+            [(row['category'], row['spend']) for row in rows], [('Rent', Decimal('1500.00')), ('Food', Decimal('90.00'))]
+        )
+
+    def test_trends_count_months_without_spending_as_zero(self):
+        with self.assertNumQueries(1):
+            trends = category_trends(self.user.pk, month_index(date(2025, 2, 1)), month_index(date(2025, 4, 1)))
+        food = trends[self.food.pk]
+        self.assertEqual([row['month'] for row in food], [date(2025, 2, 1), date(2025, 4, 1)])
+        self.assertEqual(
+            [(row['spend'], row['previous'], row['delta']) for row in food],
+            [(Decimal('60.00'), Decimal('30.00'), Decimal('30.00')), (Decimal('90.00'), Decimal('0.00'), Decimal('90.00'))],
+        )
+        self.assertEqual(
+            (food[1]['avg_3'], food[1]['avg_6'], food[1]['avg_12']), (Decimal('50.00'), Decimal('30.00'), Decimal('15.00'))
+        )
+        self.assertEqual([row['avg_3'] for row in trends[self.rent.pk]], [Decimal('333.33'), Decimal('500.00'), Decimal('500.00')])
+
+    def test_transfers_are_not_spend(self):
+        create_transactions(build_transfer(
+            user=self.user, account=self.checking, to_account=self.savings, amount=Decimal('500.00'),
+            start_date=date(2025, 2, 15),
+        ))
+        self.assertEqual(find_summary_mismatches([self.user.pk]), [])
+        for start, end in ((date(2025, 1, 1), date(2025, 4, 30)), (date(2025, 2, 10), date(2025, 2, 20))):
+            rows = category_spend(self.user.pk, start, end)
+            self.assertNotIn(None, [row['category_id'] for row in rows], (start, end))
+            self.assertAlmostEqual(sum(row['share'] for row in rows), 1.0, places=3)
+        self.assertEqual(
+            [(row['category'], row['spend']) for row in category_spend(self.user.pk, date(2025, 1, 1), date(2025, 4, 30))],
+            [('Rent', Decimal('2000.00')), ('Food', Decimal('180.00'))],
+        )
+        first, last = month_index(date(2025, 1, 1)), month_index(date(2025, 4, 1))
+        self.assertNotIn(None, category_trends(self.user.pk, first, last))
+
+    def test_trends_of_uncategorized_spend(self):
+        self.make_transaction(date=date(2025, 3, 10), amount=Decimal('12.00'))
+        first, last = month_index(date(2025, 1, 1)), month_index(date(2025, 4, 1))
+        trends = category_trends(self.user.pk, first, last, category_ids=[None, self.food.pk])
+        self.assertEqual(set(trends), {None, self.food.pk})
+        self.assertEqual([(row['month'], row['spend']) for row in trends[None]], [(date(2025, 3, 1), Decimal('12.00'))])
+        self.assertEqual(list(category_trends(self.user.pk, first, last, category_ids=[None])), [None])
+
+    def test_api_returns_top_categories_with_trends(self):
+        self.client.force_login(self.user)
+        data = self.assertWithinQueryBudget(
+            '/transactions/api/analytics/', {'start': '2025-01-01', 'end': '2025-04-30', 'top': 1}
+        ).json()
+        self.assertEqual([row['category'] for row in data['categories']], ['Rent'])
+        self.assertEqual(len(data['categories'][0]['trend']), 4)
+        self.assertEqual(self.client.get('/transactions/api/analytics/', {'start': '2025-05-01', 'end': '2025-04-30'}).status_code, 400)
+        self.assertEqual(self.client.get('/transactions/api/analytics/', {'top': 0}).status_code, 400)
+
+        response = self.assertWithinQueryBudget('/transactions/analytics/', {'start': '2025-01-01', 'end': '2025-04-30'})
+        self.assertContains(response, 'Rent')
+        self.assertContains(response, '333.33')
+
+
+class BudgetTests(QueryBudgetMixin, LedgerTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.food = Category.objects.create(user=self.user, name='Food')
+        self.make_transaction(category=self.food, amount=Decimal('30.00'))
+        self.budget = set_budget(self.user, self.food, 2025, 1, Decimal('100.00'))
+
+    def spent(self):
+        self.budget.refresh_from_db()
+        return self.budget.spent
+
+    def test_new_budget_starts_from_what_was_spent(self):
+        self.assertEqual(self.budget.spent, Decimal('30.00'))
+        self.assertEqual(set_budget(self.user, self.food, 2025, 1, Decimal('80.00')).remaining, Decimal('50.00'))
+        self.assertEqual(Budget.objects.count(), 1)
+
+    def test_counter_follows_every_write(self):
+        lunch = self.make_transaction(category=self.food, amount=Decimal('50.00'))
+        self.assertEqual(self.spent(), Decimal('80.00'))
+        lunch.amount = Decimal('90.00')
+        lunch.save()
+        self.assertEqual(self.spent(), Decimal('120.00'))
+        self.assertTrue(self.budget.over_budget)
+        lunch.date = date(2025, 2, 15)
+        lunch.save()
+        self.assertEqual(self.spent(), Decimal('30.00'))
+        lunch.date = date(2025, 1, 20)
+        lunch.save()
+        efetivar_transacoes_pendentes()  # efetivar não muda o gasto do mês
+        self.assertEqual(self.spent(), Decimal('120.00'))
+        lunch.delete()
+        self.make_transaction(category=self.food, transaction_type=Transaction.TransactionType.INCOME)
+        self.make_transaction(amount=Decimal('5.00'))  # sem categoria
+        self.assertEqual(self.spent(), Decimal('30.00'))
+        self.assertEqual(find_budget_mismatches([self.user.pk]), [])
+
+    def test_large_batch_updates_budgets_in_chunks(self):
+        categories = Category.objects.bulk_create(
+            [Category(user=self.user, name=f'C{i}') for i in range(KEY_CHUNK + 20)]
+        )
+        Budget.objects.bulk_create(
+            [Budget(user=self.user, category=category, year=2025, month=2, limit=Decimal('10.00')) for category in categories]
+        )
+        rows = [
+            Transaction(user=self.user, account=self.checking, category=category, transaction_type='EXPENSE',
+                        amount=Decimal('2.00'), date=date(2025, month, 10))
+            for category in categories for month in (2, 3)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            create_transactions(rows)
+        updates = [query for query in queries if query['sql'].startswith('UPDATE') and 'budget' in query['sql']]
+        self.assertEqual(len(updates), 2)
+        self.assertEqual(set(Budget.objects.filter(month=2).values_list('spent', flat=True)), {Decimal('2.00')})
+        self.assertEqual(find_budget_mismatches([self.user.pk]), [])
+
+        # Sem orçamento nos meses tocados: só a leitura, nenhum UPDATE.
+        with CaptureQueriesContext(connection) as queries:
+            create_transactions([Transaction(user=self.user, account=self.checking, category=self.food,
+                                             transaction_type='EXPENSE', amount=Decimal('1.00'), date=date(2025, 5, 1))])
+        self.assertFalse([query for query in queries if query['sql'].startswith('UPDATE') and 'budget' in query['sql']])
+
+    def test_check_is_one_query(self):
+        lunch = self.make_transaction(category=self.food, amount=Decimal('80.00'))
+        with self.assertNumQueries(1):
+            budget = budget_for(lunch)
+        self.assertEqual((budget.category.name, budget.remaining, budget.over_budget), ('Food', Decimal('-10.00'), True))
+
+    def test_views(self):
+        self.client.force_login(self.user)
+        response = self.client.post('/transactions/new/', {
+            'transaction_type': 'EXPENSE', 'account': self.checking.pk, 'category': self.food.pk,
+            'amount': '80.00', 'date': '2025-01-20', 'description': 'Party', 'status': 'PENDING',
+            'frequency': 'NONE', 'installments': 1,
+        }, follow=True)
+        self.assertContains(response, 'Food is over its 01/2025 budget by $10.00.')
+        response = self.client.get('/transactions/', {'year': 2025, 'month': 1})
+        self.assertEqual(response.context['budgets'][0].spent, Decimal('110.00'))
+
+        response = self.client.post('/transactions/budgets/new/', {
+            'category': self.food.pk, 'year': 2025, 'month': 1, 'limit': '150.00',
+        })
+        self.assertRedirects(response, '/transactions/budgets/?year=2025&month=1')
+        response = self.assertWithinQueryBudget('/transactions/budgets/', {'year': 2025, 'month': 1})
+        self.assertContains(response, '$40.00 left')
+        self.client.post(f'/transactions/budgets/{self.budget.pk}/edit/', {'limit': '200.00'})
+        self.assertEqual((self.spent(), self.budget.limit), (Decimal('110.00'), Decimal('200.00')))
+        self.client.post(f'/transactions/budgets/{self.budget.pk}/delete/')
+        self.assertFalse(Budget.objects.exists())
+
+    def test_interleaved_writers_both_count(self):
+        # Dois "processos" montam seus efeitos a partir do mesmo estado e gravam em
+        # seguida: o incremento é feito pelo banco (F), nenhum sobrescreve o outro.
+        first, second = TransactionEffects(), TransactionEffects()
+        first.add(Transaction(user=self.user, account=self.checking, category=self.food,
+                              transaction_type='EXPENSE', amount=Decimal('5.00'), date=date(2025, 1, 3)))
+        second.add(Transaction(user=self.user, account=self.savings, category=self.food,
+                               transaction_type='EXPENSE', amount=Decimal('7.00'), date=date(2025, 1, 4)))
+        stale = Budget.objects.get()
+        first.apply()
+        second.apply()
+        stale.limit = Decimal('120.00')
+        stale.save(update_fields=['limit'])
+        self.assertEqual(self.spent(), Decimal('42.00'))
+
+    def test_rebuild_command(self):
+        Budget.objects.update(spent=Decimal('0.00'))
+        with self.assertRaises(CommandError):
+            call_command('rebuild_budgets', '--check', stdout=StringIO())
+        call_command('rebuild_budgets', stdout=StringIO())
+        call_command('rebuild_budgets', '--check', stdout=StringIO())
+        self.assertEqual(self.spent(), Decimal('30.00'))
+
+
+@skipUnless(connection.vendor == 'postgresql', "Needs concurrent writers (PostgreSQL).")
+class ConcurrentBudgetTests(LedgerTestMixin, TransactionTestCase):
+
+    def test_parallel_writes_do_not_lose_updates(self):
+        food = Category.objects.create(user=self.user, name='Food')
+        budget = set_budget(self.user, food, 2025, 1, Decimal('100.00'))
+        errors = []
+
+        def worker(account):
+            try:
+                for i in range(25):
+                    self.make_transaction(account=account, category=food, amount=Decimal('1.00'), date=date(2025, 1, 1 + i))
+            except Exception as error:  # noqa: BLE001 - reportado no teste principal
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(account,)) for account in [self.checking, self.savings] * 2]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        budget.refresh_from_db()
+        self.assertEqual(budget.spent, Decimal('100.00'))
+        self.assertEqual(find_budget_mismatches([self.user.pk]), [])
+
+
+class MonthlySummaryTests(LedgerTestMixin, TestCase):
+
+    def assertSummariesConsistent(self):
+        self.assertEqual(find_summary_mismatches([self.user.pk]), [])
+
+    def test_incremental_totals(self):
+        food = Category.objects.create(user=self.user, name='Food')
+        transaction = self.make_transaction(category=food, amount=Decimal('20.00'))
+        self.make_transaction(transaction_type='INCOME', amount=Decimal('500.00'), completion_date=date(2025, 1, 5))
+        summary = MonthlySummary.objects.get(user=self.user, category=food, year=2025, month=1)
+        self.assertEqual((summary.pending_expense, summary.completed_expense), (Decimal('20.00'), Decimal('0.00')))
+
+        transaction.completion_date = date(2025, 1, 20)
+        transaction.date = date(2025, 2, 3)
+        transaction.save()
+        self.assertEqual(summary_totals(user=self.user, year=2025, month=1)['completed_income'], Decimal('500.00'))
+        self.assertEqual(summary_totals(user=self.user, year=2025, month=2)['completed_expense'], Decimal('20.00'))
+        self.assertEqual(summary_totals(user=self.user, year=2025, month=1)['pending_expense'], Decimal('0.00'))
+        self.assertSummariesConsistent()
+
+    def test_every_write_path_keeps_summaries_consistent(self):
+        rng = random.Random(3)
+        categories = [None] + [Category.objects.create(user=self.user, name=f'C{i}') for i in range(3)]
+        transactions = []
+        for _ in range(80):
+            if rng.random() < 0.6 or not transactions:
+                transactions.append(self.make_transaction(
+                    account=rng.choice([self.checking, self.savings]),
+                    category=rng.choice(categories),
+                    transaction_type=rng.choice(['INCOME', 'EXPENSE']),
+                    amount=Decimal(rng.randint(1, 9999)) / 100,
+                    date=date(2025, rng.randint(1, 12), rng.randint(1, 28)),
+                    completion_date=rng.choice([None, date(2025, 6, 1)]),
+                ))
+            elif rng.random() < 0.5:
+                transaction = rng.choice(transactions)
+                transaction.category = rng.choice(categories)
+                transaction.date = date(2025, rng.randint(1, 12), 10)
+                transaction.amount += 1
+                transaction.save()
+            else:
+                transactions.pop(rng.randrange(len(transactions))).delete()
+        create_transactions(build_installments(
+            user=self.user, account=self.checking, transaction_type='EXPENSE', amount=Decimal('9.99'),
+            start_date=date(2025, 1, 10), description='Phone', installments=10, category=categories[1],
+        ))
+        efetivar_transacoes_pendentes()
+        categories[2].delete()
+        self.assertSummariesConsistent()
+        self.assertBalancesMatchAggregate()
+
+    def test_deltas_read_exact_keys_in_chunks(self):
+        food = Category.objects.create(user=self.user, name='Food')
+        for account in (self.checking, self.savings):
+            for category in (food, None):
+                self.make_transaction(account=account, category=category, amount=Decimal('1.00'))
+        expense = lambda amount: dict(dict.fromkeys(TOTAL_FIELDS, Decimal('0.00')), pending_expense=Decimal(amount))
+        deltas = {(self.user.pk, self.checking.pk, food.pk, 2025, 1): expense('2.00'),
+                  (self.user.pk, self.savings.pk, None, 2025, 1): expense('3.00')}
+        deltas.update({(self.user.pk, self.checking.pk, None, 2025, month): expense('1.00')
+                       for month in range(2, 2 + KEY_CHUNK)})
+        with CaptureQueriesContext(connection) as queries:
+            apply_summary_deltas(deltas)
+        reads = [query['sql'] for query in queries if query['sql'].startswith('SELECT') and 'monthlysummary' in query['sql']]
+        self.assertEqual(len(reads), 2)
+        # As leituras (que travam as linhas) casam só as chaves pedidas, não as outras
+        # combinações dos mesmos valores, como (savings, food, jan).
+        with connection.cursor() as cursor:
+            self.assertEqual(sum(len(cursor.execute(sql).fetchall()) for sql in reads), len(deltas))
+        self.assertEqual(
+            {(row.account_id, row.category_id): row.pending_expense for row in MonthlySummary.objects.filter(month=1)},
+            {(self.checking.pk, food.pk): Decimal('3.00'), (self.checking.pk, None): Decimal('1.00'),
+             (self.savings.pk, food.pk): Decimal('1.00'), (self.savings.pk, None): Decimal('4.00')},
+        )
+        self.assertEqual(MonthlySummary.objects.filter(month__gt=1).count(), KEY_CHUNK)
+
+    def test_account_and_user_deletion_cascade(self):
+        self.make_transaction(completion_date=date(2025, 1, 15))
+        self.make_transaction(account=self.savings)
+        self.checking.delete()
+        self.assertSummariesConsistent()
+        self.user.delete()
+        self.assertFalse(MonthlySummary.objects.exists())
+
+    def test_rebuild_command(self):
+        self.make_transaction(amount=Decimal('30.00'))
+        MonthlySummary.objects.update(pending_expense=Decimal('1.00'))
+        with self.assertRaises(CommandError):
+            call_command('rebuild_summaries', '--check', stdout=StringIO())
+        call_command('rebuild_summaries', stdout=StringIO())
+        call_command('rebuild_summaries', '--check', stdout=StringIO())
+        self.assertEqual(MonthlySummary.objects.get().pending_expense, Decimal('30.00'))
+
+    def test_dashboard_reads_month_totals(self):
+        self.make_transaction(transaction_type='INCOME', amount=Decimal('100.00'))
+        self.make_transaction(amount=Decimal('40.00'), completion_date=date(2025, 1, 15))
+        self.client.force_login(self.user)
+        context = self.client.get('/transactions/', {'year': 2025, 'month': 1}).context
+        self.assertEqual(context['month_net'], Decimal('60.00'))
+
+
+class CompletePendingTaskTests(LedgerTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        for i in range(10):
+            self.make_transaction(
+                account=self.checking if i % 2 else self.savings,
+                transaction_type='INCOME' if i % 3 else 'EXPENSE',
+                amount=Decimal(i + 1),
+                date=date(2025, 1, 1 + i),
+            )
+        self.make_transaction(date=date(2999, 1, 1))
+
+    def test_completes_due_rows_in_batches(self):
+        result = efetivar_transacoes_pendentes(batch_size=4)
+        self.assertEqual(result['completed'], 10)
+        self.assertEqual([batch['rows'] for batch in result['batches']], [4, 4, 2])
+        self.assertEqual(Transaction.objects.filter(completion_date__isnull=True).count(), 1)
+        self.assertBalancesMatchAggregate()
+        self.assertEqual(find_summary_mismatches([self.user.pk]), [])
+
+    def test_is_restartable(self):
+        efetivar_transacoes_pendentes(batch_size=3, max_batches=1)
+        self.assertEqual(Transaction.objects.filter(completion_date__isnull=False).count(), 3)
+        self.assertBalancesMatchAggregate()
+        result = efetivar_transacoes_pendentes(batch_size=3)
+        self.assertEqual(result['completed'], 7)
+        self.assertEqual(efetivar_transacoes_pendentes()['completed'], 0)
+        self.assertBalancesMatchAggregate()
+
+    def test_batch_query_count_does_not_depend_on_accounts(self):
+        with CaptureQueriesContext(connection) as queries:
+            rows, accounts = complete_due_batch(date(2026, 1, 1), 100)
+        self.assertEqual((rows, accounts), (10, 2))
+        balance_updates = [q for q in queries if q['sql'].startswith('UPDATE "accounts_account"')]
+        self.assertEqual(len(balance_updates), 1)
+        if connection.features.has_select_for_update_skip_locked:
+            self.assertTrue(any('SKIP LOCKED' in query['sql'] for query in queries))
+
+
+@skipUnless(connection.vendor == 'postgresql', "Needs row-level locking (PostgreSQL).")
+class ConcurrentCompletePendingTaskTests(LedgerTestMixin, TransactionTestCase):
+
+    def test_parallel_workers_complete_each_row_once(self):
+        for i in range(200):
+            self.make_transaction(amount=Decimal('1.00'), date=date(2025, 1, 1 + i % 28))
+
+        def worker():
+            try:
+                efetivar_transacoes_pendentes(batch_size=7)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.checking.refresh_from_db()
+        self.assertEqual(self.checking.balance, Decimal('-100.00'))
+        self.assertFalse(Transaction.objects.filter(completion_date__isnull=True).exists())
+        self.assertEqual(find_summary_mismatches([self.user.pk]), [])
+
+
+class FixedProjectionTests(TestCase):
+
+    def parent(self, day):
+        return Transaction(id=uuid.uuid4(), date=day, amount=Decimal('10.00'), transaction_type='EXPENSE',
+                           frequency=Transaction.Frequency.FIXED)
+
+    def test_clamps_to_month_end(self):
+        parent = self.parent(date(2023, 12, 31))
+        dates = [o.date for o in project_fixed([parent], date(2024, 1, 1), date(2024, 5, 1))]
+        self.assertEqual(dates, [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30)])
+        dates = [o.date for o in project_fixed([parent], date(2025, 2, 1), date(2025, 3, 1))]
+        self.assertEqual(dates, [date(2025, 2, 28)])
+
+    def test_starts_at_parent_date(self):
+        parent = self.parent(date(2025, 3, 15))
+        occurrences = project_fixed([parent], date(2025, 1, 1), date(2025, 6, 1))
+        self.assertEqual([o.date for o in occurrences], [date(2025, 3, 15), date(2025, 4, 15), date(2025, 5, 15)])
+        self.assertEqual(project_fixed([parent], date(2025, 2, 1), date(2025, 3, 1)), [])
+        self.assertIs(occurrences[0].id, parent.id)
+        self.assertIsNone(occurrences[0].completion_date)
+
+    def test_long_range_matches_legacy_loop_for_safe_days(self):
+        """For days 1-28 the result equals the old per-month date.replace() projection."""
+        parents = [self.parent(date(2020, 1 + i % 12, 1 + i % 28)) for i in range(50)]
+        occurrences = project_fixed(parents, date(2020, 1, 1), date(2030, 1, 1))
+        legacy = []
+        for parent in parents:
+            for year in range(2020, 2030):
+                for month in range(1, 13):
+                    projected = parent.date.replace(year=year, month=month)
+                    if projected >= parent.date:
+                        legacy.append((parent.id, projected))
+        self.assertEqual(sorted((o.id, o.date) for o in occurrences), sorted(legacy))
+
+    def test_dashboard_shows_day_31_in_short_months(self):
+        user = get_user_model().objects.create_user(username='p', email='p@example.com', password='x')
+        account = Account.objects.create(user=user, name='Main')
+        Transaction.objects.create(user=user, account=account, transaction_type='EXPENSE', amount=Decimal('5.00'),
+                                   date=date(2025, 1, 31), frequency=Transaction.Frequency.FIXED)
+        self.client.force_login(user)
+        transactions = self.client.get('/transactions/', {'year': 2025, 'month': 2}).context['transactions']
+        self.assertEqual([t.date for t in transactions], [date(2025, 2, 28)])
+
+
+class FixedMaterializationTests(LedgerTestMixin, TestCase):
+    today = date(2025, 1, 31)
+
+    def setUp(self):
+        super().setUp()
+        self.rent = self.make_transaction(
+            frequency=Transaction.Frequency.FIXED, installments=0, amount=Decimal('40.00'),
+            date=date(2025, 1, 31), description='Aluguel',
+        )
+
+    def children(self):
+        return Transaction.objects.filter(recurrence_id=self.rent.pk).order_by('date')
+
+    def test_children_up_to_the_horizon(self):
+        self.assertEqual(materialize_parents([self.rent], date(2025, 5, 15), self.today), 3)
+        self.assertEqual(
+            [(t.date, t.installment_number, t.status) for t in self.children()],
+            [(date(2025, 2, 28), 2, 'PENDING'), (date(2025, 3, 31), 3, 'PENDING'), (date(2025, 4, 30), 4, 'PENDING')],
+        )
+        self.rent.refresh_from_db()
+        self.assertEqual(self.rent.next_occurrence_date, date(2025, 5, 31))
+        self.assertEqual(summary_totals(user=self.user, year=2025, month=3)['pending_expense'], Decimal('40.00'))
+
+        # Estender o horizonte só cria os meses novos.
+        self.assertEqual(materialize_parents([self.rent], date(2025, 5, 30), self.today), 0)
+        self.assertEqual(materialize_parents([self.rent], date(2025, 7, 1), self.today), 2)
+        self.assertEqual(self.children().count(), 5)
+        self.assertEqual(find_summary_mismatches([self.user.pk]), [])
+
+    def test_back_dated_parent_starts_at_the_current_month(self):
+        self.assertEqual(materialize_parents([self.rent], date(2025, 6, 15), today=date(2025, 4, 10)), 2)
+        self.assertEqual(
+            [(t.date, t.installment_number) for t in self.children()],
+            [(date(2025, 4, 30), 4), (date(2025, 5, 31), 5)],
+        )
+        # Fevereiro e março não viram pendentes para a tarefa das 00:10 efetivar hoje.
+        self.rent.refresh_from_db()
+        self.assertEqual((self.rent.materialized_from, self.rent.next_occurrence_date), (date(2025, 4, 30), date(2025, 6, 30)))
+
+        # ...mas continuam projetados, no dashboard e na API do mês; abril é a linha real.
+        self.client.force_login(self.user)
+        for month, day, projected in ((2, 28, True), (3, 31, True), (4, 30, False)):
+            (row,) = self.client.get('/transactions/', {'year': 2025, 'month': month}).context['transactions']
+            self.assertEqual((row.date, getattr(row, 'is_projection', False)), (date(2025, month, day), projected))
+            (row,) = self.client.get('/transactions/api/month/', {'year': 2025, 'month': month}).json()['transactions']
+            self.assertEqual((row['date'], row['is_projection']), (f'2025-{month:02}-{day}', projected))
+
+        # Reeditar a "mãe" depois refaz a partir de abril: nem some abril, nem volta fevereiro.
+        resync_children(self.rent, today=date(2025, 5, 10))
+        self.rent.refresh_from_db()
+        self.assertEqual(self.rent.materialized_from, date(2025, 4, 30))
+        self.assertEqual([t.date for t in self.children()[:2]], [date(2025, 4, 30), date(2025, 5, 31)])
+
+    def test_dashboard_lists_rows_inside_and_projects_beyond_the_horizon(self):
+        self.client.force_login(self.user)
+        get_month = lambda month: self.client.get('/transactions/', {'year': 2025, 'month': month}).context['transactions']
+        materialize_parents([self.rent], date(2025, 3, 15), self.today)
+
+        (february,) = get_month(2)
+        self.assertFalse(getattr(february, 'is_projection', False))
+        self.assertEqual(february.recurrence_id, self.rent.pk)
+        (january,) = get_month(1)
+        self.assertEqual(january.pk, self.rent.pk)
+        (march,) = get_month(3)
+        self.assertTrue(march.is_projection)
+        self.assertEqual(march.date, date(2025, 3, 31))
+
+    def test_materialized_occurrence_can_be_completed(self):
+        materialize_parents([self.rent], date(2025, 3, 15), self.today)
+        february = self.children().first()
+        self.client.force_login(self.user)
+        self.client.get(f'/transactions/{february.pk}/complete/')
+        february.refresh_from_db()
+        self.assertEqual(february.status, Transaction.Status.COMPLETED)
+        self.checking.refresh_from_db()
+        self.assertEqual(self.checking.balance, Decimal('60.00'))
+        self.assertBalancesMatchAggregate()
+
+    def test_forecast_is_the_same_before_and_after_materializing(self):
+        today = date(2025, 1, 10)
+        before = forecast_balances(self.user, months=12, today=today)
+        materialize_parents([self.rent], date(2025, 6, 30), self.today)
+        self.rent.refresh_from_db()
+        self.assertEqual(forecast_balances(self.user, months=12, today=today), before)
+
+    @override_settings(FIXED_HORIZON_MONTHS=3)
+    def test_edit_rebuilds_pending_children_and_keeps_completed(self):
+        materialize_parents([self.rent], date(2025, 4, 15), self.today)
+        february = self.children().first()
+        february.completion_date = date(2025, 2, 28)
+        february.save()
+
+        self.rent.amount = Decimal('45.00')
+        self.rent.save()
+        resync_children(self.rent, today=date(2025, 2, 1))
+        self.assertEqual(
+            [(t.date, t.amount, t.completion_date) for t in self.children()],
+            [(date(2025, 2, 28), Decimal('40.00'), date(2025, 2, 28)),
+             (date(2025, 3, 31), Decimal('45.00'), None), (date(2025, 4, 30), Decimal('45.00'), None)],
+        )
+        self.assertEqual(find_summary_mismatches([self.user.pk]), [])
+        self.assertBalancesMatchAggregate()
+
+    def test_delete_view_removes_pending_children_only(self):
+        materialize_parents([self.rent], date(2025, 4, 15), self.today)
+        february = self.children().first()
+        february.completion_date = date(2025, 2, 28)
+        february.save()
+        self.client.force_login(self.user)
+        self.client.post(f'/transactions/{self.rent.pk}/delete/')
+        self.assertEqual(list(Transaction.objects.values_list('pk', flat=True)), [february.pk])
+        self.assertEqual(find_summary_mismatches([self.user.pk]), [])
+
+    def test_fixed_transfer_legs_share_a_transfer_id_per_month(self):
+        legs = create_transactions(build_transfer(
+            user=self.user, account=self.checking, to_account=self.savings, amount=Decimal('15.00'),
+            start_date=date(2025, 1, 5), is_recurring=True, frequency=Transaction.Frequency.FIXED,
+        ))
+        materialize_parents(legs, date(2025, 3, 10), self.today)
+        children = Transaction.objects.filter(recurrence_id__in=[leg.pk for leg in legs])
+        self.assertEqual(children.count(), 4)
+        self.assertEqual(children.values('transfer_id').distinct().count(), 2)
+
+    def test_batches_only_read_parents_that_are_due(self):
+        for day in range(1, 11):
+            self.make_transaction(frequency=Transaction.Frequency.FIXED, installments=0, date=date(2025, 1, day))
+        self.assertEqual(materialize_due_batch(date(2025, 2, 15), batch_size=100, today=self.today)[:2], (11, 10))
+        # Só entram as "mães" com ocorrência até 5/mar: a do dia 31 (28/fev) e as dos dias 1 a 5.
+        parents, rows, _ = materialize_due_batch(date(2025, 3, 5), batch_size=100, today=self.today)
+        self.assertEqual((parents, rows), (6, 6))
+        with self.assertNumQueries(3):  # savepoint, "mães" vencidas (nenhuma), release
+            self.assertEqual(materialize_due_batch(date(2025, 3, 5), batch_size=100, today=self.today)[:2], (0, 0))
+
+    def test_task_keeps_paging_past_parents_without_new_rows(self):
+        self.make_transaction(frequency=Transaction.Frequency.FIXED, installments=0, date=date(2099, 1, 1))
+        result = materialize_fixed_recurrences(batch_size=1)
+        self.assertEqual([batch['parents'] for batch in result['batches']], [1, 1])
+        self.assertGreater(result['created'], 0)
+
+
+class ForecastTests(LedgerTestMixin, TestCase):
+    today = date(2025, 1, 10)
+
+    def setUp(self):
+        super().setUp()
+        self.make_transaction(amount=Decimal('30.00'), date=date(2025, 1, 15))
+        self.make_transaction(transaction_type='INCOME', amount=Decimal('10.00'), date=date(2025, 1, 7))
+        self.make_transaction(account=self.savings, amount=Decimal('5.00'), date=date(2025, 3, 1))
+        self.make_transaction(amount=Decimal('999.00'), date=date(2030, 1, 1))
+        # "Mãe" fixa já efetivada no dia 20 de dezembro: ocorre de novo a cada dia 20.
+        self.make_transaction(frequency=Transaction.Frequency.FIXED, amount=Decimal('20.00'),
+                              date=date(2024, 12, 20), completion_date=date(2024, 12, 20))
+
+    def balances_by_date(self, forecast, account):
+        series = next(a['balances'] for a in forecast['accounts'] if a['id'] == account.pk)
+        return dict(zip(forecast['dates'], series))
+
+    def test_daily_running_balance(self):
+        with self.assertNumQueries(3):
+            forecast = forecast_balances(self.user, months=3, today=self.today)
+        self.assertEqual(forecast['dates'][0], self.today)
+        self.assertEqual(len(forecast['dates']), 90)
+        checking = self.balances_by_date(forecast, self.checking)
+        # 100 inicial - 20 (dez, já no saldo) = 80; +10 atrasada conta hoje.
+        self.assertEqual(checking[date(2025, 1, 10)], Decimal('90.00'))
+        self.assertEqual(checking[date(2025, 1, 15)], Decimal('60.00'))
+        self.assertEqual(checking[date(2025, 1, 20)], Decimal('40.00'))
+        self.assertEqual(checking[date(2025, 2, 20)], Decimal('20.00'))
+        self.assertEqual(checking[date(2025, 4, 9)], Decimal('0.00'))
+        savings = self.balances_by_date(forecast, self.savings)
+        self.assertEqual(savings[date(2025, 3, 1)], Decimal('45.00'))
+
+    def test_monthly_samples_month_ends(self):
+        forecast = forecast_balances(self.user, months=3, granularity='monthly', today=self.today)
+        self.assertEqual(forecast['dates'], [date(2025, 1, 31), date(2025, 2, 28), date(2025, 3, 31), date(2025, 4, 9)])
+        self.assertEqual(self.balances_by_date(forecast, self.checking)[date(2025, 2, 28)], Decimal('20.00'))
+
+    def test_endpoint(self):
+        self.client.force_login(self.user)
+        response = self.client.get('/transactions/forecast/', {'months': 24, 'granularity': 'monthly'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['accounts']), 2)
+        self.assertEqual(self.client.get('/transactions/forecast/', {'months': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get('/transactions/forecast/', {'granularity': 'weekly'}).status_code, 400)
+
+
+STATEMENT_CSV = """date,amount,description,category
+2025-01-03,-12.50,Padaria  Central,Food
+05/01/2025,"1.500,00",Salary,
+2025-01-07,-12.50,Padaria Central,Food
+2025-01-07,-12.50,Padaria Central,Food
+"""
+
+STATEMENT_OFX = """OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20250110120000[-3:BRT]
+<TRNAMT>-40.00
+<MEMO>Pharmacy
+</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20250111<TRNAMT>15.00<NAME>Refund</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+
+class StatementImportTests(LedgerTestMixin, TestCase):
+
+    def test_parse_amount_formats(self):
+        self.assertEqual(parse_amount('1.234,56'), Decimal('1234.56'))
+        self.assertEqual(parse_amount('-1,234.56'), Decimal('-1234.56'))
+        self.assertEqual(parse_amount('(12.00)'), Decimal('-12.00'))
+        with self.assertRaises(StatementError):
+            parse_amount('abc')
+
+    def test_parse_ofx(self):
+        lines = list(parse_ofx(StringIO(STATEMENT_OFX)))
+        self.assertEqual([(line.date, line.amount, line.description) for line in lines], [
+            (date(2025, 1, 10), Decimal('-40.00'), 'Pharmacy'),
+            (date(2025, 1, 11), Decimal('15.00'), 'Refund'),
+        ])
+
+    def test_import_csv_in_chunks(self):
+        food = Category.objects.create(user=self.user, name='Food')
+        result = import_statement(StringIO(STATEMENT_CSV), self.checking, batch_size=3)
+        self.assertEqual((result.read, result.inserted, result.duplicates), (4, 4, 0))
+        self.assertEqual(len(result.batches), 2)
+        rows = Transaction.objects.filter(account=self.checking).order_by('date', 'amount')
+        self.assertEqual(rows.filter(category=food).count(), 3)
+        self.assertTrue(all(row.status == Transaction.Status.COMPLETED and row.completion_date == row.date for row in rows))
+        self.checking.refresh_from_db()
+        self.assertEqual(self.checking.balance, Decimal('1562.50'))
+        self.assertBalancesMatchAggregate()
+        self.assertEqual(find_summary_mismatches([self.user.pk]), [])
+
+    def test_reimport_skips_existing_lines(self):
+        # Lançamento manual idêntico (descrição com outra caixa/espaços) conta como duplicata.
+        self.make_transaction(amount=Decimal('12.50'), date=date(2025, 1, 3), description='padaria central')
+        import_statement(StringIO(STATEMENT_CSV), self.checking)
+        with self.assertNumQueries(4):  # savepoint, categories, duplicate lookup, release
+            result = import_statement(StringIO(STATEMENT_CSV), self.checking)
+        self.assertEqual((result.inserted, result.duplicates), (0, 4))
+        self.assertEqual(Transaction.objects.filter(account=self.checking).count(), 4)
+        # Outra conta não conta como duplicata.
+        self.assertEqual(import_statement(StringIO(STATEMENT_CSV), self.savings).inserted, 4)
+        self.assertBalancesMatchAggregate()
+
+    def test_hash_of_unconverted_field_values(self):
+        row = Transaction(
+            user=self.user, account=self.checking, transaction_type='EXPENSE', amount='12.50',
+            date='2025-01-03', description='Padaria Central',
+        )
+        row.refresh_dedupe_hash()
+        self.assertEqual(row.dedupe_hash, dedupe_hash(self.checking.pk, date(2025, 1, 3), 'EXPENSE', Decimal('12.50'), 'padaria central'))
+
+    def test_import_is_atomic(self):
+        with self.assertRaises(StatementError):
+            import_statement(StringIO(STATEMENT_CSV + "2025-01-08,oops,Broken\n"), self.checking, batch_size=2)
+        self.assertFalse(Transaction.objects.exists())
+        self.checking.refresh_from_db()
+        self.assertEqual(self.checking.balance, Decimal('100.00'))
+
+    def test_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.ofx', delete=False) as handle:
+            handle.write(STATEMENT_OFX)
+        self.addCleanup(os.remove, handle.name)
+        out = StringIO()
+        call_command('import_statement', handle.name, account=str(self.checking.pk), stdout=out)
+        self.assertIn('inserted 2, skipped 0 duplicates', out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('import_statement', handle.name, account=str(uuid.uuid4()), stdout=StringIO())
+
+    def test_upload_view(self):
+        self.client.force_login(self.user)
+        response = self.client.post('/transactions/import/', {
+            'account': self.checking.pk,
+            'file_format': 'csv',
+            'statement': SimpleUploadedFile('extrato.csv', STATEMENT_CSV.encode()),
+        })
+        self.assertRedirects(response, '/transactions/', fetch_redirect_response=False)
+        self.assertEqual(Transaction.objects.filter(account=self.checking).count(), 4)
+
+
+class TransactionExportTests(LedgerTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.food = Category.objects.create(user=self.user, name='Food')
+        self.make_transaction(category=self.food, description='Padaria', date=date(2025, 1, 3),
+                              completion_date=date(2025, 1, 3), status=Transaction.Status.COMPLETED)
+        self.make_transaction(transaction_type='INCOME', amount=Decimal('1500.00'), date=date(2025, 2, 5))
+        self.make_transaction(account=self.savings, date=date(2025, 3, 1))
+        other = get_user_model().objects.create_user(username='other', password='secret')
+        Transaction.objects.create(
+            user=other, account=Account.objects.create(user=other, name='Other'),
+            transaction_type='EXPENSE', amount=Decimal('1.00'), date=date(2025, 1, 1)
+        )
+
+    def export(self, **params):
+        self.client.force_login(self.user)
+        response = self.client.get('/transactions/export/', params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def test_csv_is_filtered_and_ordered(self):
+        rows = list(csv.DictReader(StringIO(self.export(format='csv', account=self.checking.pk).decode())))
+        self.assertEqual([row['date'] for row in rows], ['2025-01-03', '2025-02-05'])
+        self.assertEqual(rows[0]['category'], 'Food')
+        self.assertEqual(rows[0]['amount'], '10.00')
+        self.assertEqual(rows[1]['completion_date'], '')
+
+    def test_jsonl_filters(self):
+        lines = self.export(format='jsonl', start='2025-02-01', end='2025-03-01', status='PENDING').decode().splitlines()
+        records = [json.loads(line) for line in lines]
+        self.assertEqual([(r['date'], r['account']) for r in records], [('2025-02-05', 'Checking'), ('2025-03-01', 'Savings')])
+        self.assertIsNone(records[0]['category'])
+
+    def test_invalid_filters(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get('/transactions/export/', {'format': 'xml'}).status_code, 400)
+        self.assertEqual(self.client.get('/transactions/export/', {'start': 'yesterday'}).status_code, 400)
+
+    def test_rows_are_fetched_in_chunks(self):
+        queryset = export_queryset(user=self.user)
+        with mock.patch.object(type(queryset), 'iterator', wraps=queryset.iterator) as iterator:
+            self.assertEqual(len(list(iter_rows(queryset, chunk_size=2))), 3)
+        iterator.assert_called_once_with(chunk_size=2)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('export_transactions', format='csv', user=self.user.pk, stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 4)
+        with self.assertRaises(CommandError):
+            call_command('export_transactions', format='parquet', stdout=StringIO())
+
+    def test_command_checks_the_account(self):
+        out = StringIO()
+        call_command('export_transactions', user=self.user.pk, account=str(self.checking.pk), stdout=out)
+        self.assertGreater(len(out.getvalue().splitlines()), 1)
+        other = get_user_model().objects.create_user(username='stranger', email='stranger@example.com')
+        for options in ({'account': 'x'}, {'account': str(uuid.uuid4())},
+                        {'account': str(self.checking.pk), 'user': other.pk}):
+            with self.assertRaises(CommandError, msg=options):
+                call_command('export_transactions', stdout=StringIO(), **options)
+
+    @skipUnless(importlib.util.find_spec('pyarrow'), "pyarrow is not installed")
+    def test_parquet_row_groups(self):
+        import pyarrow.parquet as pq
+
+        data = b''.join(to_parquet(export_queryset(user=self.user), row_group_size=2))
+        parquet = pq.ParquetFile(BytesIO(data))
+        self.assertEqual(parquet.metadata.num_row_groups, 2)
+        table = parquet.read()
+        self.assertEqual(table.column('amount').to_pylist(), [Decimal('10.00'), Decimal('1500.00'), Decimal('10.00')])
+        self.assertEqual(table.column('date').to_pylist()[0], date(2025, 1, 3))
+        self.assertEqual(self.export(format='parquet')[:4], b'PAR1')
+
+
+class SyntheticSeedTests(TestCase):
+
+    def seed(self, prefix):
+        out = StringIO()
+        call_command('seed_synthetic', users=2, months=6, per_month=5, seed=1, prefix=prefix,
+                     today=date(2025, 6, 15), batch_size=50, stdout=out)
+        self.assertIn('Created 2 users, 8 accounts, 22 categories', out.getvalue())
+        return Transaction.objects.filter(user__username__startswith=prefix)
+
+    def test_households_are_realistic_and_consistent(self):
+        rows = self.seed('synth')
+        self.assertTrue(rows.filter(frequency=Transaction.Frequency.FIXED).exists())
+        self.assertTrue(rows.filter(transfer_id__isnull=False).exists())
+        self.assertTrue(rows.filter(installment_number__gt=1).exists())
+        self.assertTrue(rows.filter(completion_date__isnull=True, date__gt=date(2025, 6, 15)).exists())
+        user_ids = list(get_user_model().objects.values_list('pk', flat=True))
+        self.assertEqual(find_summary_mismatches(user_ids), [])
+        accounts = list(Account.objects.all())
+        expected = calculate_balances(accounts)
+        self.assertEqual({a.pk: a.balance for a in accounts}, expected)
+
+    def test_same_seed_same_data(self):
+        first = sorted(self.seed('first').values_list('date', 'amount', 'description'))
+        second = sorted(self.seed('second').values_list('date', 'amount', 'description'))
+        self.assertEqual(first, second)
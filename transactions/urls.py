@@ -1,5 +1,13 @@
 # transactions/urls.py
 from django.urls import path
+from .api import (
+    BalanceHistoryApiView,
+    CategoryAnalyticsApiView,
+    CategoryApiView,
+    NetWorthApiView,
+    TransactionApiView,
+)
+from .async_views import MonthSummaryApiView, MonthTransactionsApiView
 from .views import (
     TransactionListView,
     TransactionCreateView,
@@ -9,6 +17,14 @@ from .views import (
     CategoryCreateView,
     CategoryUpdateView,
     CategoryDeleteView,
+    CategoryAnalyticsView,
+    BudgetListView,
+    BudgetCreateView,
+    BudgetUpdateView,
+    BudgetDeleteView,
+    TransactionForecastView,
+    StatementImportView,
+    TransactionExportView,
     complete_transaction,
 )
 
@@ -20,7 +36,22 @@ urlpatterns = [
     path('<uuid:pk>/edit/', TransactionUpdateView.as_view(), name='transaction_update'),
     path('<uuid:pk>/delete/', TransactionDeleteView.as_view(), name='transaction_delete'),
     path('<uuid:pk>/complete/', complete_transaction, name='transaction_complete'),
+    path('forecast/', TransactionForecastView.as_view(), name='transaction_forecast'),
+    path('import/', StatementImportView.as_view(), name='statement_import'),
+    path('export/', TransactionExportView.as_view(), name='transaction_export'),
+    path('api/month/', MonthTransactionsApiView.as_view(), name='month_api'),
+    path('api/summary/', MonthSummaryApiView.as_view(), name='month_summary_api'),
+    path('api/transactions/', TransactionApiView.as_view(), name='transaction_api'),
+    path('api/categories/', CategoryApiView.as_view(), name='category_api'),
+    path('api/balance-history/', BalanceHistoryApiView.as_view(), name='balance_history_api'),
+    path('api/net-worth/', NetWorthApiView.as_view(), name='net_worth_api'),
+    path('api/analytics/', CategoryAnalyticsApiView.as_view(), name='category_analytics_api'),
 
+    path('budgets/', BudgetListView.as_view(), name='budget_list'),
+    path('budgets/new/', BudgetCreateView.as_view(), name='budget_create'),
+    path('budgets/<int:pk>/edit/', BudgetUpdateView.as_view(), name='budget_update'),
+    path('budgets/<int:pk>/delete/', BudgetDeleteView.as_view(), name='budget_delete'),
+    path('analytics/', CategoryAnalyticsView.as_view(), name='category_analytics'),
     path('categories/', CategoryListView.as_view(), name='category_list'),
     path('categories/new/', CategoryCreateView.as_view(), name='category_create'),
     path('categories/<uuid:pk>/edit/', CategoryUpdateView.as_view(), name='category_update'),
@@ -1,19 +1,37 @@
 # transactions/views.py
-import uuid
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
 
-from .models import Transaction, Category
+from .models import Budget, Transaction, Category
 from accounts.models import Account # Needed to filter account choices
 from datetime import date
 from django.utils import timezone
 from dateutil.relativedelta import relativedelta
-from .forms import TransactionForm
+from config.cache import FIXED_PARENTS, user_accounts, user_cached, user_categories, user_data_version
+from .analytics import category_report
+from .budgets import budget_for, month_budgets, set_budget
+from .api import CategoryAnalyticsForm
+from .dashboard import MergedTransactionList
+from .dates import month_bounds
+from .effects import TransactionEffects
+from .forecast import forecast_balances
+from .exporters import FORMATS, export_queryset, iter_rows
+from .forms import BudgetForm, StatementImportForm, TransactionExportForm, TransactionForm, use_cached_choices
+from .importers import StatementError, import_statement
+from .materializer import delete_pending_children, horizon_end, is_materialized, materialize_parents, resync_children
+from .projections import project_fixed
+from .services import build_installments, build_transfer, create_transactions
+from .summaries import summary_totals
 from django.shortcuts import get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.db import transaction as db_transaction
-from django.views.generic import FormView
+from django.views.generic import FormView, TemplateView, View
+from django.http import JsonResponse, StreamingHttpResponse
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.contrib import messages
+import io
 
 # ===================================================================
 # VIEW DE LISTAGEM (O DASHBOARD PRINCIPAL)
@@ -22,78 +40,103 @@ from django.views.generic import FormView
 class TransactionListView(LoginRequiredMixin, ListView):
     """
     Displays a unified list of all financial operations (income, expense, transfers)
-    for a given month, combining real database entries with in-memory projections
-    of fixed monthly transactions.
+    for a given month. FIXED recurrences have real rows up to the materialised
+    horizon; months beyond it are completed with in-memory projections.
     """
     model = Transaction
     template_name = 'transactions/transaction_list.html'
     context_object_name = 'transactions'
     paginate_by = 100
+    # Sessão, usuário, "mães" fixas, histograma diário, linhas da página, totais e orçamentos do mês.
+    query_budget = 7
+    fragment_name = 'transaction_month'
+    fragment_timeout = 60 * 60 * 24 * 7
+
+    def get(self, request, *args, **kwargs):
+        """
+        The month content (totals and table) is cached as rendered HTML, keyed on
+        the user's data version. While nothing has changed, it is served from the
+        cache without touching the transactions; any write moves the version and
+        the next request renders it again.
+        """
+        self.year = int(request.GET.get('year', timezone.now().year))
+        self.month = int(request.GET.get('month', timezone.now().month))
+        self.fragment_vary = [
+            request.user.pk, self.year, self.month, request.GET.get('page', '1'),
+            user_data_version(request.user.pk),
+        ]
+        fragment = cache.get(make_template_fragment_key(self.fragment_name, [self.fragment_vary]))
+        if fragment is not None:
+            self.object_list = []  # Nada a listar: o fragmento já traz a tabela.
+            return self.render_to_response({**self.get_month_navigation(), 'month_fragment': fragment})
+        return super().get(request, *args, **kwargs)
 
     def get_queryset(self):
         """
         Constructs the list of transactions to display. This logic is now simpler
         because transfers are just regular transactions.
         """
-        self.year = int(self.request.GET.get('year', timezone.now().year))
-        self.month = int(self.request.GET.get('month', timezone.now().month))
-        
-        # ETAPA 1: Pega todas as transações "reais" do mês (únicas, parcelas, e a "mãe" de uma recorrência fixa).
-        # A lógica aqui é idêntica à anterior.
-        real_transactions_qs = Transaction.objects.filter(
+        # ETAPA 1: Pega todas as transações "reais" do mês (únicas, parcelas, "mães" fixas e as
+        # ocorrências já materializadas). A consulta só é avaliada pelo paginador, e apenas
+        # para as linhas da página.
+        real_transactions_qs = self.get_month_transactions()
+
+        # ETAPA 2: Ocorrências fixas além do horizonte materializado ainda não têm linha:
+        # são projetadas a partir das "mães", que vêm do cache por usuário.
+        fixed_parents = user_cached(self.request.user.pk, FIXED_PARENTS, lambda: list(self.get_fixed_parents()))
+
+        first_day, next_month_first_day = month_bounds(self.year, self.month)
+        projected_transactions = [
+            occurrence for occurrence in project_fixed(fixed_parents, first_day, next_month_first_day)
+            if not is_materialized(occurrence)
+        ]
+
+        # ETAPA 3: Intercala as linhas reais (ordenadas no banco) com as projeções.
+        return MergedTransactionList(real_transactions_qs, projected_transactions)
+
+    def get_month_transactions(self):
+        """
+        Real rows of the selected month. The month is filtered as a half-open
+        date range so the (user, date) index can be used.
+        """
+        first_day, next_month_first_day = month_bounds(self.year, self.month)
+        return Transaction.objects.filter(
             user=self.request.user,
-            date__year=self.year,
-            date__month=self.month
-        ).exclude(frequency=Transaction.Frequency.FIXED)
+            date__gte=first_day,
+            date__lt=next_month_first_day
+        ).select_related('account', 'category')
 
-        # ETAPA 2: Pega TODAS as "mães" de recorrências fixas (que não sejam transferências).
-        # Transferências recorrentes fixas não são suportadas nesta lógica para simplificar.
-        fixed_parents = Transaction.objects.filter(
+    def get_fixed_parents(self):
+        """Every FIXED recurrence parent of the user, projected beyond its materialised rows."""
+        return Transaction.objects.filter(
             user=self.request.user,
             frequency=Transaction.Frequency.FIXED
-        )
+        ).select_related('account', 'to_account', 'category')
 
-        projected_transactions = []
-        for parent in fixed_parents:
-            try:
-                projected_date = parent.date.replace(year=self.year, month=self.month)
-                if projected_date < parent.date:
-                    continue
-
-                # Crie a transação virtual
-                projected_trans = Transaction(
-                    id=parent.id, 
-                    date=projected_date,
-                    account=parent.account,
-                    to_account=parent.to_account, # Adicionar para transferências fixas se necessário
-                    category=parent.category,
-                    description=parent.description,
-                    amount=parent.amount,
-                    transaction_type=parent.transaction_type,
-                    status=Transaction.Status.PENDING,
-                    frequency=parent.frequency,
-                    completion_date=None
-                )
-                projected_transactions.append(projected_trans)
-
-            except ValueError:
-                continue
-        
-        combined_list = list(real_transactions_qs) + projected_transactions
-        sorted_list = sorted(combined_list, key=lambda x: x.date)
-        
-        return sorted_list
+    def get_month_navigation(self):
+        current_date = timezone.datetime(self.year, self.month, 1)
+        return {
+            'current_month': current_date,
+            'prev_month': current_date - relativedelta(months=1),
+            'next_month': current_date + relativedelta(months=1),
+        }
 
     def get_context_data(self, **kwargs):
         """
         Adds month navigation data to the template context.
         """
         context = super().get_context_data(**kwargs)
-        current_date = timezone.datetime(self.year, self.month, 1)
-        context['current_month'] = current_date
-        context['prev_month'] = current_date - relativedelta(months=1)
-        context['next_month'] = current_date + relativedelta(months=1)
+        context.update(self.get_month_navigation())
         context['transactions'] = context['object_list']
+        context['fragment_vary'] = self.fragment_vary
+        context['fragment_timeout'] = self.fragment_timeout
+        # Totais do mês lidos dos resumos pré-agregados (sem varrer as transações).
+        totals = summary_totals(user=self.request.user, year=self.year, month=self.month)
+        context['month_income'] = totals['completed_income'] + totals['pending_income']
+        context['month_expense'] = totals['completed_expense'] + totals['pending_expense']
+        context['month_net'] = context['month_income'] - context['month_expense']
+        # Orçamentos: contadores mantidos a cada gravação, uma linha por categoria.
+        context['budgets'] = month_budgets(self.request.user.pk, self.year, self.month)
         return context
         """
         Adds month navigation data to the template context.
@@ -108,6 +151,17 @@ class TransactionListView(LoginRequiredMixin, ListView):
         return context
 
 
+def warn_if_over_budget(request, transaction):
+    """Warns when an expense leaves its category over the month's budget (one indexed lookup)."""
+    budget = budget_for(transaction)
+    if budget is not None and budget.over_budget:
+        messages.warning(
+            request,
+            f"{budget.category.name} is over its {budget.month:02d}/{budget.year} budget by "
+            f"${-budget.remaining:.2f}."
+        )
+
+
 # ===================================================================
 # VIEW DE CRIAÇÃO
 # ===================================================================
@@ -162,62 +216,22 @@ class TransactionCreateView(LoginRequiredMixin, CreateView):
                 return self.form_invalid(form)
 
             # Se for Mensal Fixo, criamos apenas as "mães". Se for Parcelado, criamos as parcelas.
-            # Se não for recorrente, o total_creations será 1.
-            total_creations = 1
-            if is_recurring:
-                if frequency == Transaction.Frequency.INSTALLMENT:
-                    total_creations = installments
-                elif frequency == Transaction.Frequency.FIXED:
-                    # Para fixo, também criamos apenas um par de "mães"
-                    total_creations = 1
-
-            transfer_group_id = uuid.uuid4()
-            first_transaction_out = None
-
-            for i in range(total_creations):
-                current_date = start_date + relativedelta(months=i)
-                current_status = initial_status if i == 0 else Transaction.Status.PENDING
-                
-                desc_suffix = f"({i+1}/{installments})" if frequency == Transaction.Frequency.INSTALLMENT else ""
-
-                # --- Cria a transação de SAÍDA ---
-                created_transaction_out = Transaction.objects.create(
-                    user=user,
-                    transaction_type=Transaction.TransactionType.EXPENSE,
-                    account=account,
-                    amount=amount,
-                    date=current_date,
-                    description=f"Transfer to {to_account.name} {desc_suffix}".strip(),
-                    status=current_status,
-                    completion_date=current_date if current_status == Transaction.Status.COMPLETED else None,
-                    transfer_id=transfer_group_id,
-                    # Se for FIXO, marque como tal
-                    frequency=frequency if is_recurring else Transaction.Frequency.NONE,
-                    # Se for FIXO, installments = 0 (infinito)
-                    installments=installments if frequency == Transaction.Frequency.INSTALLMENT else 0,
-                    installment_number=i + 1,
-                    recurrence_id=transfer_group_id if is_recurring else None,
-                )
-                
-                # --- Cria a transação de ENTRADA ---
-                Transaction.objects.create(
-                    user=user,
-                    transaction_type=Transaction.TransactionType.INCOME,
-                    account=to_account,
-                    amount=amount,
-                    date=current_date,
-                    description=f"Transfer from {account.name} {desc_suffix}".strip(),
-                    status=current_status,
-                    completion_date=current_date if current_status == Transaction.Status.COMPLETED else None,
-                    transfer_id=transfer_group_id,
-                    frequency=frequency if is_recurring else Transaction.Frequency.NONE,
-                    installments=installments if frequency == Transaction.Frequency.INSTALLMENT else 0,
-                    installment_number=i + 1,
-                    recurrence_id=transfer_group_id if is_recurring else None,
-                )
-                
-                if i == 0:
-                    first_transaction_out = created_transaction_out
+            # Todas as pernas são montadas em memória e gravadas de uma só vez.
+            created = create_transactions(build_transfer(
+                user=user,
+                account=account,
+                to_account=to_account,
+                amount=amount,
+                start_date=start_date,
+                initial_status=initial_status,
+                is_recurring=is_recurring,
+                frequency=frequency,
+                installments=installments,
+            ))
+            first_transaction_out = created[0]
+            materialize_parents(
+                [leg for leg in created if leg.frequency == Transaction.Frequency.FIXED], horizon_end()
+            )
             
             self.object = first_transaction_out
             return redirect(self.get_success_url())
@@ -240,37 +254,33 @@ class TransactionCreateView(LoginRequiredMixin, CreateView):
             if self.object.status == Transaction.Status.COMPLETED:
                 self.object.completion_date = self.object.date
                 self.object.save()
+
+            # Recorrência fixa: cria já as ocorrências até o horizonte.
+            if self.object.frequency == Transaction.Frequency.FIXED:
+                materialize_parents([self.object], horizon_end())
             
+            warn_if_over_budget(self.request, self.object)
             # Deixa a lógica padrão da CreateView finalizar o processo
             return super().form_valid(form)
 
         # --- Caso 3b: Receita/Despesa PARCELADA ---
         if frequency == Transaction.Frequency.INSTALLMENT:
-            recurrence_group_id = uuid.uuid4()
-            first_transaction = None
-
-            for i in range(installments):
-                current_date = start_date + relativedelta(months=i)
-                current_status = initial_status if i == 0 else Transaction.Status.PENDING
-                
-                created_transaction = Transaction.objects.create(
-                    user=user,
-                    account=account,
-                    transaction_type=transaction_type,
-                    amount=amount,
-                    date=current_date,
-                    category=category,
-                    description=f"{description} ({i+1}/{installments})",
-                    status=current_status,
-                    recurrence_id=recurrence_group_id,
-                    installment_number=i + 1,
-                    completion_date=current_date if current_status == Transaction.Status.COMPLETED else None
-                )
-                if i == 0:
-                    first_transaction = created_transaction
+            created = create_transactions(build_installments(
+                user=user,
+                account=account,
+                transaction_type=transaction_type,
+                amount=amount,
+                start_date=start_date,
+                category=category,
+                description=description,
+                initial_status=initial_status,
+                installments=installments,
+            ))
+            first_transaction = created[0]
             
             # Define self.object para que o get_success_url funcione sem erros
             self.object = first_transaction
+            warn_if_over_budget(self.request, first_transaction)
             return redirect(self.get_success_url())
 
         # Fallback caso algo inesperado aconteça
@@ -284,19 +294,13 @@ class TransactionCreateView(LoginRequiredMixin, CreateView):
 @login_required
 def complete_transaction(request, pk):
     """
-    Marks a transaction as completed. Handles both real and projected transactions.
+    Marks a transaction as completed. FIXED occurrences are real rows up to the
+    materialised horizon (the parent being the first of them), so they are
+    completed like any other transaction.
     """
     transaction = get_object_or_404(Transaction, pk=pk, user=request.user)
-    
-    # Se a transação for uma "mãe" fixa, nós não a efetivamos.
-    # Em vez disso, criamos uma nova transação "filha" para o mês atual e a efetivamos.
-    if transaction.frequency == Transaction.Frequency.FIXED:
-        # Lógica futura para criar a instância do mês pode ser adicionada aqui
-        # Por enquanto, podemos simplesmente não fazer nada para evitar erros.
-        pass # Impedir a efetivação da "mãe"
-    
-    # Se for uma transação normal (única ou parcela) e estiver pendente
-    elif transaction.completion_date is None:
+
+    if transaction.completion_date is None:
         transaction.completion_date = timezone.now().date()
         transaction.status = Transaction.Status.COMPLETED
         transaction.save()
@@ -315,12 +319,23 @@ class TransactionUpdateView(LoginRequiredMixin, UpdateView):
         """Ensure users can only edit their own transactions."""
         return Transaction.objects.filter(user=self.request.user)
 
+    @db_transaction.atomic
+    def form_valid(self, form):
+        """Editing a FIXED parent rebuilds its pending occurrences from the new values."""
+        response = super().form_valid(form)
+        if self.object.frequency == Transaction.Frequency.FIXED:
+            resync_children(self.object)
+        warn_if_over_budget(self.request, self.object)
+        return response
+
     def get_form(self, form_class=None):
         form = super().get_form(form_class)
         # Filter accounts owned by the user
         form.fields['account'].queryset = Account.objects.filter(user=self.request.user)
         # ALSO filter categories owned by the user
         form.fields['category'].queryset = Category.objects.filter(user=self.request.user)
+        use_cached_choices(form.fields['account'], user_accounts(self.request.user.pk))
+        use_cached_choices(form.fields['category'], user_categories(self.request.user.pk))
         return form
 
 class TransactionDeleteView(LoginRequiredMixin, DeleteView):
@@ -333,10 +348,122 @@ class TransactionDeleteView(LoginRequiredMixin, DeleteView):
         """Ensure users can only delete their own transactions."""
         return Transaction.objects.filter(user=self.request.user)
 
+    @db_transaction.atomic
+    def form_valid(self, form):
+        """Deleting a FIXED parent also deletes its pending occurrences; completed ones stay."""
+        if self.object.frequency == Transaction.Frequency.FIXED:
+            effects = TransactionEffects()
+            delete_pending_children(self.object, effects)
+            effects.apply()
+        return super().form_valid(form)
+
+class TransactionForecastView(LoginRequiredMixin, View):
+    """
+    JSON cash-flow forecast: the projected balance of each account for the next
+    `months` months (default 12, at most 120), `granularity` daily or monthly.
+    """
+    max_months = 120
+    query_budget = 5
+
+    def get(self, request):
+        try:
+            months = int(request.GET.get('months', 12))
+        except ValueError:
+            return JsonResponse({'error': "'months' must be an integer."}, status=400)
+        granularity = request.GET.get('granularity', 'daily')
+        if not 1 <= months <= self.max_months or granularity not in ('daily', 'monthly'):
+            return JsonResponse(
+                {'error': f"'months' must be 1-{self.max_months} and 'granularity' daily or monthly."},
+                status=400
+            )
+        forecast = forecast_balances(request.user, months=months, granularity=granularity)
+        return JsonResponse({'granularity': granularity, **forecast})
+
+class TransactionExportView(LoginRequiredMixin, View):
+    """
+    Streams the user's transactions as CSV, JSON Lines or Parquet, filtered by
+    account, date range (inclusive) and status. Rows are read from the database
+    in chunks and written to the response as they arrive.
+    """
+
+    def get(self, request):
+        form = TransactionExportForm(request.GET or {'format': 'csv'}, user=request.user)
+        if not form.is_valid():
+            return JsonResponse({'errors': form.errors}, status=400)
+        filters = form.cleaned_data
+        fmt = filters['format']
+        if fmt == 'parquet':
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                return JsonResponse({'error': "Parquet export is not available on this server."}, status=400)
+
+        writer, content_type, extension = FORMATS[fmt]
+        rows = iter_rows(export_queryset(
+            user=request.user,
+            account=filters['account'],
+            start=filters['start'],
+            end=filters['end'],
+            status=filters['status'],
+        ))
+        response = StreamingHttpResponse(writer(rows), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="transactions.{extension}"'
+        return response
+
+class StatementImportView(LoginRequiredMixin, FormView):
+    """
+    Imports a CSV/OFX bank statement into one of the user's accounts. The upload
+    is streamed through the parser line by line and inserted in bulk chunks;
+    lines already present in the account are skipped.
+    """
+    form_class = StatementImportForm
+    template_name = 'transactions/statement_import.html'
+    success_url = reverse_lazy('transactions:transaction_list')
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['user'] = self.request.user
+        return kwargs
+
+    def form_valid(self, form):
+        lines = io.TextIOWrapper(form.cleaned_data['statement'].file, encoding='utf-8-sig', errors='replace')
+        try:
+            result = import_statement(
+                lines, form.cleaned_data['account'], fmt=form.cleaned_data['file_format']
+            )
+        except StatementError as error:
+            form.add_error('statement', str(error))
+            return self.form_invalid(form)
+        messages.success(
+            self.request,
+            f"Imported {result.inserted} transactions ({result.duplicates} duplicates skipped)."
+        )
+        return super().form_valid(form)
+
+class CategoryAnalyticsView(LoginRequiredMixin, TemplateView):
+    """Spending by category over a range (default the last 12 months), with monthly trends."""
+    template_name = 'transactions/category_analytics.html'
+    query_budget = 5
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        form = CategoryAnalyticsForm(self.request.GET)
+        if not form.is_valid():
+            # Filtro inválido: mostra os erros sobre o período padrão.
+            default = CategoryAnalyticsForm({})
+            default.is_valid()
+            filters = default.cleaned_data
+        else:
+            filters = form.cleaned_data
+        context['form'] = form
+        context['report'] = category_report(self.request.user.pk, filters['start'], filters['end'], filters['top'])
+        return context
+
 class CategoryListView(LoginRequiredMixin, ListView):
     model = Category
     template_name = 'transactions/category_list.html'
     context_object_name = 'categories'
+    query_budget = 3
 
     def get_queryset(self):
         return Category.objects.filter(user=self.request.user)
@@ -366,4 +493,74 @@ class CategoryDeleteView(LoginRequiredMixin, DeleteView):
     success_url = reverse_lazy('transactions:category_list')
 
     def get_queryset(self):
-        return Category.objects.filter(user=self.request.user)    
\ No newline at end of file
+        return Category.objects.filter(user=self.request.user)
+
+
+class BudgetListView(LoginRequiredMixin, ListView):
+    """The budgets of a month (`year`, `month`, default the current one), with what is left of each."""
+    model = Budget
+    template_name = 'transactions/budget_list.html'
+    context_object_name = 'budgets'
+    query_budget = 3
+
+    def get_queryset(self):
+        today = timezone.now().date()
+        self.year = int(self.request.GET.get('year', today.year))
+        self.month = int(self.request.GET.get('month', today.month))
+        return month_budgets(self.request.user.pk, self.year, self.month)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        current_month = date(self.year, self.month, 1)
+        context.update(
+            current_month=current_month,
+            prev_month=current_month - relativedelta(months=1),
+            next_month=current_month + relativedelta(months=1),
+        )
+        return context
+
+class BudgetCreateView(LoginRequiredMixin, FormView):
+    """Sets the limit of a category in a month; an existing budget for it gets the new limit."""
+    form_class = BudgetForm
+    template_name = 'transactions/budget_form.html'
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['user'] = self.request.user
+        return kwargs
+
+    def get_initial(self):
+        today = timezone.now().date()
+        return {'year': self.request.GET.get('year', today.year), 'month': self.request.GET.get('month', today.month)}
+
+    def form_valid(self, form):
+        budget = set_budget(self.request.user, **form.cleaned_data)
+        return redirect(f"{reverse_lazy('transactions:budget_list')}?year={budget.year}&month={budget.month}")
+
+class BudgetUpdateView(LoginRequiredMixin, UpdateView):
+    model = Budget
+    fields = ['limit']
+    template_name = 'transactions/budget_form.html'
+
+    def form_valid(self, form):
+        # Só o limite: `spent` é um contador que outras gravações movem ao mesmo tempo.
+        self.object = form.save(commit=False)
+        self.object.save(update_fields=['limit'])
+        return redirect(self.get_success_url())
+
+    def get_queryset(self):
+        return Budget.objects.filter(user=self.request.user).select_related('category')
+
+    def get_success_url(self):
+        return f"{reverse_lazy('transactions:budget_list')}?year={self.object.year}&month={self.object.month}"
+
+class BudgetDeleteView(LoginRequiredMixin, DeleteView):
+    """Deletes a budget from the list page (POST only, no confirmation page)."""
+    model = Budget
+    http_method_names = ['post']
+
+    def get_queryset(self):
+        return Budget.objects.filter(user=self.request.user)
+
+    def get_success_url(self):
+        return f"{reverse_lazy('transactions:budget_list')}?year={self.object.year}&month={self.object.month}"
@@ -1,14 +1,19 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser
+from .models import CustomUser, Household
 
 class CustomUserAdmin(UserAdmin):
     """
     Defines the admin interface for the CustomUser model.
     """
     model = CustomUser
-    # You can customize list_display, fieldsets, etc., here
-    # For now, we'll use the defaults from UserAdmin.
+    list_display = UserAdmin.list_display + ('household',)
+    fieldsets = UserAdmin.fieldsets + (('Household', {'fields': ('household',)}),)
 
 # Register the CustomUser model with the custom admin class
-admin.site.register(CustomUser, CustomUserAdmin)
\ No newline at end of file
+admin.site.register(CustomUser, CustomUserAdmin)
+
+@admin.register(Household)
+class HouseholdAdmin(admin.ModelAdmin):
+    list_display = ('name', 'created_at')
+    search_fields = ('name',)
@@ -1,10 +1,28 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
+
+class Household(models.Model):
+    """
+    A group of users (e.g. a couple) whose finances are also looked at
+    together, as in the household net-worth rollup.
+    """
+    name = models.CharField(max_length=100)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+
 class CustomUser(AbstractUser):
     """
     Custom user model inheriting from AbstractUser.
     This allows for future customization of user fields.
-    Pass is used as we don't need additional fields yet.
     """
-    pass
\ No newline at end of file
+    household = models.ForeignKey(
+        Household,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='members'
+    )